@@ -0,0 +1,105 @@
+"""
+プロファイル切り替えのベンチマーク
+
+一時フォルダに設定ディレクトリを作成し、グループ数の異なる2つのプロファイルを
+交互に切り替えて所要時間を計測する。永続化ワーカーなしで実行するため、
+計測値には各ファイルへの反映（書き込み）も含まれる。
+
+使い方:
+    python benchmarks/profile_switch_benchmark.py --groups 10 100 1000 --items 10 --runs 20
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import contextlib
+
+LAUNCHER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "launcher")
+sys.path.insert(0, os.path.abspath(LAUNCHER_DIR))
+
+
+def make_groups(prefix, groups_count, items_count):
+    """ベンチマーク用のグループデータを作成"""
+    return [{
+        'id': f"{prefix}-{g}",
+        'name': f"{prefix} {g}",
+        'x': (g % 20) * 90,
+        'y': (g // 20) * 90,
+        'custom_icon_path': None,
+        'items': [{
+            'path': f"C:\\Apps\\{prefix}\\{g}\\app{i}.exe",
+            'name': f"app{i}",
+            'type': 'file',
+            'checked': True
+        } for i in range(items_count)]
+    } for g in range(groups_count)]
+
+
+def run_case(backend, groups_count, items_count, runs, cache_size, durability):
+    """1つの条件で切り替え時間を計測し、ミリ秒のリストを返す"""
+    from data.data_manager import DataManager
+    from data.profile_manager import ProfileManager
+
+    data_manager = DataManager()
+    data_manager.configure_durability(durability)
+    if backend == "sqlite":
+        data_manager.enable_sqlite_storage()
+    profile_manager = ProfileManager(data_manager)
+    profile_manager.configure_cache(cache_size)
+
+    for name in ("bench-a", "bench-b"):
+        data_manager.save_groups(make_groups(name, groups_count, items_count))
+        profile_manager.save_profile(name)
+
+    timings = []
+    targets = ["bench-a", "bench-b"]
+    for run in range(runs + 1):
+        started_time = time.perf_counter()
+        success, message = profile_manager.switch_to_profile(targets[run % 2])
+        elapsed_ms = (time.perf_counter() - started_time) * 1000
+        if not success:
+            raise RuntimeError(message)
+        if run > 0:  # 初回はキャッシュが温まっていないため除外
+            timings.append(elapsed_ms)
+
+    data_manager.close_storage()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="プロファイル切り替えのベンチマーク")
+    parser.add_argument("--groups", type=int, nargs="+", default=[10, 100, 1000], help="プロファイルのグループ数")
+    parser.add_argument("--items", type=int, default=10, help="グループあたりのアイテム数")
+    parser.add_argument("--runs", type=int, default=20, help="計測回数")
+    parser.add_argument("--backends", nargs="+", default=["json", "sqlite"], choices=["json", "sqlite"])
+    parser.add_argument("--cache-size", type=int, default=4, help="プロファイルキャッシュの保持件数")
+    parser.add_argument("--durability", default="strict", choices=["strict", "batched", "relaxed"])
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'groups':>7} {'items':>7} {'median ms':>10} {'p90 ms':>9} {'max ms':>9}")
+    for backend in args.backends:
+        for groups_count in args.groups:
+            # ケースごとに空の設定ディレクトリを使う
+            temp_dir = tempfile.mkdtemp(prefix="iconlaunch-bench-")
+            os.environ['HOME'] = temp_dir
+            os.environ['USERPROFILE'] = temp_dir
+            os.environ['APPDATA'] = temp_dir
+            try:
+                # アプリのログ出力は結果の表示に混ざらないように捨てる
+                with contextlib.redirect_stdout(io.StringIO()):
+                    timings = sorted(run_case(backend, groups_count, args.items, args.runs,
+                                              args.cache_size, args.durability))
+                p90 = timings[min(len(timings) - 1, int(len(timings) * 0.9))]
+                print(f"{backend:<8} {groups_count:>7} {groups_count * args.items:>7} "
+                      f"{statistics.median(timings):>10.2f} {p90:>9.2f} {timings[-1]:>9.2f}")
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
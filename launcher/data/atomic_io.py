@@ -0,0 +1,152 @@
+"""
+AtomicWriter - 一時ファイル・fsync・os.replace による安全なファイル書き込み
+"""
+
+import os
+import json
+import threading
+
+
+# 書き込みの安全性レベル
+DURABILITY_STRICT = "strict"  # 書き込みごとにファイルとディレクトリをfsync
+DURABILITY_RELAXED = "relaxed"  # fsyncしない（OSのキャッシュに任せる）
+DURABILITY_BATCHED = "batched"  # まとめてfsync（sync_pending呼び出し時）
+DURABILITY_LEVELS = (DURABILITY_STRICT, DURABILITY_RELAXED, DURABILITY_BATCHED)
+
+TEMP_SUFFIX = ".tmp"
+
+
+def validate_json_file(file_path):
+    """JSONとして読み込めるファイルかチェック"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            json.load(f)
+        return True
+    except Exception:
+        return False
+
+
+class AtomicWriter:
+    """アトミック書き込みクラス
+
+    一時ファイルに書き込んでから os.replace で置き換えるため、途中で中断しても
+    元のファイルか新しいファイルのどちらかが必ず残る。
+    """
+
+    def __init__(self, durability=DURABILITY_STRICT):
+        self.durability = durability
+        self.lock = threading.Lock()
+        self.pending_files = set()  # batched でfsync待ちのファイル
+
+    def set_durability(self, durability):
+        """安全性レベルを変更"""
+        if durability not in DURABILITY_LEVELS:
+            print(f"不明な安全性レベル: {durability}")
+            durability = DURABILITY_STRICT
+        if self.durability == DURABILITY_BATCHED and durability != DURABILITY_BATCHED:
+            self.sync_pending()
+        self.durability = durability
+
+    def write_bytes(self, file_path, data):
+        """バイト列をアトミックに書き込み"""
+        temp_file = file_path + TEMP_SUFFIX
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                if self.durability == DURABILITY_STRICT:
+                    os.fsync(f.fileno())
+
+            os.replace(temp_file, file_path)
+
+            if self.durability == DURABILITY_STRICT:
+                self.fsync_directory(os.path.dirname(file_path))
+            elif self.durability == DURABILITY_BATCHED:
+                with self.lock:
+                    self.pending_files.add(file_path)
+            return True
+
+        except Exception:
+            # 一時ファイルが残っていたら削除
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+            raise
+
+    def write_text(self, file_path, text):
+        """文字列をUTF-8でアトミックに書き込み"""
+        return self.write_bytes(file_path, text.encode('utf-8'))
+
+    def write_json(self, file_path, data, indent=2):
+        """JSONをアトミックに書き込み"""
+        return self.write_text(file_path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+    def sync_pending(self):
+        """batched で保留中のファイルとディレクトリをfsync"""
+        with self.lock:
+            pending = self.pending_files
+            self.pending_files = set()
+
+        directories = set()
+        for file_path in pending:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                directories.add(os.path.dirname(file_path))
+            except OSError as e:
+                print(f"fsyncエラー ({file_path}): {e}")
+
+        for directory in directories:
+            self.fsync_directory(directory)
+        return len(pending)
+
+    def fsync_directory(self, directory):
+        """ディレクトリエントリの変更をfsync（Windowsでは不要・不可のためスキップ）"""
+        if os.name == 'nt' or not directory:
+            return
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"ディレクトリのfsyncエラー ({directory}): {e}")
+
+    def recover_temp_files(self, directory, validator=validate_json_file):
+        """中断された書き込みの一時ファイルを復旧または破棄
+
+        本ファイルが存在しないか壊れていて、一時ファイルが正常に読める場合は
+        一時ファイルを本ファイルとして採用する。それ以外は一時ファイルを削除する。
+        """
+        recovered = []
+        discarded = []
+        if not os.path.isdir(directory):
+            return recovered, discarded
+
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.endswith(TEMP_SUFFIX):
+                    continue
+
+                temp_file = os.path.join(root, filename)
+                target_file = temp_file[:-len(TEMP_SUFFIX)]
+                try:
+                    target_ok = os.path.exists(target_file) and validator(target_file)
+                    if not target_ok and validator(temp_file):
+                        os.replace(temp_file, target_file)
+                        recovered.append(target_file)
+                        print(f"中断された書き込みを復旧しました: {target_file}")
+                    else:
+                        os.remove(temp_file)
+                        discarded.append(temp_file)
+                        print(f"不要な一時ファイルを削除しました: {temp_file}")
+                except OSError as e:
+                    print(f"一時ファイルの復旧エラー ({temp_file}): {e}")
+
+        return recovered, discarded
@@ -0,0 +1,212 @@
+"""
+BackupEngine - 内容ハッシュによる重複除外と時間階層での世代保持を行うバックアップエンジン
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from datetime import datetime
+
+
+class BackupEngine:
+    """バックアップエンジンクラス
+
+    直前のバックアップと内容が同一の場合はコピーを作成しない。
+    保持する世代は「直近N分のすべて」「直近24時間の1時間ごとに1つ」
+    「それ以前の1日ごとに1つ」の順に選び、max_backups を上限とする。
+    """
+
+    def __init__(self, backup_dir, prefix, max_backups=10, recent_minutes=30):
+        self.backup_dir = backup_dir
+        self.prefix = prefix
+        self.max_backups = max_backups
+        self.recent_minutes = recent_minutes
+        # 先頭を "." にしてバックアップファイルの一覧に含まれないようにする
+        self.index_file = os.path.join(backup_dir, f".{prefix}_backup_index.json")
+        self.index = None  # {ファイル名: {'hash': str, 'created': float}}
+
+        # メトリクス
+        self.created_count = 0
+        self.skipped_count = 0
+
+    def configure(self, max_backups=None, recent_minutes=None):
+        """保持設定を変更"""
+        if max_backups is not None:
+            self.max_backups = max(1, int(max_backups))
+        if recent_minutes is not None:
+            self.recent_minutes = max(0, int(recent_minutes))
+
+    def create_backup(self, source_file):
+        """ファイルのバックアップを作成（同一内容ならスキップ）"""
+        try:
+            if not os.path.exists(source_file):
+                return None
+
+            os.makedirs(self.backup_dir, exist_ok=True)
+            self.load_index()
+
+            digest = self.compute_hash(source_file)
+            latest = self.get_latest_backup()
+            if latest and self.get_backup_hash(latest) == digest:
+                self.skipped_count += 1
+                return None
+
+            backup_name = self.generate_backup_name()
+            backup_file = os.path.join(self.backup_dir, backup_name)
+            shutil.copy2(source_file, backup_file)
+
+            self.index[backup_name] = {'hash': digest, 'created': time.time()}
+            self.created_count += 1
+
+            self.apply_retention()
+            return backup_file
+
+        except Exception as e:
+            print(f"バックアップ作成エラー ({self.prefix}): {e}")
+            return None
+
+    def generate_backup_name(self):
+        """重複しないバックアップファイル名を生成"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"{self.prefix}_{timestamp}.json"
+        counter = 1
+        while os.path.exists(os.path.join(self.backup_dir, backup_name)):
+            backup_name = f"{self.prefix}_{timestamp}_{counter}.json"
+            counter += 1
+        return backup_name
+
+    def list_backups(self):
+        """バックアップ一覧を取得（新しい順、(ファイル名, 作成時刻)のリスト）"""
+        backups = []
+        if not os.path.exists(self.backup_dir):
+            return backups
+
+        for filename in os.listdir(self.backup_dir):
+            if filename.startswith(f"{self.prefix}_") and filename.endswith(".json"):
+                entry = self.index.get(filename) if self.index else None
+                if entry and 'created' in entry:
+                    created = entry['created']
+                else:
+                    created = os.path.getmtime(os.path.join(self.backup_dir, filename))
+                backups.append((filename, created))
+
+        backups.sort(key=lambda x: x[1], reverse=True)
+        return backups
+
+    def get_latest_backup(self):
+        """最新のバックアップファイル名を取得"""
+        backups = self.list_backups()
+        return backups[0][0] if backups else None
+
+    def get_backup_hash(self, backup_name):
+        """バックアップの内容ハッシュを取得（インデックスになければ計算）"""
+        entry = self.index.setdefault(backup_name, {})
+        if 'hash' not in entry:
+            entry['hash'] = self.compute_hash(os.path.join(self.backup_dir, backup_name))
+        return entry['hash']
+
+    def select_generations(self, backups, now=None):
+        """時間階層に従って保持する世代を選択"""
+        if now is None:
+            now = time.time()
+
+        selected = []
+        seen_hours = set()
+        seen_days = set()
+        recent = []
+        hourly = []
+        daily = []
+
+        for filename, created in backups:
+            age = now - created
+            hour_key = int(created // 3600)
+            day_key = datetime.fromtimestamp(created).strftime("%Y%m%d")
+
+            if age <= self.recent_minutes * 60:
+                recent.append(filename)
+            elif age <= 24 * 3600:
+                if hour_key not in seen_hours:
+                    seen_hours.add(hour_key)
+                    hourly.append(filename)
+            elif day_key not in seen_days:
+                seen_days.add(day_key)
+                daily.append(filename)
+
+        # 直近の世代は予算の半分まで、残りを時間・日単位の世代に割り当てる
+        recent_quota = max(1, self.max_backups // 2)
+        for filename in recent[:recent_quota] + hourly + daily:
+            if len(selected) >= self.max_backups:
+                break
+            selected.append(filename)
+
+        # 予算が余っている場合は残りの新しいものから埋める
+        for filename, _ in backups:
+            if len(selected) >= self.max_backups:
+                break
+            if filename not in selected:
+                selected.append(filename)
+
+        return set(selected)
+
+    def apply_retention(self):
+        """保持対象外のバックアップを削除"""
+        try:
+            self.load_index()
+            backups = self.list_backups()
+            keep = self.select_generations(backups)
+
+            for filename, _ in backups:
+                if filename not in keep:
+                    os.remove(os.path.join(self.backup_dir, filename))
+
+            # 存在しないファイルのインデックスを削除
+            for filename in list(self.index.keys()):
+                if filename not in keep:
+                    del self.index[filename]
+
+            self.save_index()
+
+        except Exception as e:
+            print(f"バックアップクリーンアップエラー ({self.prefix}): {e}")
+
+    def load_index(self):
+        """ハッシュインデックスを読み込み"""
+        if self.index is not None:
+            return self.index
+
+        self.index = {}
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.index = data
+        except Exception as e:
+            print(f"バックアップインデックス読み込みエラー ({self.prefix}): {e}")
+        return self.index
+
+    def save_index(self):
+        """ハッシュインデックスを保存"""
+        try:
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"バックアップインデックス保存エラー ({self.prefix}): {e}")
+
+    def compute_hash(self, file_path):
+        """ファイル内容のSHA-256ハッシュを計算"""
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def get_stats(self):
+        """作成・スキップ数を取得"""
+        return {
+            'created': self.created_count,
+            'skipped': self.skipped_count,
+            'max_backups': self.max_backups
+        }
@@ -0,0 +1,233 @@
+"""
+BlobStore - プロファイル間で共有するグループの内容アドレス型ストア
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from data.profile_files import PROFILE_BODY_FILE, HISTORY_DIR, get_blob_file, get_history_ref
+
+
+class BlobStore:
+    """グループブロブストアクラス
+
+    グループデータを内容のハッシュをファイル名として blobs/ に1回だけ保存し、
+    プロファイルの本体はハッシュの一覧のみを持つ。同じグループを持つ複数の
+    プロファイルは同じブロブを参照する。どのプロファイルがどのブロブを参照して
+    いるかはメモリ上にのみ保持し（起動後の最初の使用時にプロファイルの本体と
+    履歴から作り直す）、参照がなくなったブロブを削除する。保存のたびに参照の
+    記録を書き込まないため、保存の書き込み量は変更されたグループ分のみとなる。
+    プロファイルの履歴のスナップショットは "プロファイル名/history/ID" の名前で参照する。
+    """
+
+    def __init__(self, blobs_dir, profiles_dir, data_manager):
+        self.blobs_dir = blobs_dir
+        self.profiles_dir = profiles_dir
+        self.data_manager = data_manager
+        self.legacy_index_file = os.path.join(blobs_dir, "refs.json")  # 旧バージョンの参照の記録
+        self.refs = None  # {プロファイル名: [ブロブのハッシュ]}
+        self.counts = Counter()  # {ブロブのハッシュ: 参照数}
+        self.lock = threading.RLock()  # 永続化ワーカーとGUIスレッドからの更新を排他
+
+    @staticmethod
+    def hash_group(group):
+        """グループデータのハッシュを計算（キーの順序に依存しない）"""
+        canonical = json.dumps(group, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def put_groups(self, groups):
+        """グループをブロブとして保存し、ハッシュの一覧を返す（既存のブロブは書き込まない）"""
+        hashes = []
+        for group in groups:
+            blob_hash = self.hash_group(group)
+            blob_file = get_blob_file(self.blobs_dir, blob_hash)
+            if not os.path.exists(blob_file):
+                os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+                self.data_manager.write_document(blob_file, group)
+            hashes.append(blob_hash)
+        return hashes
+
+    def store_groups(self, profile_name, groups):
+        """プロファイルのグループをブロブとして保存し、参照を追加してハッシュの一覧を返す
+
+        本体を書き込んだ後に set_profile_refs() で参照を確定する。
+        """
+        with self.lock:
+            # 参照の記録の作り直し（未参照ブロブの削除）が書き込んだブロブを消さないよう先に作る
+            self.load_index()
+            hashes = self.put_groups(groups)
+            self.add_profile_refs(profile_name, hashes)
+            return hashes
+
+    def load_groups(self, hashes):
+        """ハッシュの一覧からグループを読み込み"""
+        if not hashes:
+            return []
+
+        def read_blob(blob_hash):
+            return self.data_manager.codec.read_file(get_blob_file(self.blobs_dir, blob_hash))
+
+        if len(hashes) < 16:
+            return [read_blob(blob_hash) for blob_hash in hashes]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(read_blob, hashes))
+
+    def load_index(self):
+        """参照の記録を取得（まだなければプロファイルの本体と履歴から作り直す）"""
+        with self.lock:
+            if self.refs is None:
+                self.rebuild_index()
+            return self.refs
+
+    def rebuild_index(self):
+        """すべてのプロファイルの本体から参照の記録を作り直し、参照されないブロブを削除"""
+        with self.lock:
+            self.refs = {}
+            if os.path.isdir(self.profiles_dir):
+                for entry in os.listdir(self.profiles_dir):
+                    body_file = os.path.join(self.profiles_dir, entry, PROFILE_BODY_FILE)
+                    if not os.path.exists(body_file):
+                        continue
+                    try:
+                        body = self.data_manager.codec.read_file(body_file)
+                    except Exception as e:
+                        print(f"プロファイル '{entry}' の本体読み込みエラー: {e}")
+                        continue
+                    if isinstance(body, dict) and body.get('group_blobs'):
+                        self.refs[entry] = list(body['group_blobs'])
+                    self.collect_history_refs(entry)
+
+            self.counts = Counter(h for hashes in self.refs.values() for h in hashes)
+            self.sweep()
+
+            # 旧バージョンが保存していた参照の記録は使わないため削除
+            if os.path.exists(self.legacy_index_file):
+                try:
+                    os.remove(self.legacy_index_file)
+                except OSError as e:
+                    print(f"ブロブ参照の記録の削除エラー: {e}")
+
+    def collect_history_refs(self, profile_name):
+        """プロファイルの履歴のスナップショットが参照するブロブを記録に追加"""
+        history_dir = os.path.join(self.profiles_dir, profile_name, HISTORY_DIR)
+        if not os.path.isdir(history_dir):
+            return
+        for filename in os.listdir(history_dir):
+            snapshot_id, ext = os.path.splitext(filename)
+            if ext != ".json":
+                continue
+            try:
+                snapshot = self.data_manager.codec.read_file(os.path.join(history_dir, filename))
+            except Exception as e:
+                print(f"スナップショット読み込みエラー ({profile_name}/{filename}): {e}")
+                continue
+            if isinstance(snapshot, dict) and snapshot.get('group_blobs'):
+                self.refs[get_history_ref(profile_name, snapshot_id)] = list(snapshot['group_blobs'])
+
+    def get_owned_refs(self, profile_name):
+        """プロファイル本体と履歴の参照名を取得"""
+        prefix = f"{profile_name}/"
+        return [ref for ref in self.refs if ref == profile_name or ref.startswith(prefix)]
+
+    def add_profile_refs(self, profile_name, hashes):
+        """本体を書き込む前に新しい参照を追加（書き込み中に中断しても参照が欠けないように）"""
+        with self.lock:
+            self.load_index()
+            current = self.refs.get(profile_name, [])
+            added = [h for h in dict.fromkeys(hashes) if h not in current]
+            if not added:
+                return
+            self.refs[profile_name] = current + added
+            self.counts.update(added)
+
+    def set_profile_refs(self, profile_name, hashes):
+        """本体の書き込み後に参照を確定し、参照がなくなったブロブを削除"""
+        with self.lock:
+            self.load_index()
+            old_hashes = self.refs.get(profile_name, [])
+            new_hashes = list(dict.fromkeys(hashes))
+            if new_hashes == old_hashes:
+                return
+            self.refs[profile_name] = new_hashes
+            self.counts.subtract(old_hashes)
+            self.counts.update(new_hashes)
+            self.collect(old_hashes)
+
+    def remove_profile_refs(self, profile_name, include_history=True):
+        """プロファイル削除時に参照（履歴を含む）を外し、参照がなくなったブロブを削除"""
+        with self.lock:
+            self.load_index()
+            refs = self.get_owned_refs(profile_name) if include_history else [profile_name]
+            refs = [ref for ref in refs if ref in self.refs]
+            if not refs:
+                return
+            old_hashes = []
+            for ref in refs:
+                old_hashes.extend(self.refs.pop(ref))
+            self.counts.subtract(old_hashes)
+            self.collect(old_hashes)
+
+    def update_history_refs(self, profile_name, snapshot_id, hashes, expired_ids=()):
+        """スナップショットの追加と保持数を超えたスナップショットの削除を参照の記録に反映"""
+        with self.lock:
+            self.load_index()
+            if snapshot_id is not None:
+                new_hashes = list(dict.fromkeys(hashes))
+                self.refs[get_history_ref(profile_name, snapshot_id)] = new_hashes
+                self.counts.update(new_hashes)
+            old_hashes = []
+            for expired_id in expired_ids:
+                old_hashes.extend(self.refs.pop(get_history_ref(profile_name, expired_id), []))
+            self.counts.subtract(old_hashes)
+            self.collect(old_hashes)
+
+    def rename_profile_refs(self, old_name, new_name):
+        """プロファイル名の変更を参照の記録に反映"""
+        with self.lock:
+            self.load_index()
+            refs = self.get_owned_refs(old_name)
+            for ref in refs:
+                self.refs[new_name + ref[len(old_name):]] = self.refs.pop(ref)
+
+    def collect(self, candidates):
+        """参照数が0になったブロブを削除"""
+        for blob_hash in set(candidates):
+            if self.counts[blob_hash] > 0:
+                continue
+            del self.counts[blob_hash]
+            blob_file = get_blob_file(self.blobs_dir, blob_hash)
+            try:
+                if os.path.exists(blob_file):
+                    os.remove(blob_file)
+            except OSError as e:
+                print(f"ブロブ削除エラー ({blob_hash}): {e}")
+
+    def sweep(self):
+        """どのプロファイルからも参照されていないブロブファイルを削除"""
+        if not os.path.isdir(self.blobs_dir):
+            return 0
+        removed = 0
+        for root, _, filenames in os.walk(self.blobs_dir):
+            if root == self.blobs_dir:
+                continue
+            for filename in filenames:
+                blob_hash, ext = os.path.splitext(filename)
+                if ext == ".json" and self.counts[blob_hash] <= 0:
+                    try:
+                        os.remove(os.path.join(root, filename))
+                        removed += 1
+                    except OSError as e:
+                        print(f"ブロブ削除エラー ({blob_hash}): {e}")
+        return removed
+
+    def get_stats(self):
+        """ブロブ数と参照数を取得"""
+        with self.lock:
+            self.load_index()
+            return {
+                'blobs': sum(1 for count in self.counts.values() if count > 0),
+                'references': sum(len(hashes) for hashes in self.refs.values())
+            }
@@ -0,0 +1,301 @@
+"""
+Bundle - 設定・グループ・プロファイル・アイコンをまとめたエクスポート用アーカイブ
+"""
+
+import os
+import json
+import hashlib
+import zipfile
+from datetime import datetime
+
+
+BUNDLE_FORMAT = "iconlaunch-bundle"
+BUNDLE_VERSION = "1.0"
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 65536
+
+# プロファイル名に使えない文字（ProfileManagerと同じ）
+INVALID_NAME_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
+
+
+class BundleError(Exception):
+    """アーカイブの形式・整合性のエラー"""
+
+
+class BundleWriter:
+    """アーカイブ書き込みクラス
+
+    エントリーを1つずつ圧縮しながら書き込み、SHA-256とサイズを記録する。
+    最後にすべてのエントリーのハッシュを含むマニフェストを書き込む。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.zip_file = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.entries = {}  # {エントリー名: {'sha256': str, 'size': int}}
+
+    def write_bytes(self, arcname, data):
+        """バイト列をエントリーとして書き込み"""
+        with self.zip_file.open(arcname, 'w') as f:
+            f.write(data)
+        self.entries[arcname] = {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+    def write_json(self, arcname, data):
+        """JSONをエントリーとして書き込み"""
+        self.write_bytes(arcname, json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    def write_file(self, arcname, source_path):
+        """ファイルを分割して読みながらエントリーとして書き込み"""
+        hasher = hashlib.sha256()
+        size = 0
+        with open(source_path, 'rb') as src, self.zip_file.open(arcname, 'w', force_zip64=True) as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+        self.entries[arcname] = {'sha256': hasher.hexdigest(), 'size': size}
+
+    def close(self, manifest):
+        """マニフェストを書き込んでアーカイブを閉じる"""
+        manifest = dict(manifest, format=BUNDLE_FORMAT, version=BUNDLE_VERSION, entries=self.entries)
+        self.zip_file.writestr(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2))
+        self.zip_file.close()
+
+    def abort(self):
+        """書き込みを中止して作成途中のファイルを削除"""
+        try:
+            self.zip_file.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class BundleReader:
+    """アーカイブ読み込みクラス
+
+    マニフェストのハッシュとエントリーを分割して読みながら照合するため、
+    アーカイブ全体をメモリに読み込まずに整合性を確認できる。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.zip_file = zipfile.ZipFile(path, 'r')
+            self.manifest = json.loads(self.zip_file.read(MANIFEST_FILE).decode('utf-8'))
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:
+            raise BundleError(f"アーカイブを読み込めません: {e}")
+
+        if not isinstance(self.manifest, dict) or self.manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError("iconLaunchのエクスポートファイルではありません")
+        self.entries = self.manifest.get('entries', {})
+
+    def close(self):
+        self.zip_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def iter_chunks(self, arcname):
+        """エントリーを分割して読み込み、読み終えた時点でハッシュとサイズを照合"""
+        expected = self.entries.get(arcname)
+        if expected is None:
+            raise BundleError(f"マニフェストにないエントリーです: {arcname}")
+
+        hasher = hashlib.sha256()
+        size = 0
+        with self.zip_file.open(arcname, 'r') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                size += len(chunk)
+                yield chunk
+        if size != expected['size'] or hasher.hexdigest() != expected['sha256']:
+            raise BundleError(f"エントリーが破損しています: {arcname}")
+
+    def verify(self, progress=None):
+        """すべてのエントリーを照合（データは保持しない）"""
+        names = list(self.entries)
+        for index, arcname in enumerate(names):
+            if progress is not None:
+                progress(index, len(names), f"検証中: {arcname}")
+            for _ in self.iter_chunks(arcname):
+                pass
+
+    def read_json(self, arcname):
+        """JSONエントリーを照合しながら読み込み"""
+        data = b''.join(self.iter_chunks(arcname))
+        return json.loads(data.decode('utf-8'))
+
+    def extract_file(self, arcname, dest_path):
+        """エントリーを照合しながらファイルに書き出し（破損時は書き出さない）"""
+        temp_path = f"{dest_path}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in self.iter_chunks(arcname):
+                    f.write(chunk)
+            os.replace(temp_path, dest_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def hash_file(path):
+    """ファイル内容のSHA-256ハッシュを計算"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_valid_profile_name(profile_name):
+    """プロファイル名として書き込めるかチェック"""
+    return (isinstance(profile_name, str) and profile_name.strip() not in ('', '.', '..') and
+            not any(char in profile_name for char in INVALID_NAME_CHARS))
+
+
+def collect_icon_paths(groups):
+    """グループのカスタムアイコンのパスを取得"""
+    return [group['custom_icon_path'] for group in groups if group.get('custom_icon_path')]
+
+
+def export_bundle(export_path, snapshot, profile_manager, icon_resolver=None, progress=None):
+    """アーカイブを作成（バックグラウンドスレッドから呼ばれる）
+
+    snapshot はGUIスレッドで取得した {'settings', 'groups', 'profiles': [名前], 'current_profile'}。
+    プロファイルは1件ずつ読み込んで書き込み、アイコンは内容のハッシュで重複を除いて格納する。
+    """
+    writer = BundleWriter(export_path)
+    icons = {}  # {custom_icon_path: エントリー名}
+    icon_entries = {}  # {ハッシュ: エントリー名}
+
+    def add_icons(groups):
+        if icon_resolver is None:
+            return
+        for icon_path in collect_icon_paths(groups):
+            if icon_path in icons:
+                continue
+            resolved_path = icon_resolver(icon_path)
+            if not resolved_path or not os.path.isfile(resolved_path):
+                continue
+            icon_hash = hash_file(resolved_path)
+            if icon_hash not in icon_entries:
+                arcname = f"icons/{icon_hash}{os.path.splitext(resolved_path)[1].lower()}"
+                writer.write_file(arcname, resolved_path)
+                icon_entries[icon_hash] = arcname
+            icons[icon_path] = icon_entries[icon_hash]
+
+    try:
+        profile_names = snapshot.get('profiles', [])
+        total = len(profile_names) + 2
+        if progress is not None:
+            progress(0, total, "設定を書き込み中")
+        writer.write_json("settings.json", snapshot.get('settings', {}))
+        writer.write_json("groups.json", snapshot.get('groups', []))
+        add_icons(snapshot.get('groups', []))
+
+        profiles = []  # [{'name': プロファイル名, 'entry': エントリー名}]
+        for index, profile_name in enumerate(profile_names):
+            if progress is not None:
+                progress(index + 1, total, f"プロファイルを書き込み中: {profile_name}")
+            try:
+                profile_data = profile_manager.read_profile_data(profile_name)
+            except Exception as e:
+                print(f"プロファイル '{profile_name}' の読み込みエラー: {e}")
+                continue
+            arcname = f"profiles/{index:04d}.json"
+            writer.write_json(arcname, profile_data)
+            add_icons(profile_data.get('groups', []))
+            profiles.append({'name': profile_name, 'entry': arcname})
+
+        writer.close({
+            'exported': datetime.now().isoformat(),
+            'app_name': 'iconLaunch',
+            'current_profile': snapshot.get('current_profile'),
+            'profiles': profiles,
+            'icons': icons
+        })
+        if progress is not None:
+            progress(total, total, "完了")
+        return {'path': export_path, 'profiles': len(profiles), 'icons': len(icon_entries)}
+
+    except Exception:
+        writer.abort()
+        raise
+
+
+def import_bundle(import_path, profile_manager, icons_dir, progress=None):
+    """アーカイブを検証してプロファイルとアイコンを書き込み（バックグラウンドスレッドから呼ばれる）
+
+    すべてのエントリーを照合してから書き込むため、破損したアーカイブは何も変更しない。
+    設定・グループ・現在のプロファイルはGUIスレッドで反映するため戻り値で返す。
+    """
+    with BundleReader(import_path) as reader:
+        manifest = reader.manifest
+        profiles = manifest.get('profiles', [])
+        icons = manifest.get('icons', {})
+        total = len(reader.entries) + len(profiles) + 1
+
+        reader.verify(lambda done, _, message: progress(done, total, message) if progress else None)
+        done = len(reader.entries)
+
+        # 書き込み前にすべて検証し、破損・不正なアーカイブでは何も変更しない
+        for profile in profiles:
+            if not isinstance(profile, dict) or not is_valid_profile_name(profile.get('name')):
+                raise BundleError(f"無効なプロファイル名です: {profile}")
+
+        # 参照しているエントリーがすべてマニフェストにあるか（verify はマニフェストのエントリーのみ照合する）
+        referenced = (["settings.json", "groups.json"] +
+                      [profile.get('entry') for profile in profiles] + list(icons.values()))
+        missing = [arcname for arcname in referenced if not isinstance(arcname, str) or arcname not in reader.entries]
+        if missing:
+            raise BundleError(f"アーカイブにないエントリーを参照しています: {', '.join(map(str, missing))}")
+
+        # アイコンを書き出し、グループのパスを書き出し先のファイル名に置き換える
+        icon_names = {}  # {エントリー名: 書き出したファイル名}
+        icon_renames = {}  # {元のcustom_icon_path: 書き出したファイル名}
+        if icons:
+            os.makedirs(icons_dir, exist_ok=True)
+        for icon_path, arcname in icons.items():
+            if arcname not in icon_names:
+                icon_hash = os.path.splitext(os.path.basename(arcname))[0]
+                filename = os.path.basename(icon_path.replace('\\', '/'))
+                if filename in ('', '.', '..'):
+                    filename = os.path.basename(arcname)
+                dest_path = os.path.join(icons_dir, filename)
+                if os.path.exists(dest_path) and hash_file(dest_path) != icon_hash:
+                    stem, ext = os.path.splitext(filename)
+                    filename = f"{stem}_{icon_hash[:8]}{ext}"
+                    dest_path = os.path.join(icons_dir, filename)
+                if not os.path.exists(dest_path):
+                    reader.extract_file(arcname, dest_path)
+                icon_names[arcname] = filename
+            icon_renames[icon_path] = icon_names[arcname]
+
+        def rewrite_icons(groups):
+            for group in groups:
+                if group.get('custom_icon_path') in icon_renames:
+                    group['custom_icon_path'] = icon_renames[group['custom_icon_path']]
+            return groups
+
+        for profile in profiles:
+            done += 1
+            if progress is not None:
+                progress(done, total, f"プロファイルを読み込み中: {profile['name']}")
+            profile_data = reader.read_json(profile['entry'])
+            rewrite_icons(profile_data.get('groups', []))
+            profile_manager.write_profile_data(profile['name'], profile_data)
+
+        result = {
+            'settings': reader.read_json("settings.json"),
+            'groups': rewrite_icons(reader.read_json("groups.json")),
+            'current_profile': manifest.get('current_profile'),
+            'profiles': len(profiles),
+            'icons': len(icon_names)
+        }
+        if progress is not None:
+            progress(total, total, "完了")
+        return result
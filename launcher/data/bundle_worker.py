@@ -0,0 +1,30 @@
+"""
+BundleWorker - アーカイブのエクスポート・インポートを実行するバックグラウンドスレッド
+"""
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class BundleWorker(QThread):
+    """アーカイブ処理ワーカークラス
+
+    task(progress) をワーカースレッドで実行し、進捗と結果をシグナルでGUIスレッドに通知する。
+    """
+
+    progress = pyqtSignal(int, int, str)  # 完了数, 全体数, メッセージ
+    succeeded = pyqtSignal(object)  # task の戻り値
+    failed = pyqtSignal(str)  # エラーメッセージ
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+
+    def run(self):
+        """ワーカースレッドのメイン処理"""
+        try:
+            result = self.task(self.progress.emit)
+        except Exception as e:
+            print(f"アーカイブ処理エラー: {e}")
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(result)
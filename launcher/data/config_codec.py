@@ -0,0 +1,220 @@
+"""
+ConfigCodec - 設定ファイルのエンコード（整形JSON / 圧縮JSON / バイナリ）と形式判定
+"""
+
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+# バイナリ形式のヘッダー: マジック(4バイト) + ヘッダーバージョン(1バイト) + コーデックID(1バイト)
+MAGIC = b"ICLF"
+HEADER_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+CODEC_MSGPACK = 1
+CODEC_CBOR = 2
+CODEC_ZLIB_JSON = 3  # 追加ライブラリなしで使える組み込みのフォールバック
+
+# 書き込み形式
+ENCODING_JSON = "json"  # 従来の整形JSON
+ENCODING_COMPACT = "compact"  # 改行・インデントなしのJSON
+ENCODING_BINARY = "binary"  # ヘッダー付きバイナリ
+ENCODINGS = (ENCODING_JSON, ENCODING_COMPACT, ENCODING_BINARY)
+
+# ドキュメントの version フィールド（メジャーバージョンが読めるかどうかの判定に使う）
+LEGACY_VERSION = "1.0"  # 整形JSON（旧バージョンのアプリでも読める）
+FORMAT_VERSION = "1.1"  # 圧縮JSON・バイナリ
+SUPPORTED_MAJOR_VERSION = 1
+
+
+class UnsupportedFormatError(ValueError):
+    """読み込めない形式・バージョンのファイル"""
+
+
+def get_binary_codec_id():
+    """利用可能な中で最も効率のよいバイナリコーデックを取得"""
+    if msgpack is not None:
+        return CODEC_MSGPACK
+    if cbor2 is not None:
+        return CODEC_CBOR
+    return CODEC_ZLIB_JSON
+
+
+class ConfigCodec:
+    """設定ファイルのコーデッククラス
+
+    読み込み時は先頭のヘッダーで形式を判定するため、どの形式で書かれた
+    ファイルでも読める。書き込み形式は encoding で切り替える。
+    """
+
+    def __init__(self, encoding=ENCODING_JSON):
+        self.encoding = ENCODING_JSON
+        self.set_encoding(encoding)
+
+    def set_encoding(self, encoding):
+        """書き込み形式を変更"""
+        if encoding not in ENCODINGS:
+            print(f"不明な設定ファイル形式: {encoding}")
+            encoding = ENCODING_JSON
+        self.encoding = encoding
+
+    def encode(self, data):
+        """データをバイト列にエンコード"""
+        if isinstance(data, dict) and 'version' in data:
+            version = LEGACY_VERSION if self.encoding == ENCODING_JSON else FORMAT_VERSION
+            data = dict(data, version=version)
+
+        if self.encoding == ENCODING_JSON:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        if self.encoding == ENCODING_COMPACT:
+            return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        codec_id = get_binary_codec_id()
+        if codec_id == CODEC_MSGPACK:
+            payload = msgpack.packb(data, use_bin_type=True)
+        elif codec_id == CODEC_CBOR:
+            payload = cbor2.dumps(data)
+        else:
+            payload = zlib.compress(
+                json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return MAGIC + bytes([HEADER_VERSION, codec_id]) + payload
+
+    def decode(self, raw):
+        """バイト列をデコード（形式はヘッダーで判定）"""
+        if raw.startswith(MAGIC):
+            if len(raw) < HEADER_SIZE:
+                raise UnsupportedFormatError("ヘッダーが不完全です")
+            header_version = raw[len(MAGIC)]
+            codec_id = raw[len(MAGIC) + 1]
+            payload = raw[HEADER_SIZE:]
+            if header_version > HEADER_VERSION:
+                raise UnsupportedFormatError(f"新しい形式のファイルです（ヘッダーバージョン {header_version}）")
+
+            if codec_id == CODEC_MSGPACK and msgpack is None:
+                raise UnsupportedFormatError("msgpack形式のファイルですが msgpack がインストールされていません")
+            if codec_id == CODEC_CBOR and cbor2 is None:
+                raise UnsupportedFormatError("CBOR形式のファイルですが cbor2 がインストールされていません")
+            if codec_id not in (CODEC_MSGPACK, CODEC_CBOR, CODEC_ZLIB_JSON):
+                raise UnsupportedFormatError(f"不明なコーデックです（ID {codec_id}）")
+
+            try:
+                if codec_id == CODEC_MSGPACK:
+                    data = msgpack.unpackb(payload, raw=False)
+                elif codec_id == CODEC_CBOR:
+                    data = cbor2.loads(payload)
+                else:
+                    data = json.loads(zlib.decompress(payload).decode('utf-8'))
+            except Exception as e:
+                # 破損したファイルもJSONの破損と同じく ValueError として扱えるようにする
+                raise UnsupportedFormatError(f"デコードエラー: {e}")
+        else:
+            data = json.loads(raw.decode('utf-8-sig'))
+
+        self.check_version(data)
+        return data
+
+    def check_version(self, data):
+        """ドキュメントのバージョンが読めるものかチェック"""
+        if not isinstance(data, dict) or 'version' not in data:
+            return
+        try:
+            major = int(str(data['version']).split('.')[0])
+        except ValueError:
+            raise UnsupportedFormatError(f"不正なバージョンです: {data['version']}")
+        if major > SUPPORTED_MAJOR_VERSION:
+            raise UnsupportedFormatError(f"新しいバージョンのファイルです: {data['version']}")
+
+    def iter_groups(self, raw, meta=None):
+        """グループ文書からグループを1件ずつ取り出す（JSONは配列要素ごとに逐次パース）
+
+        groups より前にあるトップレベルの値（journal_seq など）は meta に格納する。
+        """
+        if meta is None:
+            meta = {}
+
+        if raw.startswith(MAGIC):
+            # バイナリ形式は全体をデコードしてから順に返す
+            data = self.decode(raw)
+            if isinstance(data, dict):
+                meta.update({k: v for k, v in data.items() if k != 'groups'})
+                data = data.get('groups', [])
+            for group in data if isinstance(data, list) else []:
+                yield group
+            return
+
+        text = raw.decode('utf-8-sig')
+        decoder = json.JSONDecoder()
+        index = _skip_whitespace(text, 0)
+
+        if text.startswith('[', index):
+            # 旧形式（グループの配列のみ）
+            yield from _iter_json_array(decoder, text, index)
+            return
+        if not text.startswith('{', index):
+            raise ValueError("不正なデータ形式です")
+
+        index = _skip_whitespace(text, index + 1)
+        while not text.startswith('}', index):
+            key, index = decoder.raw_decode(text, index)
+            index = _skip_whitespace(text, index)
+            if not text.startswith(':', index):
+                raise ValueError(f"不正なJSONです（位置 {index}）")
+            index = _skip_whitespace(text, index + 1)
+
+            if key == 'groups' and text.startswith('[', index):
+                self.check_version(meta)
+                for group in _iter_json_array(decoder, text, index):
+                    yield group
+                return
+
+            meta[key], index = decoder.raw_decode(text, index)
+            index = _skip_whitespace(text, index)
+            if text.startswith(',', index):
+                index = _skip_whitespace(text, index + 1)
+
+    def read_file(self, file_path):
+        """ファイルを読み込んでデコード"""
+        with open(file_path, 'rb') as f:
+            return self.decode(f.read())
+
+    def write_file(self, writer, file_path, data):
+        """データをエンコードしてアトミックに書き込み"""
+        return writer.write_bytes(file_path, self.encode(data))
+
+    def validate_file(self, file_path):
+        """デコードできるファイルかチェック（一時ファイルの復旧判定用）"""
+        try:
+            self.read_file(file_path)
+            return True
+        except Exception:
+            return False
+
+
+def _skip_whitespace(text, index):
+    """空白を読み飛ばした位置を取得"""
+    while index < len(text) and text[index] in ' \t\r\n':
+        index += 1
+    return index
+
+
+def _iter_json_array(decoder, text, index):
+    """text[index] から始まるJSON配列の要素を1件ずつパース"""
+    index = _skip_whitespace(text, index + 1)
+    while not text.startswith(']', index):
+        if index >= len(text):
+            raise ValueError("JSON配列が閉じられていません")
+        item, index = decoder.raw_decode(text, index)
+        yield item
+        index = _skip_whitespace(text, index)
+        if text.startswith(',', index):
+            index = _skip_whitespace(text, index + 1)
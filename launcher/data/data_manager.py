@@ -3,10 +3,20 @@ DataManager - アプリケーションデータの保存・読み込み管理
 """
 
 import os
+import copy
 import json
+import time
+import uuid
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from data.backup_engine import BackupEngine
+from data.group_journal import GroupJournal
+from data.group_store import GroupStore
+from data.storage_backend import SqliteStorageBackend
+from data.atomic_io import AtomicWriter, DURABILITY_STRICT, DURABILITY_RELAXED
+from data.config_codec import ConfigCodec, ENCODING_JSON, UnsupportedFormatError
 
 
 class DataManager:
@@ -18,13 +28,58 @@ class DataManager:
         self.config_dir = self.get_config_directory()
         self.config_file = os.path.join(self.config_dir, "groups.json")
         self.backup_dir = os.path.join(self.config_dir, "backups")
+        self.journal_file = os.path.join(self.config_dir, "groups.journal")
+        self.storage_file = os.path.join(self.config_dir, "launcher.db")
+        self.shards_dir = os.path.join(self.config_dir, "groups.d")
+        self.shard_manifest_file = os.path.join(self.shards_dir, "manifest.json")
+        
+        # ストレージバックエンド（None の場合は従来のJSONファイル）
+        self.storage = None
+        
+        # ジャーナルモード（変更を操作ログとして追記し、一定量でスナップショットに圧縮）
+        self.journal = GroupJournal(self.journal_file)
+        self.journal_mode = False
+        self.journal_compact_bytes = 256 * 1024
+        self.journal_compact_seconds = 600
+        self.journal_baseline = None  # ディスク上の状態（差分計算の基準）
+        self.last_compaction_time = time.time()
+        
+        # 設定ファイルをデコードできなかった場合（新しい形式・ライブラリ不足）は上書きしない
+        self.config_write_blocked = False
+        self.load_error = None  # 読み込めなかった理由（ユーザーへの通知用）
+        
+        # シャードモード（グループごとに1ファイル、並び順はマニフェストで管理）
+        self.sharded_mode = False
+        
+        # 現在のグループデータ（読み込み後はディスクではなくこちらが正）
+        self.group_store = GroupStore()
+        
+        # アトミック書き込み（安全性レベルはSettingsManagerから設定される）
+        self.atomic_writer = AtomicWriter(DURABILITY_STRICT)
+        
+        # 設定ファイルのエンコード（読み込み時は形式を自動判定）
+        self.codec = ConfigCodec(ENCODING_JSON)
+        
+        # 遅延保存スケジューラ・永続化ワーカー（LauncherAppから設定される）
+        self.save_scheduler = None
+        self.io_worker = None
         
         # 設定ディレクトリを作成
         self.ensure_config_directory()
         
+        # 前回中断された書き込みの一時ファイルを復旧
+        self.atomic_writer.recover_temp_files(self.config_dir, self.codec.validate_file)
+        
+        # バックアップエンジン（保持数はSettingsManagerから設定される）
+        self.backup_engine = BackupEngine(self.backup_dir, "groups")
+        
         # 旧バージョンからのマイグレーション
         self.migrate_from_old_version()
         
+        # SQLiteデータベースがあればSQLiteバックエンドを使用
+        if os.path.exists(self.storage_file):
+            self.open_storage()
+        
     def get_config_directory(self):
         """設定ディレクトリのパスを取得"""
         # Windows の場合は %APPDATA% を使用
@@ -43,7 +98,296 @@ class DataManager:
         os.makedirs(self.backup_dir, exist_ok=True)
         
     def save_groups(self, groups_data):
-        """グループデータを保存"""
+        """グループデータを保存（ワーカーがあればバックグラウンドで書き込み）"""
+        # GUIスレッドでの変更の影響を受けないようにスナップショットを作成
+        groups_snapshot = copy.deepcopy(self.ensure_group_ids(groups_data))
+        order = [g['id'] for g in groups_snapshot]
+        changed_groups = {g['id']: g for g in groups_snapshot}
+        removed_ids = self.group_store.apply_changes(order, changed_groups)
+        
+        if self.storage is None and self.sharded_mode:
+            return self.submit_write(self.shards_dir, lambda: self.write_group_shards(
+                order, changed_groups, removed_ids, True))
+        return self.submit_write(self.config_file, lambda: self.write_groups_file(groups_snapshot))
+        
+    def save_group_changes(self, order, changed_groups):
+        """変更されたグループのみを保存（orderは全グループのID順）"""
+        missing = [gid for gid in order if gid not in changed_groups and not self.group_store.contains(gid)]
+        if missing:
+            print(f"未読み込みのグループがあるため差分保存できません: {missing}")
+            return False
+            
+        changed_snapshot = copy.deepcopy(changed_groups)
+        order_changed = order != self.group_store.get_order()
+        removed_ids = self.group_store.apply_changes(order, changed_snapshot)
+        
+        if self.storage is None and self.sharded_mode:
+            # シャードモードでは変更されたグループのファイルのみ書き込む
+            return self.submit_write(self.shards_dir, lambda: self.write_group_shards(
+                list(order), changed_snapshot, removed_ids, order_changed))
+                
+        # 単一ファイル・SQLiteではストアから全体を組み立てて保存
+        groups_snapshot = self.group_store.get_groups()
+        return self.submit_write(self.config_file, lambda: self.write_groups_file(groups_snapshot))
+        
+    def write_all_groups(self, groups_data):
+        """グループ全体をストアを介さずに書き込み（切り替えジャーナルの反映用）"""
+        if self.storage is None and self.sharded_mode:
+            order = [g['id'] for g in groups_data]
+            removed_ids = set()
+            if os.path.isdir(self.shards_dir):
+                manifest_name = os.path.basename(self.shard_manifest_file)
+                removed_ids = {name[:-len(".json")] for name in os.listdir(self.shards_dir)
+                               if name.endswith(".json") and name != manifest_name} - set(order)
+            return self.write_group_shards(order, {g['id']: g for g in groups_data}, removed_ids, True)
+        return self.write_groups_file(groups_data)
+        
+    def get_current_groups(self):
+        """現在のグループデータを取得（ストアが読み込み済みならディスクを読まない）"""
+        if self.group_store.loaded:
+            return self.group_store.snapshot()
+        return self.load_groups()
+        
+    def ensure_group_ids(self, groups_data):
+        """IDのないグループ（旧形式）にIDを付与"""
+        for group in groups_data:
+            if not group.get('id'):
+                group['id'] = uuid.uuid4().hex
+        return groups_data
+        
+    def configure_sharding(self, enabled):
+        """シャードモードの設定を変更（切り替え時はデータを変換）"""
+        enabled = bool(enabled)
+        if enabled == self.sharded_mode:
+            return True
+            
+        try:
+            if self.storage is None:
+                self.wait_for_writes()
+                if enabled and not os.path.exists(self.shard_manifest_file):
+                    # 現在の単一ファイルの内容をシャードに分割
+                    groups = self.ensure_group_ids(self.load_groups())
+                    self.write_group_shards([g['id'] for g in groups],
+                                            {g['id']: g for g in groups}, set(), True)
+                elif not enabled and os.path.exists(self.shard_manifest_file):
+                    # シャードの内容を単一ファイルに統合
+                    groups = self.load_group_shards()
+                    if not self.write_groups_snapshot(groups):
+                        return False
+                    shutil.rmtree(self.shards_dir)
+                    
+            self.sharded_mode = enabled
+            return True
+            
+        except Exception as e:
+            print(f"シャードモード切り替えエラー: {e}")
+            return False
+            
+    def get_shard_file(self, group_id):
+        """グループのシャードファイルのパスを取得"""
+        return os.path.join(self.shards_dir, f"{group_id}.json")
+        
+    def write_group_shards(self, order, changed_groups, removed_ids, write_manifest):
+        """変更されたグループのシャードとマニフェストを書き込み"""
+        try:
+            os.makedirs(self.shards_dir, exist_ok=True)
+            
+            # シャード → マニフェスト → 削除の順で書き込み、途中で中断しても参照切れを起こさない
+            for group_id, group in changed_groups.items():
+                self.write_document(self.get_shard_file(group_id), group)
+                
+            if write_manifest or removed_ids:
+                manifest = {
+                    'version': '1.0',
+                    'created': datetime.now().isoformat(),
+                    'order': order
+                }
+                self.write_document(self.shard_manifest_file, manifest)
+                
+            for group_id in removed_ids:
+                shard_file = self.get_shard_file(group_id)
+                if os.path.exists(shard_file):
+                    os.remove(shard_file)
+                    
+            return True
+            
+        except Exception as e:
+            print(f"グループシャードの保存に失敗: {e}")
+            return False
+            
+    def load_group_shards(self):
+        """マニフェストの順にシャードを並列で読み込み"""
+        manifest = self.codec.read_file(self.shard_manifest_file)
+            
+        order = manifest.get('order', [])
+        if not order:
+            return []
+            
+        def read_shard(group_id):
+            try:
+                return self.codec.read_file(self.get_shard_file(group_id))
+            except Exception as e:
+                print(f"グループシャードの読み込みエラー ({group_id}): {e}")
+                return None
+                
+        with ThreadPoolExecutor(max_workers=min(8, len(order))) as executor:
+            shards = list(executor.map(read_shard, order))
+            
+        return [group for group in shards if group is not None]
+        
+    def write_document(self, file_path, data):
+        """設定された形式でエンコードしてアトミックに書き込み"""
+        return self.codec.write_file(self.atomic_writer, file_path, data)
+        
+    def configure_encoding(self, encoding):
+        """設定ファイルの書き込み形式を変更（json / compact / binary）"""
+        self.codec.set_encoding(encoding)
+        
+    def submit_write(self, path, write_func):
+        """書き込み処理を永続化ワーカーに投入（ワーカーがなければ同期実行）"""
+        if self.io_worker is not None:
+            return self.io_worker.submit(path, write_func)
+        return write_func()
+        
+    def wait_for_writes(self, timeout=None):
+        """バックグラウンドの書き込みが完了するまで待機"""
+        if self.io_worker is not None:
+            return self.io_worker.drain(timeout)
+        return True
+        
+    def open_storage(self):
+        """SQLiteバックエンドを開く"""
+        try:
+            self.storage = SqliteStorageBackend(self.storage_file)
+            self.storage.set_durability(self.atomic_writer.durability)
+            print(f"SQLiteストレージを使用: {self.storage_file}")
+            return True
+        except Exception as e:
+            print(f"SQLiteストレージを開けません（JSONを使用）: {e}")
+            self.storage = None
+            return False
+            
+    def get_storage_name(self):
+        """使用中のストレージバックエンド名を取得"""
+        return self.storage.name if self.storage else "json"
+        
+    def enable_sqlite_storage(self):
+        """JSONファイルの内容をSQLiteに取り込み、SQLiteバックエンドに切り替え"""
+        if self.storage is not None:
+            return True
+        try:
+            self.flush_pending_saves()
+            storage = SqliteStorageBackend(self.storage_file)
+            storage.set_durability(self.atomic_writer.durability)
+            storage.import_from_json(self.config_dir, self.codec.read_file)
+            self.storage = storage
+            return True
+        except Exception as e:
+            print(f"SQLiteストレージへの移行エラー: {e}")
+            return False
+            
+    def disable_sqlite_storage(self):
+        """SQLiteの内容をJSONファイルに書き出し、JSONバックエンドに戻す"""
+        if self.storage is None:
+            return True
+        try:
+            self.flush_pending_saves()
+            storage = self.storage
+            storage.export_to_json(self.config_dir)
+            self.storage = None
+            storage.close()
+            
+            # 次回起動時に再度SQLiteが選ばれないように退避
+            shutil.move(self.storage_file, self.storage_file + '.old')
+            self.journal.reset()
+            self.journal_baseline = None
+            return True
+        except Exception as e:
+            print(f"JSONストレージへの切り替えエラー: {e}")
+            return False
+            
+    def close_storage(self):
+        """ストレージバックエンドを閉じる（終了時）"""
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+        
+    def configure_durability(self, durability):
+        """書き込みの安全性レベルを変更（strict / relaxed / batched）"""
+        self.atomic_writer.set_durability(durability)
+        self.journal.durable = durability != DURABILITY_RELAXED
+        if self.storage is not None:
+            self.storage.set_durability(durability)
+            
+    def sync_pending_writes(self):
+        """batched で保留中のfsyncを実行"""
+        return self.atomic_writer.sync_pending()
+        
+    def configure_journal(self, enabled, compact_bytes=None, compact_seconds=None):
+        """ジャーナルモードの設定を変更"""
+        self.journal_mode = bool(enabled)
+        if compact_bytes is not None:
+            self.journal_compact_bytes = max(1024, int(compact_bytes))
+        if compact_seconds is not None:
+            self.journal_compact_seconds = max(1, int(compact_seconds))
+        
+    def block_config_writes(self, error):
+        """デコードできない設定ファイルを上書きしないよう、このセッション中の保存を止める"""
+        self.config_write_blocked = True
+        self.load_error = str(error)
+        self.journal_baseline = None
+        
+    def allow_config_writes(self):
+        """設定ファイルへの保存を再開（ユーザーがインポートで置き換える場合）"""
+        self.config_write_blocked = False
+        self.load_error = None
+        
+    def write_groups_file(self, groups_data):
+        """グループデータをファイルに書き込み"""
+        if self.storage is not None:
+            try:
+                return self.storage.save_groups(groups_data)
+            except Exception as e:
+                print(f"グループデータの保存に失敗 (SQLite): {e}")
+                return False
+                
+        if self.config_write_blocked:
+            print(f"設定ファイルを読み込めなかったため保存しません: {self.load_error}")
+            return False
+            
+        if self.journal_mode and self.journal_baseline is not None:
+            return self.write_groups_journal(groups_data)
+        return self.write_groups_snapshot(groups_data)
+        
+    def write_groups_journal(self, groups_data):
+        """前回からの差分を操作としてジャーナルに追記"""
+        try:
+            operations = GroupJournal.diff_groups(self.journal_baseline, groups_data)
+            if not operations:
+                return True
+                
+            self.journal.append(operations)
+            self.journal_baseline = groups_data
+            
+            # サイズまたは経過時間がしきい値を超えたらスナップショットに圧縮
+            elapsed = time.time() - self.last_compaction_time
+            if (self.journal.size() >= self.journal_compact_bytes or
+                    elapsed >= self.journal_compact_seconds):
+                return self.write_groups_snapshot(groups_data)
+                
+            return True
+            
+        except Exception as e:
+            print(f"ジャーナル書き込みエラー: {e}")
+            # ジャーナルに書けない場合はスナップショットで保存
+            return self.write_groups_snapshot(groups_data)
+            
+    def write_groups_snapshot(self, groups_data):
+        """グループデータ全体をスナップショットとして書き込み"""
+        if self.config_write_blocked:
+            print(f"設定ファイルを読み込めなかったため保存しません: {self.load_error}")
+            return False
+            
         try:
             # バックアップ作成
             self.create_backup()
@@ -52,126 +396,206 @@ class DataManager:
             save_data = {
                 'version': '1.0',
                 'created': datetime.now().isoformat(),
+                'journal_seq': self.journal.seq,  # このスナップショットに含まれるジャーナル位置
                 'groups': groups_data
             }
             
-            # 一時ファイルに保存してから本ファイルに移動（安全な保存）
-            temp_file = self.config_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
-                
-            # 元ファイルと置き換え
-            shutil.move(temp_file, self.config_file)
+            # 一時ファイル経由でアトミックに置き換え
+            self.write_document(self.config_file, save_data)
+            
+            # スナップショットに取り込んだジャーナルを破棄
+            self.journal.reset()
+            self.journal_baseline = groups_data
+            self.last_compaction_time = time.time()
             
             return True
             
         except Exception as e:
             print(f"グループデータの保存に失敗: {e}")
-            # 一時ファイルが残っていたら削除
-            temp_file = self.config_file + '.tmp'
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
             return False
             
+    def flush_pending_saves(self, wait=True):
+        """遅延中の保存要求を即座に書き込み、完了まで待機（wait=Falseならストアへの反映と投入のみ）"""
+        result = True
+        if self.save_scheduler is not None:
+            result = self.save_scheduler.flush()
+        if wait:
+            self.wait_for_writes()
+            self.sync_pending_writes()
+        return result
+        
     def load_groups(self):
         """グループデータを読み込み"""
+        groups = self.ensure_group_ids(self.read_groups())
+        self.group_store.set_groups(copy.deepcopy(groups))
+        return groups
+        
+    def iter_groups(self):
+        """グループを1件ずつ読み込み（起動時の段階的読み込み用）
+
+        単一ファイルのJSONで未再生のジャーナルがない場合は配列要素ごとに逐次パースする。
+        それ以外の保存形式では load_groups の結果を順に返す。すべて返し終えた時点で
+        グループストアを更新する。
+        """
+        self.wait_for_writes()
+        streamable = (self.storage is None and
+                      not (self.sharded_mode and os.path.exists(self.shard_manifest_file)) and
+                      os.path.exists(self.config_file) and self.journal.size() == 0)
+        if not streamable:
+            yield from self.load_groups()
+            return
+            
+        groups = []
+        meta = {}
         try:
-            if not os.path.exists(self.config_file):
-                return []
-                
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # バージョンチェック
-            if isinstance(data, dict) and 'groups' in data:
-                return data['groups']
-            elif isinstance(data, list):
-                # 古い形式の場合はそのまま返す
-                return data
-            else:
-                print("不正なデータ形式です")
-                return []
+            with open(self.config_file, 'rb') as f:
+                raw = f.read()
+            for group in self.codec.iter_groups(raw, meta):
+                if not isinstance(group, dict):
+                    continue
+                self.ensure_group_ids([group])
+                groups.append(copy.deepcopy(group))
+                yield group
                 
-        except json.JSONDecodeError as e:
-            print(f"設定ファイルの読み込みエラー (JSON): {e}")
-            # バックアップから復元を試行
-            return self.restore_from_backup()
-        except Exception as e:
-            print(f"設定ファイルの読み込みエラー: {e}")
-            return []
+        except ValueError as e:
+            print(f"設定ファイルの読み込みエラー (形式): {e}")
+            if isinstance(e, UnsupportedFormatError):
+                self.block_config_writes(e)
+            # 読み込めた分に続けて、バックアップにしかないグループを補う
+            backup_groups = self.restore_from_backup()
+            if backup_groups is None:
+                if self.config_write_blocked and not groups:
+                    # データがないのではなく読めないため、空として扱わない
+                    raise
+                backup_groups = []
+            loaded_ids = {g['id'] for g in groups}
+            for group in self.ensure_group_ids(backup_groups):
+                if group['id'] not in loaded_ids:
+                    groups.append(copy.deepcopy(group))
+                    yield group
+            meta = {}
             
-    def create_backup(self):
-        """現在の設定ファイルのバックアップを作成"""
+        self.journal.seq = max(self.journal.seq, meta.get('journal_seq', 0))
+        if not self.config_write_blocked:
+            self.journal_baseline = copy.deepcopy(groups)
+        self.group_store.set_groups(groups)
+        
+    def read_groups(self):
+        """保存形式に応じてグループデータを読み込み"""
         try:
+            # バックグラウンドの書き込みを反映してから読み込む
+            self.wait_for_writes()
+            
+            if self.storage is not None:
+                return self.storage.load_groups()
+                
+            if self.sharded_mode and os.path.exists(self.shard_manifest_file):
+                return self.load_group_shards()
+                
+            groups = []
+            snapshot_seq = 0
             if os.path.exists(self.config_file):
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_file = os.path.join(self.backup_dir, f"groups_{timestamp}.json")
-                shutil.copy2(self.config_file, backup_file)
+                data = self.codec.read_file(self.config_file)
+                    
+                # バージョンチェック
+                if isinstance(data, dict) and 'groups' in data:
+                    groups = data['groups']
+                    snapshot_seq = data.get('journal_seq', 0)
+                elif isinstance(data, list):
+                    # 古い形式の場合はそのまま返す
+                    groups = data
+                else:
+                    print("不正なデータ形式です")
+                    return []
+                    
+            # スナップショット以降のジャーナルを再生（連番はスナップショットの位置から継続）
+            self.journal.seq = max(self.journal.seq, snapshot_seq)
+            operations = self.journal.read_operations(after_seq=snapshot_seq)
+            if operations:
+                print(f"ジャーナルから {len(operations)} 件の操作を再生")
+                groups = GroupJournal.apply_operations(groups, operations)
                 
-                # 古いバックアップを削除（5個まで保持）
-                self.cleanup_old_backups()
+            self.journal_baseline = copy.deepcopy(groups)
+            return groups
                 
+        except UnsupportedFormatError as e:
+            # 新しい形式・ライブラリ不足などでデコードできない（データがないわけではない）
+            print(f"設定ファイルの読み込みエラー (未対応の形式): {e}")
+            self.block_config_writes(e)
+            groups = self.restore_from_backup()
+            if groups is None:
+                raise
+            return groups
+        except ValueError as e:
+            # JSONの破損
+            print(f"設定ファイルの読み込みエラー (形式): {e}")
+            # バックアップから復元を試行（ジャーナルの基準が不明なため次回は全体保存）
+            self.journal_baseline = None
+            groups = self.restore_from_backup()
+            return groups if groups is not None else []
         except Exception as e:
-            print(f"バックアップ作成エラー: {e}")
+            print(f"設定ファイルの読み込みエラー: {e}")
+            return []
             
-    def cleanup_old_backups(self, max_backups=5):
-        """古いバックアップファイルを削除"""
-        try:
-            backup_files = []
-            for filename in os.listdir(self.backup_dir):
-                if filename.startswith("groups_") and filename.endswith(".json"):
-                    file_path = os.path.join(self.backup_dir, filename)
-                    backup_files.append((file_path, os.path.getmtime(file_path)))
-                    
-            # 作成日時でソート
-            backup_files.sort(key=lambda x: x[1], reverse=True)
+    def create_backup(self):
+        """現在の設定ファイルのバックアップを作成（同一内容ならスキップ）"""
+        return self.backup_engine.create_backup(self.config_file)
             
-            # 古いファイルを削除
-            for file_path, _ in backup_files[max_backups:]:
-                os.remove(file_path)
-                
-        except Exception as e:
-            print(f"バックアップクリーンアップエラー: {e}")
+    def cleanup_old_backups(self, max_backups=None):
+        """古いバックアップファイルを削除（時間階層で世代を保持）"""
+        if max_backups is not None:
+            self.backup_engine.configure(max_backups=max_backups)
+        self.backup_engine.apply_retention()
             
     def restore_from_backup(self):
-        """バックアップから復元"""
+        """バックアップから復元（新しい順に読めるものを探し、どれも読めなければNone）"""
         try:
             backup_files = []
             for filename in os.listdir(self.backup_dir):
                 if filename.startswith("groups_") and filename.endswith(".json"):
                     file_path = os.path.join(self.backup_dir, filename)
                     backup_files.append((file_path, os.path.getmtime(file_path)))
-                    
-            if not backup_files:
-                print("利用可能なバックアップがありません")
-                return []
-                
-            # 最新のバックアップを選択
-            backup_files.sort(key=lambda x: x[1], reverse=True)
-            latest_backup = backup_files[0][0]
+        except OSError as e:
+            print(f"バックアップからの復元エラー: {e}")
+            return None
             
-            print(f"バックアップから復元中: {latest_backup}")
+        if not backup_files:
+            print("利用可能なバックアップがありません")
+            return None
             
-            with open(latest_backup, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        backup_files.sort(key=lambda x: x[1], reverse=True)
+        for backup_file, _ in backup_files:
+            print(f"バックアップから復元中: {backup_file}")
+            try:
+                data = self.codec.read_file(backup_file)
+            except Exception as e:
+                print(f"バックアップからの復元エラー: {e}")
+                continue
                 
-            if isinstance(data, dict) and 'groups' in data:
+            if isinstance(data, dict) and isinstance(data.get('groups'), list):
                 return data['groups']
             elif isinstance(data, list):
                 return data
-            else:
-                return []
-                
-        except Exception as e:
-            print(f"バックアップからの復元エラー: {e}")
-            return []
+            print(f"バックアップの形式が不正です: {backup_file}")
+            
+        return None
             
     def export_settings(self, export_path):
         """設定をファイルにエクスポート"""
         try:
+            self.wait_for_writes()
+            # エクスポートは常に整形JSONで書き出す（保存形式が圧縮・バイナリでも読めるように）
+            if (self.group_store.loaded or self.storage is not None or self.sharded_mode or
+                    self.codec.encoding != ENCODING_JSON):
+                export_data = {
+                    'version': '1.0',
+                    'created': datetime.now().isoformat(),
+                    'groups': self.get_current_groups()
+                }
+                with open(export_path, 'w', encoding='utf-8') as f:
+                    json.dump(export_data, f, indent=2, ensure_ascii=False)
+                return True
+                
             if not os.path.exists(self.config_file):
                 return False
                 
@@ -185,12 +609,12 @@ class DataManager:
     def import_settings(self, import_path):
         """設定をファイルからインポート"""
         try:
-            # バックアップを作成
+            # 書き込み中のデータを確定させてからバックアップを作成
+            self.wait_for_writes()
             self.create_backup()
             
-            # インポートファイルを検証
-            with open(import_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # インポートファイルを検証（形式は自動判定）
+            data = self.codec.read_file(import_path)
                 
             # データが有効かチェック
             if isinstance(data, dict) and 'groups' in data:
@@ -205,8 +629,25 @@ class DataManager:
                 if not isinstance(group, dict) or 'name' not in group:
                     return False
                     
-            # 設定ファイルをコピー
-            shutil.copy2(import_path, self.config_file)
+            # 次回の読み込みでインポートしたデータを読むようにストアを破棄
+            previous_ids = set(self.group_store.get_order())
+            self.group_store.clear()
+            
+            if self.storage is not None:
+                return self.storage.save_groups(groups)
+                
+            if self.sharded_mode:
+                groups = self.ensure_group_ids(groups)
+                removed_ids = previous_ids - {g['id'] for g in groups}
+                return self.write_group_shards([g['id'] for g in groups],
+                                               {g['id']: g for g in groups}, removed_ids, True)
+                
+            # 設定ファイルをアトミックに置き換え
+            with open(import_path, 'rb') as f:
+                self.atomic_writer.write_bytes(self.config_file, f.read())
+            self.allow_config_writes()
+            self.journal.reset()
+            self.journal_baseline = None
             return True
             
         except Exception as e:
@@ -220,6 +661,7 @@ class DataManager:
             'config_file': self.config_file,
             'backup_dir': self.backup_dir,
             'config_exists': os.path.exists(self.config_file),
+            'storage': self.get_storage_name(),
             'backup_count': 0
         }
         
@@ -317,12 +759,24 @@ class DataManager:
     def reset_settings(self):
         """設定をリセット"""
         try:
-            # バックアップを作成
+            # 書き込み中のデータを確定させてからバックアップを作成
+            self.wait_for_writes()
             self.create_backup()
             
+            removed_ids = set(self.group_store.get_order())
+            self.group_store.clear()
+            
+            if self.storage is not None:
+                return self.storage.save_groups([])
+                
+            if self.sharded_mode:
+                return self.write_group_shards([], {}, removed_ids, True)
+                
             # 設定ファイルを削除
             if os.path.exists(self.config_file):
                 os.remove(self.config_file)
+            self.journal.reset()
+            self.journal_baseline = None
                 
             return True
             
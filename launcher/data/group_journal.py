@@ -0,0 +1,242 @@
+"""
+GroupJournal - グループデータの変更を操作ログとして追記するジャーナル
+"""
+
+import os
+import json
+import time
+
+
+class GroupJournal:
+    """グループ操作ジャーナルクラス
+
+    1行1レコードのJSONで操作を追記する。各レコードには連番(seq)を付け、
+    スナップショット側に記録したseq以前のレコードは再生時にスキップする。
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.seq = 0  # 最後に書き込んだレコードの連番
+        self.durable = True  # 追記ごとにfsyncするかどうか
+
+    def append(self, operations):
+        """操作を追記（durableならfsyncで永続化）"""
+        if not operations:
+            return True
+
+        lines = []
+        timestamp = time.time()
+        for operation in operations:
+            self.seq += 1
+            record = dict(operation)
+            record['seq'] = self.seq
+            record['ts'] = timestamp
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            if self.durable:
+                os.fsync(f.fileno())
+        return True
+
+    def read_operations(self, after_seq=0):
+        """指定した連番より後の操作を読み込み"""
+        operations = []
+        if not os.path.exists(self.journal_file):
+            return operations
+
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中でクラッシュした末尾のレコードは無視
+                    print("ジャーナルの不完全なレコードを無視しました")
+                    break
+
+                seq = record.get('seq', 0)
+                self.seq = max(self.seq, seq)
+                if seq > after_seq:
+                    operations.append(record)
+
+        return operations
+
+    def size(self):
+        """ジャーナルファイルのサイズを取得"""
+        try:
+            return os.path.getsize(self.journal_file)
+        except OSError:
+            return 0
+
+    def reset(self):
+        """ジャーナルを空にする（スナップショット作成後に呼び出す）"""
+        try:
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+        except Exception as e:
+            print(f"ジャーナル削除エラー: {e}")
+
+    @staticmethod
+    def item_key(item):
+        """アイテム比較用のキー"""
+        return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+    @classmethod
+    def diff_groups(cls, old_groups, new_groups):
+        """2つのグループリストの差分を操作のリストとして取得"""
+        old_ids = [g.get('id') for g in old_groups]
+        new_ids = [g.get('id') for g in new_groups]
+
+        # IDがない・重複している場合は全体を置き換え
+        if (None in old_ids or None in new_ids or
+                len(set(old_ids)) != len(old_ids) or len(set(new_ids)) != len(new_ids)):
+            return [{'op': 'set_groups', 'groups': new_groups}]
+
+        operations = []
+        old_map = {g['id']: g for g in old_groups}
+        new_map = {g['id']: g for g in new_groups}
+
+        for group_id in old_ids:
+            if group_id not in new_map:
+                operations.append({'op': 'remove_group', 'group_id': group_id})
+
+        for group in new_groups:
+            group_id = group['id']
+            old_group = old_map.get(group_id)
+            if old_group is None:
+                operations.append({'op': 'add_group', 'group': group})
+                continue
+
+            if old_group.get('x') != group.get('x') or old_group.get('y') != group.get('y'):
+                operations.append({'op': 'move_group', 'group_id': group_id,
+                                   'x': group.get('x'), 'y': group.get('y')})
+
+            changed_fields = {}
+            for key, value in group.items():
+                if key in ('id', 'x', 'y', 'items'):
+                    continue
+                if old_group.get(key) != value:
+                    changed_fields[key] = value
+            if changed_fields:
+                operations.append({'op': 'update_group', 'group_id': group_id, 'fields': changed_fields})
+
+            operations.extend(cls.diff_items(group_id, old_group.get('items', []), group.get('items', [])))
+
+        # 追加・削除後の並び順が異なる場合は並び替え
+        current_order = [gid for gid in old_ids if gid in new_map]
+        current_order += [gid for gid in new_ids if gid not in old_map]
+        if current_order != new_ids:
+            operations.append({'op': 'reorder_groups', 'order': new_ids})
+
+        return operations
+
+    @classmethod
+    def diff_items(cls, group_id, old_items, new_items):
+        """アイテムリストの差分を操作のリストとして取得"""
+        if old_items == new_items:
+            return []
+
+        old_len = len(old_items)
+        new_len = len(new_items)
+
+        if old_len == new_len:
+            # チェック状態のみの変更
+            toggles = []
+            for index, (old_item, new_item) in enumerate(zip(old_items, new_items)):
+                if old_item == new_item:
+                    continue
+                old_rest = {k: v for k, v in old_item.items() if k != 'checked'}
+                new_rest = {k: v for k, v in new_item.items() if k != 'checked'}
+                if old_rest != new_rest:
+                    toggles = None
+                    break
+                toggles.append({'op': 'toggle_checked', 'group_id': group_id,
+                                'index': index, 'checked': new_item.get('checked', True)})
+            if toggles:
+                return toggles
+
+            # 並び替えのみ
+            old_keys = [cls.item_key(item) for item in old_items]
+            new_keys = [cls.item_key(item) for item in new_items]
+            if sorted(old_keys) == sorted(new_keys):
+                available = {}
+                for index, key in enumerate(old_keys):
+                    available.setdefault(key, []).append(index)
+                order = [available[key].pop(0) for key in new_keys]
+                return [{'op': 'reorder_items', 'group_id': group_id, 'order': order}]
+
+        elif new_len > old_len and new_items[:old_len] == old_items:
+            # 末尾への追加
+            return [{'op': 'add_item', 'group_id': group_id, 'index': index, 'item': new_items[index]}
+                    for index in range(old_len, new_len)]
+
+        elif new_len == old_len + 1:
+            # 途中への1件追加
+            index = next((i for i in range(old_len) if old_items[i] != new_items[i]), old_len)
+            if old_items[:index] + [new_items[index]] + old_items[index:] == new_items:
+                return [{'op': 'add_item', 'group_id': group_id, 'index': index, 'item': new_items[index]}]
+
+        elif new_len == old_len - 1:
+            # 1件削除
+            index = next((i for i in range(new_len) if old_items[i] != new_items[i]), new_len)
+            if old_items[:index] + old_items[index + 1:] == new_items:
+                return [{'op': 'remove_item', 'group_id': group_id, 'index': index}]
+
+        return [{'op': 'set_items', 'group_id': group_id, 'items': new_items}]
+
+    @staticmethod
+    def apply_operations(groups, operations):
+        """グループリストに操作を適用"""
+        for operation in operations:
+            op = operation.get('op')
+
+            if op == 'set_groups':
+                groups = list(operation.get('groups', []))
+                continue
+
+            if op == 'add_group':
+                groups.append(operation['group'])
+                continue
+
+            if op == 'reorder_groups':
+                group_map = {g.get('id'): g for g in groups}
+                ordered = [group_map.pop(gid) for gid in operation.get('order', []) if gid in group_map]
+                groups = ordered + list(group_map.values())
+                continue
+
+            group = next((g for g in groups if g.get('id') == operation.get('group_id')), None)
+            if group is None:
+                continue
+
+            items = group.setdefault('items', [])
+            index = operation.get('index')
+
+            if op == 'remove_group':
+                groups = [g for g in groups if g is not group]
+            elif op == 'move_group':
+                group['x'] = operation.get('x', group.get('x'))
+                group['y'] = operation.get('y', group.get('y'))
+            elif op == 'update_group':
+                group.update(operation.get('fields', {}))
+            elif op == 'add_item':
+                items.insert(min(index, len(items)), operation['item'])
+            elif op == 'remove_item':
+                if 0 <= index < len(items):
+                    items.pop(index)
+            elif op == 'toggle_checked':
+                if 0 <= index < len(items):
+                    items[index]['checked'] = operation.get('checked', True)
+            elif op == 'reorder_items':
+                order = operation.get('order', [])
+                if sorted(order) == list(range(len(items))):
+                    group['items'] = [items[i] for i in order]
+            elif op == 'set_items':
+                group['items'] = operation.get('items', [])
+            else:
+                print(f"未知のジャーナル操作: {op}")
+
+        return groups
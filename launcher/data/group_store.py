@@ -0,0 +1,77 @@
+"""
+GroupStore - 現在のグループデータを保持するメモリ上のストア
+"""
+
+import copy
+
+
+class GroupStore:
+    """グループストアクラス
+
+    起動時の読み込み以降はこのストアが現在の状態の正となり、プロファイル保存や
+    エクスポートはディスクを再読み込みせずにここから取得する。
+    GUIスレッドからのみ更新し、書き込みスレッドにはコピーを渡す。
+    """
+
+    def __init__(self):
+        self.groups = {}  # {グループID: グループデータ}
+        self.order = []  # グループIDの並び順
+        self.loaded = False  # 読み込み済みかどうか
+        self.revision = 0  # ストア全体の変更回数
+        self.listeners = []  # 変更通知先 callback(changed_ids, removed_ids, replaced)
+
+    def set_groups(self, groups_data):
+        """グループ一覧を丸ごと置き換え"""
+        self.groups = {g['id']: g for g in groups_data}
+        self.order = [g['id'] for g in groups_data]
+        self.loaded = True
+        self.revision += 1
+        self.notify(self.order, set(), True)
+
+    def apply_changes(self, order, changed_groups):
+        """変更されたグループと並び順を反映し、削除されたグループIDを返す"""
+        removed_ids = set(self.groups) - set(order)
+        self.groups.update(changed_groups)
+        for group_id in removed_ids:
+            del self.groups[group_id]
+        self.order = list(order)
+        self.loaded = True
+        self.revision += 1
+        self.notify(list(changed_groups), removed_ids, False)
+        return removed_ids
+
+    def contains(self, group_id):
+        """グループを保持しているかチェック"""
+        return group_id in self.groups
+
+    def get_order(self):
+        """グループIDの並び順を取得"""
+        return list(self.order)
+
+    def get_groups(self):
+        """グループ一覧を並び順で取得（内部データへの参照）"""
+        return [self.groups[group_id] for group_id in self.order]
+
+    def snapshot(self):
+        """グループ一覧のコピーを取得（呼び出し側で変更しても影響しない）"""
+        return copy.deepcopy(self.get_groups())
+
+    def clear(self):
+        """ストアを未読み込み状態に戻す"""
+        self.groups = {}
+        self.order = []
+        self.loaded = False
+        self.revision += 1
+        self.notify([], set(), True)
+
+    def add_listener(self, callback):
+        """変更通知先を登録（GUIスレッドで呼ばれる）"""
+        self.listeners.append(callback)
+
+    def notify(self, changed_ids, removed_ids, replaced):
+        """登録された通知先に変更を通知"""
+        for callback in self.listeners:
+            try:
+                callback(changed_ids, removed_ids, replaced)
+            except Exception as e:
+                print(f"グループ変更通知エラー: {e}")
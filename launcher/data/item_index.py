@@ -0,0 +1,197 @@
+"""
+ItemIndex - 全プロファイルのアイテムを横断検索する転置インデックス
+"""
+
+import re
+import bisect
+import threading
+
+
+# 現在のグループ（プロファイルに保存されていない状態）を表すソース
+CURRENT_SOURCE = None
+
+# アイテムの名前・パスを分割する区切り（英数字・日本語以外の文字）
+TOKEN_PATTERN = re.compile(r"[^\w]+")
+
+# 検索対象とするアイテムのキー
+INDEXED_FIELDS = ('name', 'path', 'original_path')
+
+
+def tokenize(text):
+    """文字列を小文字のトークンに分割"""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.split(str(text).lower()) if token]
+
+
+def item_tokens(item):
+    """アイテムの名前・パス・元のパスからトークンの集合を作成"""
+    tokens = set()
+    for field in INDEXED_FIELDS:
+        tokens.update(tokenize(item.get(field)))
+    return tokens
+
+
+class ItemIndex:
+    """アイテムの転置インデックスクラス
+
+    トークンから (ソース, グループID, アイテム位置) への対応を保持し、どのプロファイルの
+    どのグループに目的のアプリがあるかをプロファイルを開かずに検索する。ソースは
+    プロファイル名で、現在のグループは CURRENT_SOURCE とする。プロファイルの保存や
+    アイテムの追加・削除ではグループ単位で差し替える。
+    """
+
+    def __init__(self):
+        self.postings = {}  # {トークン: {(ソース, グループID, アイテム位置)}}
+        self.documents = {}  # {(ソース, グループID): {'name': グループ名, 'items': [...], 'tokens': [...]}}
+        self.sources = {}  # {ソース: {グループID}}
+        self.sorted_tokens = []  # 前方一致検索用のトークン一覧
+        self.tokens_dirty = False
+        self.built = False  # 全プロファイルの登録が完了したかどうか
+        self.lock = threading.RLock()  # 永続化ワーカーからのプロファイル保存とGUIスレッドの検索を排他
+
+    def set_source(self, source, groups):
+        """ソースのグループを丸ごと登録し直す"""
+        with self.lock:
+            group_ids = {group.get('id') for group in groups}
+            removed_ids = self.sources.get(source, set()) - group_ids
+            self.update_groups(source, groups, removed_ids)
+            self.sources.setdefault(source, set())
+
+    def update_groups(self, source, changed_groups, removed_ids=()):
+        """変更されたグループのみを登録し直し、削除されたグループを取り除く"""
+        with self.lock:
+            group_ids = self.sources.setdefault(source, set())
+            for group_id in removed_ids:
+                self._remove_document(source, group_id)
+                group_ids.discard(group_id)
+
+            for group in changed_groups:
+                group_id = group.get('id')
+                document = self.documents.get((source, group_id))
+                items = group.get('items', [])
+                if document is not None and document['name'] == group.get('name') and document['items'] == items:
+                    continue
+                self._remove_document(source, group_id)
+                self._add_document(source, group_id, group.get('name', ''), items)
+                group_ids.add(group_id)
+
+    def remove_source(self, source):
+        """ソース（プロファイル）をインデックスから削除"""
+        with self.lock:
+            for group_id in self.sources.pop(source, set()):
+                self._remove_document(source, group_id)
+
+    def rename_source(self, old_source, new_source):
+        """ソース名を変更"""
+        with self.lock:
+            if old_source not in self.sources:
+                return
+            groups = [dict(self.documents[(old_source, group_id)], id=group_id)
+                      for group_id in self.sources[old_source]]
+            self.remove_source(old_source)
+            self.set_source(new_source, groups)
+
+    def copy_source(self, source, new_source):
+        """ソースの内容を別名で登録（プロファイルの複製用）"""
+        with self.lock:
+            if source not in self.sources:
+                return
+            groups = [dict(self.documents[(source, group_id)], id=group_id)
+                      for group_id in self.sources[source]]
+            self.set_source(new_source, groups)
+
+    def clear(self):
+        """インデックスを空にする"""
+        with self.lock:
+            self.postings = {}
+            self.documents = {}
+            self.sources = {}
+            self.sorted_tokens = []
+            self.tokens_dirty = False
+            self.built = False
+
+    def search(self, query, limit=200):
+        """クエリのすべての語に前方一致するアイテムを検索
+
+        戻り値は {'profile': プロファイル名（現在のグループはNone）, 'group_id', 'group_name', 'item'}
+        のリストで、現在のグループ、プロファイル名の順に並べる。
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        with self.lock:
+            if self.tokens_dirty:
+                self.sorted_tokens = sorted(self.postings)
+                self.tokens_dirty = False
+
+            matches = None
+            for query_token in sorted(set(query_tokens), key=len, reverse=True):
+                token_matches = self._prefix_matches(query_token)
+                matches = token_matches if matches is None else matches & token_matches
+                if not matches:
+                    return []
+
+            def sort_key(posting):
+                source, group_id, position = posting
+                return (source is not CURRENT_SOURCE, source or "",
+                        self.documents[(source, group_id)]['name'], position)
+
+            results = []
+            for source, group_id, position in sorted(matches, key=sort_key)[:limit]:
+                document = self.documents[(source, group_id)]
+                results.append({
+                    'profile': source,
+                    'group_id': group_id,
+                    'group_name': document['name'],
+                    'item': dict(document['items'][position])
+                })
+            return results
+
+    def get_stats(self):
+        """登録済みのソース数・グループ数・トークン数を取得"""
+        with self.lock:
+            return {
+                'sources': len(self.sources),
+                'groups': len(self.documents),
+                'tokens': len(self.postings)
+            }
+
+    def _prefix_matches(self, query_token):
+        """query_token で始まるトークンのポスティングを集める"""
+        matches = set()
+        start = bisect.bisect_left(self.sorted_tokens, query_token)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(query_token):
+                break
+            matches |= self.postings.get(token, set())
+        return matches
+
+    def _add_document(self, source, group_id, group_name, items):
+        """グループのアイテムを登録"""
+        items = [dict(item) for item in items]
+        tokens_list = [item_tokens(item) for item in items]
+        self.documents[(source, group_id)] = {'name': group_name or "", 'items': items, 'tokens': tokens_list}
+        for position, tokens in enumerate(tokens_list):
+            for token in tokens:
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = set()
+                    self.tokens_dirty = True
+                postings.add((source, group_id, position))
+
+    def _remove_document(self, source, group_id):
+        """グループのアイテムの登録を解除"""
+        document = self.documents.pop((source, group_id), None)
+        if document is None:
+            return
+        for position, tokens in enumerate(document['tokens']):
+            for token in tokens:
+                postings = self.postings.get(token)
+                if postings is None:
+                    continue
+                postings.discard((source, group_id, position))
+                if not postings:
+                    del self.postings[token]
+                    self.tokens_dirty = True
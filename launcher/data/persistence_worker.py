@@ -0,0 +1,87 @@
+"""
+PersistenceWorker - 設定ディレクトリへの書き込みを担当するバックグラウンドスレッド
+"""
+
+import queue
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class PersistenceWorker(QThread):
+    """永続化ワーカークラス
+
+    書き込み処理を単一のスレッドで順番に実行するため、同じファイルへの
+    書き込み順序は投入順のまま保たれる。完了・失敗はシグナルでGUIスレッドに通知する。
+    """
+
+    write_finished = pyqtSignal(str)  # 書き込み完了（ファイルパス）
+    write_failed = pyqtSignal(str, str)  # 書き込み失敗（ファイルパス, エラーメッセージ）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task_queue = queue.Queue()
+        self.pending_count = 0
+        self.condition = threading.Condition()
+        self.accepting = True
+        self.idle_callback = None  # キューが空になったときに呼ぶ処理（まとめてfsyncなど）
+
+    def submit(self, path, write_func):
+        """書き込み処理を投入（write_funcは成功時にTrueを返す）"""
+        if not self.accepting or not self.isRunning():
+            # 停止後は呼び出し元スレッドで同期実行
+            return self._execute(path, write_func)
+
+        with self.condition:
+            self.pending_count += 1
+        self.task_queue.put((path, write_func))
+        return True
+
+    def run(self):
+        """ワーカースレッドのメインループ"""
+        while True:
+            task = self.task_queue.get()
+            if task is None:
+                break
+
+            path, write_func = task
+            try:
+                self._execute(path, write_func)
+                if self.idle_callback is not None and self.task_queue.empty():
+                    self.idle_callback()
+            except Exception as e:
+                print(f"永続化ワーカーのアイドル処理エラー: {e}")
+            finally:
+                with self.condition:
+                    self.pending_count -= 1
+                    self.condition.notify_all()
+
+    def _execute(self, path, write_func):
+        """書き込み処理を実行して結果を通知"""
+        try:
+            result = write_func()
+        except Exception as e:
+            self.write_failed.emit(path, str(e))
+            return False
+
+        if result is False:
+            self.write_failed.emit(path, "書き込みに失敗しました")
+            return False
+
+        self.write_finished.emit(path)
+        return True
+
+    def drain(self, timeout=None):
+        """投入済みの書き込みがすべて完了するまで待機"""
+        if not self.isRunning() or QThread.currentThread() is self:
+            return True
+
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending_count == 0, timeout)
+
+    def stop(self, timeout=10.0):
+        """残りの書き込みを完了させてからスレッドを停止"""
+        drained = self.drain(timeout)
+        self.accepting = False
+        self.task_queue.put(None)
+        self.wait(int(timeout * 1000))
+        return drained
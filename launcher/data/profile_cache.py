@@ -0,0 +1,77 @@
+"""
+ProfileCache - 最近使用したプロファイルをメモリ上に保持するLRUキャッシュ
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """プロファイルのLRUキャッシュクラス
+
+    デコード済みのプロファイルデータを最大 capacity 件保持し、ホットキーでの
+    切り替え時にディスクを読まずに済むようにする。保持するデータと呼び出し側の
+    データが互いに影響しないよう、格納時と取得時にコピーする。
+    """
+
+    def __init__(self, capacity=4):
+        self.capacity = max(0, capacity)
+        self.entries = OrderedDict()  # {プロファイル名: プロファイルデータ}（末尾が最新）
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def set_capacity(self, capacity):
+        """保持件数を変更（0でキャッシュ無効）"""
+        with self.lock:
+            self.capacity = max(0, capacity)
+            self._evict()
+
+    def get(self, profile_name):
+        """プロファイルデータのコピーを取得（なければNone）"""
+        with self.lock:
+            profile_data = self.entries.get(profile_name)
+            if profile_data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(profile_name)
+            self.hits += 1
+            return copy.deepcopy(profile_data)
+
+    def put(self, profile_name, profile_data):
+        """プロファイルデータを格納"""
+        if self.capacity == 0:
+            return
+        profile_data = copy.deepcopy(profile_data)
+        with self.lock:
+            self.entries[profile_name] = profile_data
+            self.entries.move_to_end(profile_name)
+            self._evict()
+
+    def discard(self, profile_name):
+        """プロファイルをキャッシュから削除"""
+        with self.lock:
+            self.entries.pop(profile_name, None)
+
+    def rename(self, old_name, new_name):
+        """キャッシュ上のプロファイル名を変更"""
+        with self.lock:
+            profile_data = self.entries.pop(old_name, None)
+            if profile_data is not None:
+                profile_data['name'] = new_name
+                self.entries[new_name] = profile_data
+
+    def clear(self):
+        """キャッシュを空にする"""
+        with self.lock:
+            self.entries.clear()
+
+    def get_names(self):
+        """キャッシュ中のプロファイル名を新しい順で取得"""
+        with self.lock:
+            return list(reversed(self.entries))
+
+    def _evict(self):
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
@@ -0,0 +1,160 @@
+"""
+ProfileCatalog - プロファイルのメタデータを1ファイルにまとめたカタログインデックス
+"""
+
+import os
+import threading
+from datetime import datetime
+from data.profile_files import PROFILE_HEADER_FILE, HEADER_FIELDS
+
+
+class ProfileCatalog:
+    """プロファイルカタログクラス
+
+    profiles/catalog.json に各プロファイルの名前・説明・日時・ホットキー・
+    グループ数・アイテム数を保持し、一覧表示やホットキー設定で個々の
+    プロファイルを開かずに済むようにする。各エントリには header.json の
+    更新時刻とサイズを記録し、外部で変更された場合はそのヘッダーだけ読み直す。
+    """
+
+    def __init__(self, profiles_dir, data_manager):
+        self.profiles_dir = profiles_dir
+        self.data_manager = data_manager
+        self.catalog_file = os.path.join(profiles_dir, "catalog.json")
+        self.entries = None  # {プロファイル名: エントリ}
+        self.lock = threading.RLock()  # 書き込みスレッドからの更新と一覧取得の競合を防ぐ
+
+    def get_header_file(self, profile_name):
+        """header.json のパスを取得"""
+        return os.path.join(self.profiles_dir, profile_name, PROFILE_HEADER_FILE)
+
+    def load(self):
+        """カタログを読み込み（初回のみファイルを読む）"""
+        with self.lock:
+            if self.entries is not None:
+                return self.entries
+
+            self.entries = {}
+            try:
+                if os.path.exists(self.catalog_file):
+                    data = self.data_manager.codec.read_file(self.catalog_file)
+                    if isinstance(data, dict) and isinstance(data.get('profiles'), dict):
+                        self.entries = data['profiles']
+            except Exception as e:
+                print(f"プロファイルカタログ読み込みエラー: {e}")
+            return self.entries
+
+    def save(self):
+        """カタログを保存"""
+        try:
+            catalog_data = {
+                'version': '1.0',
+                'updated': datetime.now().isoformat(),
+                'profiles': self.entries or {}
+            }
+            self.data_manager.write_document(self.catalog_file, catalog_data)
+            return True
+        except Exception as e:
+            print(f"プロファイルカタログ保存エラー: {e}")
+            return False
+
+    def get_file_signature(self, profile_name):
+        """header.json の更新時刻とサイズを取得（存在しなければNone）"""
+        try:
+            stat = os.stat(self.get_header_file(profile_name))
+            return [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return None
+
+    def build_entry(self, profile_name, header, signature):
+        """プロファイルのヘッダーからカタログエントリを作成"""
+        entry = {key: header.get(key, default) for key, default in HEADER_FIELDS.items()}
+        entry['name'] = profile_name
+        entry['groups_count'] = header.get('groups_count', 0)
+        entry['items_count'] = header.get('items_count', 0)
+        entry['signature'] = signature
+        return entry
+
+    def validate(self):
+        """ディスク上のプロファイルとカタログを照合し、変更分のみ読み直す"""
+        with self.lock:
+            entries = self.load()
+            changed = False
+
+            names = set()
+            if os.path.exists(self.profiles_dir):
+                for entry_name in os.listdir(self.profiles_dir):
+                    if os.path.isdir(os.path.join(self.profiles_dir, entry_name)):
+                        signature = self.get_file_signature(entry_name)
+                        if signature is None:
+                            continue
+                        names.add(entry_name)
+
+                        entry = entries.get(entry_name)
+                        if entry is None or entry.get('signature') != signature:
+                            if self.refresh_entry(entry_name, signature):
+                                changed = True
+
+            for name in list(entries.keys()):
+                if name not in names:
+                    del entries[name]
+                    changed = True
+
+            if changed:
+                self.save()
+            return entries
+
+    def refresh_entry(self, profile_name, signature=None):
+        """header.json を読み直してエントリを更新"""
+        try:
+            header = self.data_manager.codec.read_file(self.get_header_file(profile_name))
+            if signature is None:
+                signature = self.get_file_signature(profile_name)
+            self.entries[profile_name] = self.build_entry(profile_name, header, signature)
+            return True
+        except Exception as e:
+            print(f"プロファイル '{profile_name}' の読み込みエラー: {e}")
+            return False
+
+    def get_entries(self):
+        """検証済みのエントリ一覧を取得"""
+        with self.lock:
+            return list(self.validate().values())
+
+    def get_entry(self, profile_name):
+        """1件のエントリを取得（ファイルが変更されていれば読み直す）"""
+        with self.lock:
+            entries = self.load()
+            signature = self.get_file_signature(profile_name)
+            if signature is None:
+                if entries.pop(profile_name, None) is not None:
+                    self.save()
+                return None
+
+            entry = entries.get(profile_name)
+            if entry is None or entry.get('signature') != signature:
+                if not self.refresh_entry(profile_name, signature):
+                    return None
+                self.save()
+            return entries.get(profile_name)
+
+    def update_entry(self, profile_name, header):
+        """ヘッダーの書き込み直後にエントリを更新"""
+        with self.lock:
+            self.load()
+            signature = self.get_file_signature(profile_name)
+            self.entries[profile_name] = self.build_entry(profile_name, header, signature)
+            return self.save()
+
+    def remove_entry(self, profile_name):
+        """エントリを削除"""
+        with self.lock:
+            self.load()
+            if self.entries.pop(profile_name, None) is not None:
+                return self.save()
+            return True
+
+    def invalidate(self):
+        """メモリ上のカタログを破棄（次回アクセス時に読み直す）"""
+        with self.lock:
+            self.entries = None
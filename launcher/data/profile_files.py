@@ -0,0 +1,68 @@
+"""
+プロファイルのファイル構成（ヘッダーと本体の分割・グループのブロブ参照）
+"""
+
+import os
+
+# プロファイルフォルダ内のファイル名
+PROFILE_HEADER_FILE = "header.json"  # 名前・説明・日時・ホットキー・件数
+PROFILE_BODY_FILE = "groups.json"  # グループ本体
+LEGACY_PROFILE_FILE = "profile.json"  # 旧形式（ヘッダーと本体を1ファイルに保存）
+HISTORY_DIR = "history"  # 保存ごとのスナップショット
+
+# 設定ディレクトリ内のグループブロブの保存先（プロファイル間で共有）
+BLOBS_DIR = "blobs"
+
+# ヘッダーの項目と既定値
+HEADER_FIELDS = {
+    'name': '',
+    'description': '',
+    'created': '',
+    'updated': '',
+    'version': '1.0',
+    'hotkey': None
+}
+
+
+def count_items(groups):
+    """グループ内のアイテム総数を取得"""
+    return sum(len(group.get('items', [])) for group in groups)
+
+
+def split_profile(profile_data):
+    """プロファイルデータをヘッダーと本体に分割"""
+    groups = profile_data.get('groups', [])
+    header = {key: profile_data.get(key, default) for key, default in HEADER_FIELDS.items()}
+    header['groups_count'] = len(groups)
+    header['items_count'] = count_items(groups)
+    body = {
+        'version': header['version'],
+        'groups': groups
+    }
+    return header, body
+
+
+def merge_profile(header, body):
+    """ヘッダーと本体からプロファイルデータを組み立て"""
+    profile_data = {key: header.get(key, default) for key, default in HEADER_FIELDS.items()}
+    profile_data['groups'] = body.get('groups', []) if isinstance(body, dict) else []
+    return profile_data
+
+
+def get_blob_file(blobs_dir, blob_hash):
+    """ブロブのファイルパスを取得（先頭2文字でフォルダを分ける）"""
+    return os.path.join(blobs_dir, blob_hash[:2], f"{blob_hash}.json")
+
+
+def get_history_ref(profile_name, snapshot_id):
+    """スナップショットのブロブ参照名を取得（プロファイル名に使えない "/" で区切る）"""
+    return f"{profile_name}/{HISTORY_DIR}/{snapshot_id}"
+
+
+def load_body_groups(body, blobs_dir, reader):
+    """本体のグループを取得（ブロブ参照の場合はブロブを読み込む）"""
+    if not isinstance(body, dict):
+        return []
+    if 'group_blobs' in body:
+        return [reader(get_blob_file(blobs_dir, blob_hash)) for blob_hash in body['group_blobs']]
+    return body.get('groups', [])
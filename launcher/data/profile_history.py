@@ -0,0 +1,128 @@
+"""
+ProfileHistory - プロファイルの保存ごとのスナップショット履歴
+"""
+
+import os
+from datetime import datetime
+from data.profile_files import HISTORY_DIR, merge_profile
+
+
+class ProfileHistory:
+    """プロファイル履歴クラス
+
+    プロファイルの保存ごとにヘッダーとグループのブロブのハッシュ一覧を
+    profiles/<名前>/history/<ID>.json に記録する。グループ本体はブロブストアで
+    前回のスナップショットと共有されるため、新たに書き込まれるのは変更された
+    グループのブロブのみとなる。保持数を超えた古いスナップショットは参照ごと削除する。
+    スナップショットの参照はブロブストアのメモリ上の記録に反映するのみで、
+    起動時には history/*.json から作り直される。
+    """
+
+    def __init__(self, profiles_dir, blob_store, data_manager, max_snapshots=10):
+        self.profiles_dir = profiles_dir
+        self.blob_store = blob_store
+        self.data_manager = data_manager
+        self.max_snapshots = max(1, max_snapshots)
+
+    def configure(self, max_snapshots):
+        """保持するスナップショット数を変更"""
+        self.max_snapshots = max(1, int(max_snapshots))
+
+    def get_history_dir(self, profile_name):
+        """プロファイルの履歴フォルダを取得"""
+        return os.path.join(self.profiles_dir, profile_name, HISTORY_DIR)
+
+    def get_snapshot_file(self, profile_name, snapshot_id):
+        """スナップショットのファイルパスを取得"""
+        return os.path.join(self.get_history_dir(profile_name), f"{snapshot_id}.json")
+
+    def generate_snapshot_id(self, profile_name):
+        """時刻順に並ぶ重複しないスナップショットIDを生成"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        snapshot_id = timestamp
+        counter = 1
+        while os.path.exists(self.get_snapshot_file(profile_name, snapshot_id)):
+            snapshot_id = f"{timestamp}_{counter}"
+            counter += 1
+        return snapshot_id
+
+    def get_snapshot_ids(self, profile_name):
+        """スナップショットIDを新しい順で取得"""
+        history_dir = self.get_history_dir(profile_name)
+        if not os.path.isdir(history_dir):
+            return []
+        snapshot_ids = [os.path.splitext(f)[0] for f in os.listdir(history_dir) if f.endswith(".json")]
+        snapshot_ids.sort(reverse=True)
+        return snapshot_ids
+
+    def read_snapshot(self, profile_name, snapshot_id):
+        """スナップショット（ヘッダーとハッシュ一覧）を読み込み"""
+        return self.data_manager.codec.read_file(self.get_snapshot_file(profile_name, snapshot_id))
+
+    def record(self, profile_name, header, hashes):
+        """保存したプロファイルのスナップショットを記録（直前と同じ内容ならスキップ）
+
+        ブロブは保存時に書き込み済みのため、ここではハッシュ一覧のみを書き込む。
+        """
+        snapshot_ids = self.get_snapshot_ids(profile_name)
+        if snapshot_ids:
+            try:
+                latest = self.read_snapshot(profile_name, snapshot_ids[0])
+                if (latest.get('group_blobs') == hashes and
+                        latest.get('header', {}).get('description') == header.get('description')):
+                    return None
+            except Exception as e:
+                print(f"スナップショット読み込みエラー ({profile_name}): {e}")
+
+        snapshot_id = self.generate_snapshot_id(profile_name)
+        snapshot = {
+            'version': '1.0',
+            'id': snapshot_id,
+            'created': datetime.now().isoformat(),
+            'header': header,
+            'group_blobs': list(hashes)
+        }
+
+        # ブロブはプロファイル本体からも参照中のため、参照の反映は書き込み後にまとめて行う
+        os.makedirs(self.get_history_dir(profile_name), exist_ok=True)
+        self.data_manager.write_document(self.get_snapshot_file(profile_name, snapshot_id), snapshot)
+        expired_ids = self.apply_retention(profile_name)
+        self.blob_store.update_history_refs(profile_name, snapshot_id, hashes, expired_ids)
+        return snapshot_id
+
+    def apply_retention(self, profile_name):
+        """保持数を超えた古いスナップショットのファイルを削除し、削除したIDの一覧を返す"""
+        expired_ids = []
+        for snapshot_id in self.get_snapshot_ids(profile_name)[self.max_snapshots:]:
+            try:
+                os.remove(self.get_snapshot_file(profile_name, snapshot_id))
+            except OSError as e:
+                print(f"スナップショット削除エラー ({profile_name}/{snapshot_id}): {e}")
+                continue
+            expired_ids.append(snapshot_id)
+        return expired_ids
+
+    def list_snapshots(self, profile_name):
+        """スナップショットの一覧を新しい順で取得（グループ本体は読み込まない）"""
+        snapshots = []
+        for snapshot_id in self.get_snapshot_ids(profile_name):
+            try:
+                snapshot = self.read_snapshot(profile_name, snapshot_id)
+            except Exception as e:
+                print(f"スナップショット読み込みエラー ({profile_name}/{snapshot_id}): {e}")
+                continue
+            header = snapshot.get('header', {})
+            snapshots.append({
+                'id': snapshot_id,
+                'created': snapshot.get('created', ''),
+                'description': header.get('description', ''),
+                'groups_count': header.get('groups_count', len(snapshot.get('group_blobs', []))),
+                'items_count': header.get('items_count', 0)
+            })
+        return snapshots
+
+    def load_snapshot(self, profile_name, snapshot_id):
+        """スナップショットからプロファイルデータを組み立て"""
+        snapshot = self.read_snapshot(profile_name, snapshot_id)
+        groups = self.blob_store.load_groups(snapshot.get('group_blobs', []))
+        return merge_profile(snapshot.get('header', {}), {'groups': groups})
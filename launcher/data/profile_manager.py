@@ -8,6 +8,21 @@ import json
 import shutil
 from datetime import datetime
 from pathlib import Path
+from data.profile_catalog import ProfileCatalog
+from data.profile_cache import ProfileCache
+from data.profile_switch import SwitchJournal, ProfileSwitchTransaction
+from data.profile_files import (PROFILE_HEADER_FILE, PROFILE_BODY_FILE, LEGACY_PROFILE_FILE, BLOBS_DIR,
+                                split_profile, merge_profile)
+from data.blob_store import BlobStore
+from data.profile_history import ProfileHistory
+from data.item_index import ItemIndex, CURRENT_SOURCE
+
+
+# プロファイル変更通知の種類 callback(event, profile_name, data)
+PROFILE_SAVED = "saved"  # 作成・更新（data: ヘッダー）
+PROFILE_DELETED = "deleted"  # 削除（data: None）
+PROFILE_RENAMED = "renamed"  # 名前変更（data: 新しい名前）
+CURRENT_PROFILE_CHANGED = "current"  # 使用中のプロファイルの変更（profile_name: 新しい名前、data: 前の名前）
 
 
 class ProfileManager:
@@ -15,6 +30,7 @@ class ProfileManager:
     
     def __init__(self, data_manager):
         self.data_manager = data_manager
+        self.change_listeners = []  # プロファイル変更の通知先（永続化ワーカーからも呼ばれる）
         self.config_dir = data_manager.config_dir
         self.profiles_dir = os.path.join(self.config_dir, "profiles")
         self.current_profile_file = os.path.join(self.config_dir, "current_profile.json")
@@ -22,6 +38,29 @@ class ProfileManager:
         # プロファイルディレクトリを作成
         self.ensure_profiles_directory()
         
+        # プロファイル一覧用のカタログ（JSON保存時のみ使用）
+        self.catalog = ProfileCatalog(self.profiles_dir, data_manager)
+        
+        # プロファイル間で共有するグループのブロブストア（JSON保存時のみ使用）
+        self.blob_store = BlobStore(os.path.join(self.config_dir, BLOBS_DIR), self.profiles_dir, data_manager)
+        
+        # 保存ごとのスナップショット履歴（グループはブロブストアで共有、JSON保存時のみ使用）
+        self.history = ProfileHistory(self.profiles_dir, self.blob_store, data_manager)
+        
+        # 最近使用したプロファイルのキャッシュ（件数はLauncherAppから設定される）
+        self.cache = ProfileCache()
+        
+        # プロファイル横断のアイテム検索インデックス（最初の検索時に構築）
+        self.item_index = ItemIndex()
+        data_manager.group_store.add_listener(self.on_live_groups_changed)
+        
+        # 旧形式（profile.json）のプロファイルをヘッダーと本体に分割
+        self.migrate_legacy_profiles()
+        
+        # 前回反映しきれなかったプロファイル切り替えをやり直す
+        self.switch_journal = SwitchJournal(os.path.join(self.config_dir, "switch.journal"), data_manager)
+        self.recover_switch()
+        
         # 現在のプロファイル情報
         self.current_profile_name = None
         self.load_current_profile_info()
@@ -30,6 +69,241 @@ class ProfileManager:
         """プロファイルディレクトリを作成"""
         os.makedirs(self.profiles_dir, exist_ok=True)
         
+    def get_profile_file(self, profile_name, file_name):
+        """プロファイルフォルダ内のファイルパスを取得"""
+        return os.path.join(self.profiles_dir, profile_name, file_name)
+        
+    def migrate_legacy_profiles(self):
+        """旧形式のプロファイルをすべてヘッダーと本体に分割"""
+        if self.data_manager.storage is not None or not os.path.exists(self.profiles_dir):
+            return
+            
+        for entry in os.listdir(self.profiles_dir):
+            if os.path.isdir(os.path.join(self.profiles_dir, entry)):
+                self.migrate_legacy_profile(entry)
+                
+    def migrate_legacy_profile(self, profile_name):
+        """旧形式の profile.json をヘッダーと本体に分割（分割済みなら何もしない）"""
+        legacy_file = self.get_profile_file(profile_name, LEGACY_PROFILE_FILE)
+        if not os.path.exists(legacy_file):
+            return False
+            
+        try:
+            if not os.path.exists(self.get_profile_file(profile_name, PROFILE_HEADER_FILE)):
+                profile_data = self.data_manager.codec.read_file(legacy_file)
+                self.write_profile_files(profile_name, profile_data)
+            os.remove(legacy_file)
+            print(f"プロファイル '{profile_name}' を新しい形式に移行しました")
+            return True
+        except Exception as e:
+            print(f"プロファイル移行エラー ({profile_name}): {e}")
+            return False
+            
+    def read_profile_header(self, profile_name):
+        """プロファイルのヘッダー（グループ以外の情報と件数）を読み込み"""
+        if self.data_manager.storage is not None:
+            header = self.data_manager.storage.get_profile_header(profile_name)
+            if header is None:
+                raise FileNotFoundError(f"プロファイル '{profile_name}' が見つかりません")
+            return header
+            
+        self.migrate_legacy_profile(profile_name)
+        return self.data_manager.codec.read_file(self.get_profile_file(profile_name, PROFILE_HEADER_FILE))
+        
+    def read_profile_data(self, profile_name):
+        """プロファイルデータをグループ込みで読み込み（ストレージバックエンドに応じて）"""
+        if self.data_manager.storage is not None:
+            profile_data = self.data_manager.storage.load_profile(profile_name)
+            if profile_data is None:
+                raise FileNotFoundError(f"プロファイル '{profile_name}' が見つかりません")
+            return profile_data
+            
+        header = self.read_profile_header(profile_name)
+        body_file = self.get_profile_file(profile_name, PROFILE_BODY_FILE)
+        body = self.data_manager.codec.read_file(body_file) if os.path.exists(body_file) else {}
+        if 'group_blobs' in body:
+            body = dict(body, groups=self.blob_store.load_groups(body['group_blobs']))
+        return merge_profile(header, body)
+            
+    def ensure_item_index(self):
+        """アイテム検索インデックスを構築（構築済みなら何もしない）"""
+        if self.item_index.built:
+            return
+            
+        # 遅延中のプロファイル保存を反映してから読み込む
+        self.data_manager.wait_for_writes()
+        with self.item_index.lock:
+            if self.item_index.built:
+                return
+            self.item_index.clear()
+            self.item_index.set_source(CURRENT_SOURCE, self.data_manager.group_store.get_groups())
+            for profile in self.get_profile_list():
+                try:
+                    profile_data = self.read_profile_data(profile['name'])
+                    self.item_index.set_source(profile['name'], profile_data.get('groups', []))
+                except Exception as e:
+                    print(f"プロファイル '{profile['name']}' の索引作成エラー: {e}")
+            self.item_index.built = True
+            
+    def search_items(self, query, limit=200):
+        """現在のグループと全プロファイルからアイテムを検索"""
+        try:
+            self.ensure_item_index()
+            return self.item_index.search(query, limit)
+        except Exception as e:
+            print(f"アイテム検索エラー: {e}")
+            return []
+            
+    def index_profile(self, profile_name, groups):
+        """保存したプロファイルを検索インデックスに反映（構築前は何もしない）"""
+        with self.item_index.lock:
+            if self.item_index.built:
+                self.item_index.set_source(profile_name, groups)
+                
+    def on_live_groups_changed(self, changed_ids, removed_ids, replaced):
+        """現在のグループの変更を検索インデックスに反映（GroupStoreから通知される）"""
+        if not self.item_index.built:
+            return
+        group_store = self.data_manager.group_store
+        if replaced:
+            self.item_index.set_source(CURRENT_SOURCE, group_store.get_groups())
+        else:
+            changed_groups = [group_store.groups[group_id] for group_id in changed_ids
+                              if group_store.contains(group_id)]
+            self.item_index.update_groups(CURRENT_SOURCE, changed_groups, removed_ids)
+            
+    def add_change_listener(self, callback):
+        """プロファイル変更の通知先を登録（保存は永続化ワーカーのスレッドから通知される場合がある）"""
+        self.change_listeners.append(callback)
+        
+    def notify_change(self, event, profile_name, data=None):
+        """登録された通知先にプロファイルの変更を通知"""
+        for callback in self.change_listeners:
+            try:
+                callback(event, profile_name, data)
+            except Exception as e:
+                print(f"プロファイル変更通知エラー: {e}")
+                
+    def set_current_profile_name(self, profile_name):
+        """使用中のプロファイル名を変更して通知"""
+        previous_name = self.current_profile_name
+        self.current_profile_name = profile_name
+        if previous_name != profile_name:
+            self.notify_change(CURRENT_PROFILE_CHANGED, profile_name, previous_name)
+            
+    def configure_cache(self, capacity):
+        """プロファイルキャッシュの保持件数を変更（0で無効）"""
+        self.cache.set_capacity(capacity)
+        
+    def write_profile_data(self, profile_name, profile_data):
+        """プロファイルデータを書き込み（ストレージバックエンドに応じて）"""
+        # 遅延中の自動保存が後から上書きしないように完了を待つ
+        self.data_manager.wait_for_writes()
+        self.cache.discard(profile_name)
+        return self.store_profile_data(profile_name, profile_data)
+        
+    def store_profile_data(self, profile_name, profile_data):
+        """プロファイルデータをストレージに書き込み（永続化ワーカーからも呼ばれる）"""
+        if self.data_manager.storage is not None:
+            profile_data = dict(profile_data, name=profile_name)
+            result = self.data_manager.storage.save_profile(profile_data)
+            self.notify_change(PROFILE_SAVED, profile_name, split_profile(profile_data)[0])
+        else:
+            os.makedirs(os.path.join(self.profiles_dir, profile_name), exist_ok=True)
+            self.write_profile_files(profile_name, profile_data)
+            result = True
+            
+        self.index_profile(profile_name, profile_data.get('groups', []))
+        return result
+        
+    def write_profile_files(self, profile_name, profile_data):
+        """ブロブ・本体・ヘッダーの順に書き込み（ヘッダーの置き換えで保存が確定する）
+
+        本体にはグループのブロブのハッシュのみを保存する。書き込み前に参照を追加し、
+        書き込み後に参照を確定するため、途中で中断しても参照中のブロブは削除されない。
+        """
+        header, body = split_profile(dict(profile_data, name=profile_name))
+        hashes = self.blob_store.store_groups(profile_name, body['groups'])
+        body = {
+            'version': body['version'],
+            'group_blobs': hashes
+        }
+        self.data_manager.write_document(self.get_profile_file(profile_name, PROFILE_BODY_FILE), body)
+        self.store_profile_header(profile_name, header)
+        self.blob_store.set_profile_refs(profile_name, hashes)
+        self.history.record(profile_name, header, hashes)
+        
+    def configure_history(self, max_snapshots):
+        """プロファイルごとに保持するスナップショット数を変更"""
+        self.history.configure(max_snapshots)
+        
+    def get_profile_history(self, profile_name):
+        """プロファイルのスナップショット一覧を新しい順で取得"""
+        try:
+            if self.data_manager.storage is not None:
+                return []
+            self.data_manager.wait_for_writes()
+            return self.history.list_snapshots(profile_name)
+        except Exception as e:
+            print(f"プロファイル履歴取得エラー: {e}")
+            return []
+            
+    def restore_profile_snapshot(self, profile_name, snapshot_id):
+        """スナップショットの内容でプロファイルを上書き（復元前の状態も履歴に残る）"""
+        try:
+            if self.data_manager.storage is not None:
+                return False, "SQLite保存ではプロファイル履歴を利用できません"
+            if not self.profile_exists(profile_name):
+                return False, f"プロファイル '{profile_name}' が見つかりません"
+                
+            self.data_manager.wait_for_writes()
+            profile_data = self.history.load_snapshot(profile_name, snapshot_id)
+            
+            # ホットキーは重複しないように現在の設定を引き継ぐ
+            header = self.read_profile_header(profile_name)
+            profile_data.update({
+                'name': profile_name,
+                'created': header.get('created', profile_data.get('created')),
+                'updated': datetime.now().isoformat(),
+                'hotkey': header.get('hotkey')
+            })
+            
+            if profile_name == self.current_profile_name:
+                # 使用中のプロファイルは現在の状態として反映（保存は切り替え時の自動保存と同じ経路）
+                # 遅延中の保存が復元した内容を画面上の状態で上書きしないよう先に反映する
+                self.data_manager.flush_pending_saves()
+                self.data_manager.save_groups(self.data_manager.ensure_group_ids(profile_data['groups']))
+                self.data_manager.flush_pending_saves()
+            self.write_profile_data(profile_name, profile_data)
+            
+            print(f"プロファイル '{profile_name}' をスナップショット {snapshot_id} から復元しました")
+            return True, f"プロファイル '{profile_name}' を復元しました"
+            
+        except Exception as e:
+            error_msg = f"プロファイル復元エラー: {e}"
+            print(error_msg)
+            return False, error_msg
+            
+    def write_profile_header(self, profile_name, header):
+        """ヘッダーのみを書き込み（グループ本体は読み書きしない）"""
+        self.data_manager.wait_for_writes()
+        self.cache.discard(profile_name)
+        return self.store_profile_header(profile_name, header)
+        
+    def store_profile_header(self, profile_name, header):
+        """ヘッダーをストレージに書き込み（永続化ワーカーからも呼ばれる）"""
+        if self.data_manager.storage is not None:
+            result = self.data_manager.storage.update_profile_header(profile_name, header)
+        else:
+            self.data_manager.write_document(self.get_profile_file(profile_name, PROFILE_HEADER_FILE), header)
+            
+            # ヘッダーの書き込み後にカタログを更新（途中で中断しても更新時刻の照合で修復される）
+            self.catalog.update_entry(profile_name, header)
+            result = True
+            
+        self.notify_change(PROFILE_SAVED, profile_name, dict(header))
+        return result
+        
     def save_profile(self, profile_name, description="", hotkey_info=None):
         """現在の状態をプロファイルとして保存"""
         try:
@@ -43,20 +317,15 @@ class ProfileManager:
             if any(char in profile_name for char in invalid_chars):
                 return False, "プロファイル名に無効な文字が含まれています"
             
-            # プロファイルフォルダを作成
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            os.makedirs(profile_dir, exist_ok=True)
-            
-            # 現在のグループデータを取得
-            current_groups = self.data_manager.load_groups()
+            # 遅延中の保存をストアに反映してから現在のグループデータを取得（ディスクは読まない）
+            self.data_manager.flush_pending_saves()
+            current_groups = self.data_manager.get_current_groups()
             
             # 既存のプロファイルデータがある場合は、既存の情報を保持
-            profile_file = os.path.join(profile_dir, "profile.json")
             existing_profile_data = {}
-            if os.path.exists(profile_file):
+            if self.profile_exists(profile_name):
                 try:
-                    with open(profile_file, 'r', encoding='utf-8') as f:
-                        existing_profile_data = json.load(f)
+                    existing_profile_data = self.read_profile_header(profile_name)
                 except Exception as e:
                     print(f"既存のプロファイルデータ読み込みエラー: {e}")
             
@@ -71,10 +340,8 @@ class ProfileManager:
                 'hotkey': hotkey_info if hotkey_info is not None else existing_profile_data.get('hotkey')  # 既存のホットキー情報を保持
             }
             
-            # プロファイルファイルに保存
-            profile_file = os.path.join(profile_dir, "profile.json")
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            # プロファイルを保存
+            self.write_profile_data(profile_name, profile_data)
                 
             print(f"プロファイル '{profile_name}' を保存しました")
             return True, f"プロファイル '{profile_name}' を保存しました"
@@ -84,6 +351,20 @@ class ProfileManager:
             print(error_msg)
             return False, error_msg
             
+    def build_profile_data(self, profile_name, description=""):
+        """現在の状態からプロファイルデータを作成（ディスクは読まない）"""
+        header = self.get_profile_header(profile_name) or {}
+        now = datetime.now().isoformat()
+        return {
+            'name': profile_name,
+            'description': description if description else header.get('description', ''),
+            'created': header.get('created') or now,
+            'updated': now,
+            'version': '1.0',
+            'groups': self.data_manager.get_current_groups(),
+            'hotkey': header.get('hotkey')
+        }
+        
     def create_empty_profile(self, profile_name, description="", hotkey_info=None):
         """空のプロファイルを作成"""
         try:
@@ -97,10 +378,6 @@ class ProfileManager:
             if any(char in profile_name for char in invalid_chars):
                 return False, "プロファイル名に無効な文字が含まれています"
             
-            # プロファイルフォルダを作成
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            os.makedirs(profile_dir, exist_ok=True)
-            
             # 空のプロファイルデータを作成
             profile_data = {
                 'name': profile_name,
@@ -112,10 +389,8 @@ class ProfileManager:
                 'hotkey': hotkey_info  # ホットキー情報を追加
             }
             
-            # プロファイルファイルに保存
-            profile_file = os.path.join(profile_dir, "profile.json")
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            # プロファイルを保存
+            self.write_profile_data(profile_name, profile_data)
                 
             print(f"空のプロファイル '{profile_name}' を作成しました")
             return True, f"空のプロファイル '{profile_name}' を作成しました"
@@ -128,14 +403,13 @@ class ProfileManager:
     def load_profile(self, profile_name):
         """プロファイルを読み込み"""
         try:
-            if not self.profile_exists(profile_name):
-                return False, f"プロファイル '{profile_name}' が見つかりません"
-                
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            profile_file = os.path.join(profile_dir, "profile.json")
-            
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_data = json.load(f)
+            profile_data = self.cache.get(profile_name)
+            if profile_data is None:
+                if not self.profile_exists(profile_name):
+                    return False, f"プロファイル '{profile_name}' が見つかりません"
+                    
+                profile_data = self.read_profile_data(profile_name)
+                self.cache.put(profile_name, profile_data)
                 
             # プロファイルのグループデータを取得
             groups_data = profile_data.get('groups', [])
@@ -147,26 +421,19 @@ class ProfileManager:
             print(error_msg)
             return False, error_msg
             
+    def begin_switch(self, profile_name):
+        """プロファイル切り替えのトランザクションを開始"""
+        return ProfileSwitchTransaction(self, profile_name)
+        
     def switch_to_profile(self, profile_name):
-        """プロファイルに切り替え"""
+        """プロファイルに切り替え（自動保存・適用・現在プロファイルの更新を1回の書き込みで確定）"""
         try:
-            success, result = self.load_profile(profile_name)
-            if not success:
-                return False, result
+            with self.begin_switch(profile_name) as transaction:
+                success, message = transaction.prepare()
+                if not success:
+                    return False, message
+                transaction.commit()
                 
-            groups_data = result
-            
-            # 現在の状態をバックアップ（自動保存）
-            if self.current_profile_name:
-                self.save_profile(self.current_profile_name, "自動保存")
-            
-            # 新しいプロファイルのデータを適用
-            self.data_manager.save_groups(groups_data)
-            
-            # 現在のプロファイル情報を更新
-            self.current_profile_name = profile_name
-            self.save_current_profile_info()
-            
             print(f"プロファイル '{profile_name}' に切り替えました")
             return True, f"プロファイル '{profile_name}' に切り替えました"
             
@@ -175,6 +442,37 @@ class ProfileManager:
             print(error_msg)
             return False, error_msg
             
+    def apply_switch_record(self, record):
+        """切り替えジャーナルのレコードを各ファイルに反映（永続化ワーカー・起動時の復旧から呼ばれる）"""
+        try:
+            outgoing_profile = record.get('outgoing_profile')
+            if outgoing_profile and record.get('from_profile'):
+                self.store_profile_data(record['from_profile'], outgoing_profile)
+                
+            self.data_manager.write_all_groups(record.get('groups', []))
+            self.write_current_profile_file(record.get('to_profile'))
+            return True
+            
+        except Exception as e:
+            print(f"プロファイル切り替えの反映エラー: {e}")
+            return False
+            
+    def recover_switch(self):
+        """未反映の切り替えジャーナルがあれば反映をやり直す"""
+        if self.data_manager.storage is not None:
+            return False
+            
+        record = self.switch_journal.read()
+        if record is None:
+            return False
+            
+        self.switch_journal.current_id = record['id']
+        if self.apply_switch_record(record):
+            self.switch_journal.clear(record['id'])
+            print(f"中断されたプロファイル切り替えを反映しました: {record.get('to_profile')}")
+            return True
+        return False
+        
     def delete_profile(self, profile_name):
         """プロファイルを削除"""
         try:
@@ -185,8 +483,17 @@ class ProfileManager:
             if profile_name == self.current_profile_name:
                 return False, "現在使用中のプロファイルは削除できません"
                 
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            shutil.rmtree(profile_dir)
+            self.data_manager.wait_for_writes()
+            self.cache.discard(profile_name)
+            if self.data_manager.storage is not None:
+                self.data_manager.storage.delete_profile(profile_name)
+            else:
+                profile_dir = os.path.join(self.profiles_dir, profile_name)
+                shutil.rmtree(profile_dir)
+                self.catalog.remove_entry(profile_name)
+                self.blob_store.remove_profile_refs(profile_name)
+            self.item_index.remove_source(profile_name)
+            self.notify_change(PROFILE_DELETED, profile_name)
             
             print(f"プロファイル '{profile_name}' を削除しました")
             return True, f"プロファイル '{profile_name}' を削除しました"
@@ -197,32 +504,15 @@ class ProfileManager:
             return False, error_msg
             
     def get_profile_list(self):
-        """プロファイル一覧を取得"""
+        """プロファイル一覧を取得（各プロファイル本体は読み込まない）"""
         try:
-            profiles = []
-            
-            if not os.path.exists(self.profiles_dir):
-                return profiles
-                
-            for item in os.listdir(self.profiles_dir):
-                profile_dir = os.path.join(self.profiles_dir, item)
-                if os.path.isdir(profile_dir):
-                    profile_file = os.path.join(profile_dir, "profile.json")
-                    if os.path.exists(profile_file):
-                        try:
-                            with open(profile_file, 'r', encoding='utf-8') as f:
-                                profile_data = json.load(f)
-                                
-                            profiles.append({
-                                'name': profile_data.get('name', item),
-                                'description': profile_data.get('description', ''),
-                                'created': profile_data.get('created', ''),
-                                'updated': profile_data.get('updated', ''),
-                                'is_current': item == self.current_profile_name
-                            })
-                        except Exception as e:
-                            print(f"プロファイル '{item}' の読み込みエラー: {e}")
-                            
+            if self.data_manager.storage is not None:
+                headers = self.data_manager.storage.list_profiles()
+            else:
+                headers = self.catalog.get_entries()
+                
+            profiles = [self.make_profile_header(header) for header in headers]
+            
             # 作成日時でソート
             profiles.sort(key=lambda x: x.get('created', ''), reverse=True)
             return profiles
@@ -231,23 +521,46 @@ class ProfileManager:
             print(f"プロファイル一覧取得エラー: {e}")
             return []
             
+    def make_profile_header(self, header):
+        """カタログ・データベースの概要から一覧表示用の情報を作成"""
+        return {
+            'name': header['name'],
+            'description': header.get('description', ''),
+            'created': header.get('created', ''),
+            'updated': header.get('updated', ''),
+            'hotkey': header.get('hotkey'),
+            'groups_count': header.get('groups_count', 0),
+            'items_count': header.get('items_count', 0),
+            'is_current': header['name'] == self.current_profile_name
+        }
+        
     def profile_exists(self, profile_name):
         """プロファイルが存在するかチェック"""
-        profile_dir = os.path.join(self.profiles_dir, profile_name)
-        profile_file = os.path.join(profile_dir, "profile.json")
-        return os.path.exists(profile_file)
+        if self.data_manager.storage is not None:
+            return self.data_manager.storage.profile_exists(profile_name)
+        return (os.path.exists(self.get_profile_file(profile_name, PROFILE_HEADER_FILE)) or
+                os.path.exists(self.get_profile_file(profile_name, LEGACY_PROFILE_FILE)))
         
+    def get_profile_header(self, profile_name):
+        """プロファイルの概要（説明・日時・ホットキー・グループ数）を取得（グループ本体は読み込まない）"""
+        try:
+            if self.data_manager.storage is not None:
+                header = self.data_manager.storage.get_profile_header(profile_name)
+            else:
+                header = self.catalog.get_entry(profile_name)
+            return self.make_profile_header(header) if header else None
+            
+        except Exception as e:
+            print(f"プロファイル概要取得エラー: {e}")
+            return None
+            
     def get_profile_info(self, profile_name):
-        """プロファイル情報を取得"""
+        """プロファイル情報を取得（グループ込み）"""
         try:
             if not self.profile_exists(profile_name):
                 return None
                 
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            profile_file = os.path.join(profile_dir, "profile.json")
-            
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_data = json.load(f)
+            profile_data = self.read_profile_data(profile_name)
                 
             # グループ数を追加
             groups_count = len(profile_data.get('groups', []))
@@ -263,21 +576,33 @@ class ProfileManager:
     def save_current_profile_info(self):
         """現在のプロファイル情報を保存"""
         try:
-            current_info = {
-                'current_profile': self.current_profile_name,
-                'updated': datetime.now().isoformat()
-            }
-            
-            with open(self.current_profile_file, 'w', encoding='utf-8') as f:
-                json.dump(current_info, f, indent=2, ensure_ascii=False)
+            if self.data_manager.storage is not None:
+                self.data_manager.storage.set_meta('current_profile', self.current_profile_name)
+                return
+                
+            profile_name = self.current_profile_name
+            self.data_manager.submit_write(
+                self.current_profile_file, lambda: self.write_current_profile_file(profile_name))
                 
         except Exception as e:
             print(f"現在プロファイル情報保存エラー: {e}")
             
+    def write_current_profile_file(self, profile_name):
+        """現在のプロファイル名をファイルに書き込み"""
+        current_info = {
+            'current_profile': profile_name,
+            'updated': datetime.now().isoformat()
+        }
+        return self.data_manager.atomic_writer.write_json(self.current_profile_file, current_info)
+            
     def load_current_profile_info(self):
         """現在のプロファイル情報を読み込み"""
         try:
-            if os.path.exists(self.current_profile_file):
+            if self.data_manager.storage is not None:
+                self.current_profile_name = self.data_manager.storage.get_meta('current_profile')
+                if self.current_profile_name and not self.profile_exists(self.current_profile_name):
+                    self.current_profile_name = None
+            elif os.path.exists(self.current_profile_file):
                 with open(self.current_profile_file, 'r', encoding='utf-8') as f:
                     current_info = json.load(f)
                     
@@ -309,26 +634,30 @@ class ProfileManager:
             if any(char in new_name for char in invalid_chars):
                 return False, "プロファイル名に無効な文字が含まれています"
             
-            old_dir = os.path.join(self.profiles_dir, old_name)
-            new_dir = os.path.join(self.profiles_dir, new_name)
-            
-            # ディレクトリ名を変更
-            shutil.move(old_dir, new_dir)
-            
-            # プロファイルファイル内の名前も更新
-            profile_file = os.path.join(new_dir, "profile.json")
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_data = json.load(f)
+            self.data_manager.wait_for_writes()
+            self.cache.rename(old_name, new_name)
+            if self.data_manager.storage is not None:
+                self.data_manager.storage.rename_profile(old_name, new_name)
+            else:
+                old_dir = os.path.join(self.profiles_dir, old_name)
+                new_dir = os.path.join(self.profiles_dir, new_name)
                 
-            profile_data['name'] = new_name
-            profile_data['updated'] = datetime.now().isoformat()
-            
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+                # ディレクトリ名を変更
+                shutil.move(old_dir, new_dir)
+                self.catalog.remove_entry(old_name)
+                self.blob_store.rename_profile_refs(old_name, new_name)
+                
+                # ヘッダー内の名前も更新（グループ本体は書き換えない）
+                header = self.read_profile_header(new_name)
+                header['name'] = new_name
+                header['updated'] = datetime.now().isoformat()
+                self.write_profile_header(new_name, header)
+            self.item_index.rename_source(old_name, new_name)
+            self.notify_change(PROFILE_RENAMED, old_name, new_name)
             
             # 現在のプロファイルの場合、情報を更新
             if self.current_profile_name == old_name:
-                self.current_profile_name = new_name
+                self.set_current_profile_name(new_name)
                 self.save_current_profile_info()
                 
             print(f"プロファイル '{old_name}' を '{new_name}' に変更しました")
@@ -367,11 +696,64 @@ class ProfileManager:
             print(error_msg)
             return False, error_msg
             
+    def clone_profile(self, source_name, new_name):
+        """プロファイルを複製（JSON保存時はヘッダーとブロブ参照のみをコピー）"""
+        try:
+            if not self.profile_exists(source_name):
+                return False, f"プロファイル '{source_name}' が見つかりません"
+                
+            if not new_name or not new_name.strip():
+                return False, "プロファイル名が空です"
+                
+            new_name = new_name.strip()
+            if self.profile_exists(new_name):
+                return False, f"プロファイル '{new_name}' は既に存在します"
+                
+            # 無効な文字をチェック
+            invalid_chars = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
+            if any(char in new_name for char in invalid_chars):
+                return False, "プロファイル名に無効な文字が含まれています"
+                
+            # 遅延中の自動保存を反映してから複製する
+            self.data_manager.wait_for_writes()
+            now = datetime.now().isoformat()
+            
+            if self.data_manager.storage is not None:
+                profile_data = self.read_profile_data(source_name)
+                profile_data.update({'name': new_name, 'created': now, 'updated': now, 'hotkey': None})
+                self.store_profile_data(new_name, profile_data)
+            else:
+                self.migrate_legacy_profile(source_name)
+                body_file = self.get_profile_file(source_name, PROFILE_BODY_FILE)
+                body = self.data_manager.codec.read_file(body_file) if os.path.exists(body_file) else {}
+                if 'group_blobs' not in body:
+                    # 旧形式の本体はブロブに変換して保存
+                    profile_data = self.read_profile_data(source_name)
+                    profile_data.update({'name': new_name, 'created': now, 'updated': now, 'hotkey': None})
+                    self.store_profile_data(new_name, profile_data)
+                else:
+                    # ホットキーは重複しないように引き継がない
+                    header = self.read_profile_header(source_name)
+                    header.update({'name': new_name, 'created': now, 'updated': now, 'hotkey': None})
+                    os.makedirs(os.path.join(self.profiles_dir, new_name), exist_ok=True)
+                    self.blob_store.add_profile_refs(new_name, body['group_blobs'])
+                    self.data_manager.write_document(self.get_profile_file(new_name, PROFILE_BODY_FILE), body)
+                    self.store_profile_header(new_name, header)
+                    self.blob_store.set_profile_refs(new_name, body['group_blobs'])
+                    self.item_index.copy_source(source_name, new_name)
+                    
+            print(f"プロファイル '{source_name}' を '{new_name}' に複製しました")
+            return True, f"プロファイル '{new_name}' を作成しました"
+            
+        except Exception as e:
+            error_msg = f"プロファイル複製エラー: {e}"
+            print(error_msg)
+            return False, error_msg
+            
     def import_profile(self, import_path):
         """プロファイルをインポート"""
         try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            import_data = self.data_manager.codec.read_file(import_path)
                 
             if 'profile' not in import_data:
                 return False, "無効なプロファイルファイルです"
@@ -390,12 +772,7 @@ class ProfileManager:
             profile_data['name'] = profile_name
             profile_data['updated'] = datetime.now().isoformat()
             
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            os.makedirs(profile_dir, exist_ok=True)
-            
-            profile_file = os.path.join(profile_dir, "profile.json")
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            self.write_profile_data(profile_name, profile_data)
                 
             return True, f"プロファイル '{profile_name}' をインポートしました"
             
@@ -410,20 +787,15 @@ class ProfileManager:
             if not self.profile_exists(profile_name):
                 return False, f"プロファイル '{profile_name}' が見つかりません"
                 
-            profile_dir = os.path.join(self.profiles_dir, profile_name)
-            profile_file = os.path.join(profile_dir, "profile.json")
-            
-            # 既存のプロファイルデータを読み込み
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_data = json.load(f)
+            # 既存のヘッダーを読み込み（グループ本体は読み書きしない）
+            header = self.read_profile_header(profile_name)
             
             # ホットキー情報を更新
-            profile_data['hotkey'] = hotkey_info
-            profile_data['updated'] = datetime.now().isoformat()
+            header['hotkey'] = hotkey_info
+            header['updated'] = datetime.now().isoformat()
             
-            # プロファイルファイルに保存
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            # ヘッダーを保存
+            self.write_profile_header(profile_name, header)
                 
             print(f"プロファイル '{profile_name}' のホットキーを更新しました")
             return True, f"プロファイル '{profile_name}' のホットキーを更新しました"
@@ -0,0 +1,164 @@
+"""
+ProfileSwitch - プロファイル切り替えのトランザクションと切り替えジャーナル
+"""
+
+import os
+import copy
+import uuid
+import threading
+from datetime import datetime
+
+
+# トランザクションの状態
+STATE_PENDING = "pending"
+STATE_COMMITTED = "committed"
+STATE_ROLLED_BACK = "rolled_back"
+
+
+class SwitchJournal:
+    """切り替えジャーナルクラス
+
+    切り替えに必要なすべての書き込み内容（自動保存するプロファイル・新しいグループ・
+    現在のプロファイル名）を1つのレコードとして書き込み、これをコミットとする。
+    個々のファイルへの反映は後から行い、完了したらレコードを削除する。
+    反映の途中で終了した場合は、次回起動時にレコードから反映をやり直す。
+    """
+
+    def __init__(self, journal_file, data_manager):
+        self.journal_file = journal_file
+        self.data_manager = data_manager
+        self.current_id = None  # 最後に書き込んだレコードのID
+        self.lock = threading.Lock()  # GUIスレッドの書き込みとワーカーの削除を排他
+
+    def write(self, record):
+        """レコードをアトミックに書き込み（コミット）"""
+        with self.lock:
+            self.data_manager.write_document(self.journal_file, record)
+            self.current_id = record['id']
+
+    def read(self):
+        """未反映のレコードを読み込み（なければNone）"""
+        if not os.path.exists(self.journal_file):
+            return None
+        try:
+            record = self.data_manager.codec.read_file(self.journal_file)
+            return record if isinstance(record, dict) and record.get('id') else None
+        except Exception as e:
+            print(f"切り替えジャーナル読み込みエラー: {e}")
+            return None
+
+    def clear(self, record_id):
+        """反映が完了したレコードを削除（より新しいレコードが書かれていれば残す）"""
+        with self.lock:
+            if record_id != self.current_id:
+                return True
+            try:
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                self.current_id = None
+                return True
+            except OSError as e:
+                print(f"切り替えジャーナル削除エラー: {e}")
+                return False
+
+
+class ProfileSwitchTransaction:
+    """プロファイル切り替えトランザクションクラス
+
+    prepare() で切り替え先の読み込みと自動保存データの作成を行い、commit() で
+    切り替えを確定する。JSON保存時は切り替えジャーナルへの1回の書き込みで確定し、
+    各ファイルへの反映は永続化ワーカーで行う。SQLite保存時は1トランザクションで実行する。
+    commit() 前であれば rollback() で何も変更せずに取り消せる。
+    """
+
+    def __init__(self, profile_manager, target_name):
+        self.profile_manager = profile_manager
+        self.data_manager = profile_manager.data_manager
+        self.source_name = profile_manager.current_profile_name
+        self.target_name = target_name
+        self.state = STATE_PENDING
+        self.groups_data = None  # 切り替え先のグループ
+        self.outgoing_data = None  # 切り替え元の自動保存データ
+
+    def prepare(self):
+        """切り替え先のグループを読み込み、切り替え元の自動保存データを作成"""
+        if self.state != STATE_PENDING:
+            return False, "トランザクションは既に終了しています"
+
+        # 遅延中の保存をストアに反映（JSONではワーカーの順序で書き込まれるため完了は待たないが、
+        # SQLiteの切り替えはGUIスレッドで実行するため先に書き込みを完了させる）
+        self.data_manager.flush_pending_saves(wait=self.data_manager.storage is not None)
+
+        if self.data_manager.storage is not None:
+            # SQLiteでは切り替え先の読み込みもトランザクション内で行う
+            if not self.profile_manager.profile_exists(self.target_name):
+                return False, f"プロファイル '{self.target_name}' が見つかりません"
+            return True, None
+
+        success, result = self.profile_manager.load_profile(self.target_name)
+        if not success:
+            return False, result
+        self.groups_data = self.data_manager.ensure_group_ids(result)
+
+        if self.source_name:
+            self.outgoing_data = self.profile_manager.build_profile_data(self.source_name, "自動保存")
+        return True, None
+
+    def commit(self):
+        """切り替えを確定"""
+        if self.state != STATE_PENDING:
+            raise RuntimeError("トランザクションは既に終了しています")
+
+        if self.data_manager.storage is not None:
+            groups_data = self.data_manager.storage.switch_profile(
+                self.source_name, self.target_name, self.data_manager.get_current_groups())
+            self.groups_data = self.data_manager.ensure_group_ids(groups_data)
+            self.data_manager.group_store.set_groups(self.groups_data)
+            self.profile_manager.set_current_profile_name(self.target_name)
+            self.state = STATE_COMMITTED
+            return True
+
+        record = {
+            'version': '1.0',
+            'id': uuid.uuid4().hex,
+            'created': datetime.now().isoformat(),
+            'from_profile': self.source_name,
+            'to_profile': self.target_name,
+            'outgoing_profile': self.outgoing_data,
+            'groups': copy.deepcopy(self.groups_data)  # ストアと共有しない（ワーカーで書き込むため）
+        }
+
+        # ジャーナルへの書き込みが切り替えの確定点
+        switch_journal = self.profile_manager.switch_journal
+        switch_journal.write(record)
+        self.state = STATE_COMMITTED
+
+        # メモリ上の状態を切り替え（以降の表示はストア・キャッシュから行う）
+        if self.outgoing_data is not None:
+            self.profile_manager.cache.put(self.source_name, self.outgoing_data)
+        self.data_manager.group_store.set_groups(self.data_manager.ensure_group_ids(self.groups_data))
+        self.profile_manager.set_current_profile_name(self.target_name)
+
+        # 各ファイルへの反映とジャーナルの削除をワーカーに投入
+        self.data_manager.submit_write(
+            switch_journal.journal_file,
+            lambda: self.profile_manager.apply_switch_record(record) and switch_journal.clear(record['id']))
+        return True
+
+    def rollback(self):
+        """確定前の切り替えを取り消し（何も書き込んでいないため状態を破棄するだけ）"""
+        if self.state == STATE_COMMITTED:
+            return False
+        self.state = STATE_ROLLED_BACK
+        self.groups_data = None
+        self.outgoing_data = None
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 確定せずに抜けた場合（例外を含む）は取り消す
+        if self.state == STATE_PENDING:
+            self.rollback()
+        return False
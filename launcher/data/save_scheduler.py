@@ -0,0 +1,107 @@
+"""
+SaveScheduler - 保存要求を集約して遅延書き込みするスケジューラ
+"""
+
+from PyQt6.QtCore import QObject, QTimer
+
+
+class SaveScheduler(QObject):
+    """保存スケジューラクラス（write-behind）
+
+    保存要求を受けると状態をダーティにし、一定時間（delay_ms）新しい要求が
+    来なくなった時点でまとめて1回だけ書き込む。要求が途切れない場合でも
+    max_delay_ms を超えたら強制的に書き込む。
+    """
+
+    def __init__(self, write_callback, delay_ms=500, max_delay_ms=3000, parent=None):
+        super().__init__(parent)
+        self.write_callback = write_callback  # 実際の書き込み処理（成功時True）
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.dirty = False
+        self.held = False  # 保留中は書き込まない（段階的読み込み中など）
+
+        # メトリクス
+        self.requested_count = 0  # 保存要求の回数
+        self.write_count = 0  # 実際に書き込んだ回数
+        self.failed_count = 0  # 書き込み失敗回数
+        self.coalesced_count = 0  # 集約により省略された書き込み回数
+        self.pending_requests = 0  # 現在保留中の要求数
+
+        # アイドル検出用タイマー（要求のたびにリスタート）
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.flush)
+
+        # 最大遅延用タイマー（最初の要求から開始）
+        self.max_delay_timer = QTimer(self)
+        self.max_delay_timer.setSingleShot(True)
+        self.max_delay_timer.timeout.connect(self.flush)
+
+    def request_save(self):
+        """保存を要求（ダーティにして遅延書き込みを予約）"""
+        self.requested_count += 1
+        self.pending_requests += 1
+        self.dirty = True
+
+        self.idle_timer.start(self.delay_ms)
+        if not self.max_delay_timer.isActive():
+            self.max_delay_timer.start(self.max_delay_ms)
+
+    def flush(self):
+        """保留中の保存を即座に書き込む"""
+        self.idle_timer.stop()
+        self.max_delay_timer.stop()
+
+        if not self.dirty:
+            return True
+
+        if self.held:
+            # 保留中は書き込まず、解除時に改めて書き込む
+            return True
+
+        self.dirty = False
+        self.coalesced_count += max(0, self.pending_requests - 1)
+        self.pending_requests = 0
+        try:
+            result = self.write_callback()
+        except Exception as e:
+            print(f"遅延保存エラー: {e}")
+            result = False
+
+        if result is False:
+            self.failed_count += 1
+        else:
+            self.write_count += 1
+        return result is not False
+
+    def hold(self):
+        """書き込みを保留（読み込み途中の状態を保存しないように）"""
+        self.held = True
+
+    def release(self):
+        """書き込みの保留を解除（保留中の要求があれば遅延書き込みを予約）"""
+        self.held = False
+        if self.dirty:
+            self.idle_timer.start(self.delay_ms)
+
+    def has_pending(self):
+        """保留中の保存があるかチェック"""
+        return self.dirty
+
+    def set_delay(self, delay_ms, max_delay_ms=None):
+        """集約ウィンドウを変更"""
+        self.delay_ms = max(0, int(delay_ms))
+        if max_delay_ms is not None:
+            self.max_delay_ms = int(max_delay_ms)
+        self.max_delay_ms = max(self.delay_ms, self.max_delay_ms)
+
+    def get_metrics(self):
+        """保存要求数と実書き込み数を取得"""
+        return {
+            'requested': self.requested_count,
+            'written': self.write_count,
+            'failed': self.failed_count,
+            'coalesced': self.coalesced_count,
+            'pending': self.pending_requests
+        }
@@ -3,11 +3,12 @@ SettingsManager - アプリケーション設定の管理
 """
 
 import os
+import copy
 import json
 import winreg
-import shutil
 from datetime import datetime
 from pathlib import Path
+from data.backup_engine import BackupEngine
 
 
 class SettingsManager:
@@ -43,23 +44,50 @@ class SettingsManager:
                 'toggle_desktop_icons': 'Ctrl+Shift+F12'
             },
             'advanced': {
-                'max_backups': 10
+                'max_backups': 10,
+                'backup_recent_minutes': 30,  # この時間内のバックアップはすべて保持
+                'save_delay_ms': 500,  # 保存要求を集約する待機時間
+                'save_max_delay_ms': 3000,  # 集約中でも強制的に保存するまでの最大時間
+                'groups_journal': False,  # グループの変更を操作ジャーナルに追記
+                'journal_compact_kb': 256,  # ジャーナルをスナップショットに圧縮するサイズ
+                'journal_compact_seconds': 600,  # ジャーナルをスナップショットに圧縮する間隔
+                'sharded_groups': False,  # グループごとにファイルを分けて変更分のみ保存
+                'durability': 'strict',  # 書き込みの安全性（strict / relaxed / batched）
+                'config_encoding': 'json',  # グループ・プロファイルの保存形式（json / compact / binary）
+                'profile_cache_size': 4,  # メモリ上に保持する最近使用したプロファイル数（0で無効）
+                'profile_history_size': 10,  # プロファイルごとに保持する保存履歴の数
+                'icon_cache_mb': 32,  # アイコンのディスクキャッシュの上限（MB、0で無効）
+                'icon_memory_cache_mb': 16,  # メモリ上に保持するアイコンの上限（MB）
+                'icon_cache_idle_minutes': 10  # この時間アイコンを使わなければメモリ上のアイコンを解放（0で無効）
             }
         }
         
+        # 設定バックアップ用エンジン（グループと同じ保持ルールを使用）
+        self.settings_backup_dir = os.path.join(self.config_dir, "settings_backups")
+        self.backup_engine = BackupEngine(self.settings_backup_dir, "settings")
+        
         # 設定を読み込み
         self.settings = self.load_settings()
         
+        # バックアップの保持数を反映
+        self.apply_storage_settings()
+        
         # レジストリキーのマイグレーション
         self.migrate_registry_key()
         
     def load_settings(self):
         """設定ファイルを読み込み"""
         try:
-            if os.path.exists(self.settings_file):
+            storage = self.data_manager.storage
+            if storage is not None:
+                data = storage.load_settings()
+            elif os.path.exists(self.settings_file):
                 with open(self.settings_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    
+            else:
+                data = None
+                
+            if data is not None:
                 # メタデータ構造から設定データを取得
                 if isinstance(data, dict) and 'settings' in data:
                     # 新しい形式（メタデータ付き）
@@ -86,10 +114,19 @@ class SettingsManager:
             return self.default_settings.copy()
             
     def save_all_settings(self, settings=None):
-        """全設定を保存"""
+        """全設定を保存（ワーカーがあればバックグラウンドで書き込み）"""
+        if settings is None:
+            settings = self.settings
+            
+        settings_snapshot = copy.deepcopy(settings)
+        return self.data_manager.submit_write(
+            self.settings_file, lambda: self.write_settings_file(settings_snapshot))
+        
+    def write_settings_file(self, settings):
+        """設定をファイルに書き込み"""
         try:
-            if settings is None:
-                settings = self.settings
+            if self.data_manager.storage is not None:
+                return self.data_manager.storage.save_settings(settings)
                 
             # バックアップ作成
             self.create_settings_backup()
@@ -101,13 +138,8 @@ class SettingsManager:
                 'settings': settings
             }
             
-            # 一時ファイルに保存してから本ファイルに移動
-            temp_file = self.settings_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
-                
-            shutil.move(temp_file, self.settings_file)
-            return True
+            # 一時ファイル経由でアトミックに置き換え
+            return self.data_manager.atomic_writer.write_json(self.settings_file, save_data)
             
         except Exception as e:
             print(f"設定保存エラー: {e}")
@@ -150,9 +182,48 @@ class SettingsManager:
         
     def save_advanced_settings(self, advanced_settings):
         """高度な設定を保存"""
+        advanced_settings = dict(advanced_settings)
+        
+        # ストレージバックエンドの切り替え（設定値ではなくデータベースの有無で管理）
+        use_sqlite = advanced_settings.pop('use_sqlite_storage', None)
+        if use_sqlite is not None:
+            self.set_storage_backend("sqlite" if use_sqlite else "json")
+            
         self.settings['advanced'].update(advanced_settings)
+        self.apply_storage_settings()
         return self.save_all_settings()
         
+    def apply_storage_settings(self):
+        """バックアップの保持設定とジャーナル設定を反映"""
+        advanced = self.settings.get('advanced', {})
+        max_backups = advanced.get('max_backups', 10)
+        recent_minutes = advanced.get('backup_recent_minutes', 30)
+        self.backup_engine.configure(max_backups, recent_minutes)
+        self.data_manager.backup_engine.configure(max_backups, recent_minutes)
+        
+        self.data_manager.configure_journal(
+            advanced.get('groups_journal', False),
+            advanced.get('journal_compact_kb', 256) * 1024,
+            advanced.get('journal_compact_seconds', 600)
+        )
+        self.data_manager.configure_sharding(advanced.get('sharded_groups', False))
+        self.data_manager.configure_durability(advanced.get('durability', 'strict'))
+        self.data_manager.configure_encoding(advanced.get('config_encoding', 'json'))
+        
+    def set_storage_backend(self, backend_name):
+        """ストレージバックエンドを切り替え（JSON ⇔ SQLite）"""
+        if backend_name == self.data_manager.get_storage_name():
+            return True
+            
+        if backend_name == "sqlite":
+            result = self.data_manager.enable_sqlite_storage()
+        else:
+            result = self.data_manager.disable_sqlite_storage()
+            
+        if result:
+            print(f"ストレージバックエンドを切り替えました: {backend_name}")
+        return result
+        
     def set_startup_with_windows(self, enable):
         """Windows起動時の自動実行設定"""
         try:
@@ -206,41 +277,14 @@ class SettingsManager:
             return False
             
     def create_settings_backup(self):
-        """設定ファイルのバックアップを作成"""
-        try:
-            if os.path.exists(self.settings_file):
-                backup_dir = os.path.join(self.config_dir, "settings_backups")
-                os.makedirs(backup_dir, exist_ok=True)
-                
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_file = os.path.join(backup_dir, f"settings_{timestamp}.json")
-                shutil.copy2(self.settings_file, backup_file)
-                
-                # 古いバックアップを削除（設定値に従って）
-                max_backups = self.settings.get('advanced', {}).get('max_backups', 10)
-                self.cleanup_old_settings_backups(backup_dir, max_backups)
-                
-        except Exception as e:
-            print(f"設定バックアップエラー: {e}")
+        """設定ファイルのバックアップを作成（同一内容ならスキップ）"""
+        return self.backup_engine.create_backup(self.settings_file)
             
-    def cleanup_old_settings_backups(self, backup_dir, max_backups):
-        """古い設定バックアップを削除"""
-        try:
-            backup_files = []
-            for filename in os.listdir(backup_dir):
-                if filename.startswith("settings_") and filename.endswith(".json"):
-                    file_path = os.path.join(backup_dir, filename)
-                    backup_files.append((file_path, os.path.getmtime(file_path)))
-                    
-            # 作成日時でソート
-            backup_files.sort(key=lambda x: x[1], reverse=True)
-            
-            # 古いファイルを削除
-            for file_path, _ in backup_files[max_backups:]:
-                os.remove(file_path)
-                
-        except Exception as e:
-            print(f"設定バックアップクリーンアップエラー: {e}")
+    def cleanup_old_settings_backups(self, backup_dir=None, max_backups=None):
+        """古い設定バックアップを削除（時間階層で世代を保持）"""
+        if max_backups is not None:
+            self.backup_engine.configure(max_backups=max_backups)
+        self.backup_engine.apply_retention()
             
     def export_all_settings(self, export_dir=None, filename=None):
         """全設定をエクスポート"""
@@ -263,6 +307,9 @@ class SettingsManager:
             
             export_path = os.path.join(export_dir, export_filename)
             
+            # 遅延中の保存を反映
+            self.data_manager.flush_pending_saves()
+            
             # プロファイルデータも含める
             profile_data = self.export_all_profiles()
             
@@ -271,7 +318,7 @@ class SettingsManager:
                 'exported': datetime.now().isoformat(),
                 'app_name': self.app_name,
                 'settings': self.settings,
-                'groups': self.data_manager.load_groups(),  # グループデータも含める
+                'groups': self.data_manager.get_current_groups(),  # グループデータも含める
                 'profiles': profile_data  # プロファイルデータを追加
             }
             
@@ -287,7 +334,8 @@ class SettingsManager:
     def import_all_settings(self, import_path):
         """全設定をインポート"""
         try:
-            # バックアップ作成
+            # 遅延中・書き込み中の保存を反映してからバックアップ作成
+            self.data_manager.flush_pending_saves()
             self.create_settings_backup()
             self.data_manager.create_backup()
             
@@ -308,6 +356,7 @@ class SettingsManager:
                         new_settings[category].update(values)
                         
                 self.settings = new_settings
+                self.apply_storage_settings()
                 self.save_all_settings()
                 
             # グループデータもインポート（存在する場合）
@@ -327,11 +376,13 @@ class SettingsManager:
     def reset_all_settings(self):
         """全設定をリセット"""
         try:
-            # バックアップ作成
+            # 書き込み中の設定を確定させてからバックアップ作成
+            self.data_manager.wait_for_writes()
             self.create_settings_backup()
             
             # デフォルト設定を適用
             self.settings = self.default_settings.copy()
+            self.apply_storage_settings()
             
             # 起動時自動実行を無効化
             self.set_startup_with_windows(False)
@@ -364,7 +415,66 @@ class SettingsManager:
     def get_default_export_filename(self):
         """デフォルトのエクスポートファイル名を取得"""
         timestamp = self.get_timestamp()
-        return f"launcher_settings_{timestamp}.json"
+        return f"launcher_settings_{timestamp}.zip"
+        
+    def begin_bundle_export(self):
+        """アーカイブのエクスポートに必要な状態を取得（GUIスレッドで呼ぶ）
+        
+        プロファイル本体はエクスポート中にワーカーで1件ずつ読み込むため、ここでは名前のみ取得する。
+        """
+        # 遅延中の保存を反映
+        self.data_manager.flush_pending_saves()
+        
+        profile_names = []
+        current_profile = None
+        if getattr(self, 'profile_manager', None) is not None:
+            profile_names = [profile['name'] for profile in self.profile_manager.get_profile_list()]
+            current_profile = self.profile_manager.current_profile_name
+            
+        return {
+            'settings': copy.deepcopy(self.settings),
+            'groups': self.data_manager.get_current_groups(),
+            'profiles': profile_names,
+            'current_profile': current_profile
+        }
+        
+    def begin_bundle_import(self):
+        """アーカイブのインポート前にバックアップを作成（GUIスレッドで呼ぶ）"""
+        self.data_manager.flush_pending_saves()
+        self.create_settings_backup()
+        self.data_manager.create_backup()
+        
+    def apply_bundle_import(self, result):
+        """インポートした設定・グループ・現在のプロファイルを反映（GUIスレッドで呼ぶ）"""
+        try:
+            imported_settings = result.get('settings')
+            if isinstance(imported_settings, dict):
+                # デフォルト設定とマージ
+                new_settings = copy.deepcopy(self.default_settings)
+                for category, values in imported_settings.items():
+                    if category in new_settings and isinstance(values, dict):
+                        new_settings[category].update(values)
+                        
+                self.settings = new_settings
+                self.apply_storage_settings()
+                self.save_all_settings()
+                
+            if isinstance(result.get('groups'), list):
+                # インポートしたグループで置き換えるため、読めなかった設定ファイルへの保存も再開
+                self.data_manager.allow_config_writes()
+                self.data_manager.save_groups(result['groups'])
+                
+            current_profile = result.get('current_profile')
+            profile_manager = getattr(self, 'profile_manager', None)
+            if current_profile and profile_manager is not None and profile_manager.profile_exists(current_profile):
+                profile_manager.set_current_profile_name(current_profile)
+                profile_manager.save_current_profile_info()
+                
+            return True
+            
+        except Exception as e:
+            print(f"設定インポートエラー: {e}")
+            return False
         
     def export_all_profiles(self):
         """全プロファイルデータをエクスポート用に取得"""
@@ -379,11 +489,7 @@ class SettingsManager:
             for profile_info in profile_list:
                 profile_name = profile_info['name']
                 
-                # プロファイルの完全なデータを取得
-                profile_dir = os.path.join(self.profile_manager.profiles_dir, profile_name)
-                profile_file = os.path.join(profile_dir, "profile.json")
-                groups_file = os.path.join(profile_dir, "groups.json")
-                
+                # プロファイルの完全なデータを取得（グループはブロブから展開される）
                 profile_export_data = {
                     'info': profile_info,
                     'profile_data': None,
@@ -391,21 +497,12 @@ class SettingsManager:
                 }
                 
                 # プロファイル情報を読み込み
-                if os.path.exists(profile_file):
+                if self.profile_manager.profile_exists(profile_name):
                     try:
-                        with open(profile_file, 'r', encoding='utf-8') as f:
-                            profile_export_data['profile_data'] = json.load(f)
+                        profile_export_data['profile_data'] = self.profile_manager.read_profile_data(profile_name)
                     except Exception as e:
                         print(f"プロファイル '{profile_name}' の読み込みエラー: {e}")
                 
-                # グループデータを読み込み
-                if os.path.exists(groups_file):
-                    try:
-                        with open(groups_file, 'r', encoding='utf-8') as f:
-                            profile_export_data['groups_data'] = json.load(f)
-                    except Exception as e:
-                        print(f"プロファイル '{profile_name}' のグループデータ読み込みエラー: {e}")
-                
                 profiles_data[profile_name] = profile_export_data
                 
             # 現在のプロファイル情報も含める
@@ -437,21 +534,12 @@ class SettingsManager:
                 if not isinstance(profile_export_data, dict):
                     continue
                     
-                # プロファイルディレクトリを作成
-                profile_dir = os.path.join(self.profile_manager.profiles_dir, profile_name)
-                os.makedirs(profile_dir, exist_ok=True)
-                
                 # プロファイル情報を復元
                 if 'profile_data' in profile_export_data and profile_export_data['profile_data']:
-                    profile_file = os.path.join(profile_dir, "profile.json")
-                    with open(profile_file, 'w', encoding='utf-8') as f:
-                        json.dump(profile_export_data['profile_data'], f, indent=2, ensure_ascii=False)
+                    self.profile_manager.write_profile_data(profile_name, profile_export_data['profile_data'])
                 
-                # グループデータを復元
-                if 'groups_data' in profile_export_data and profile_export_data['groups_data']:
-                    groups_file = os.path.join(profile_dir, "groups.json")
-                    with open(groups_file, 'w', encoding='utf-8') as f:
-                        json.dump(profile_export_data['groups_data'], f, indent=2, ensure_ascii=False)
+                # groups_data（旧形式のプロファイル別groups.json）はプロファイル本体と同じファイル名のため
+                # 書き込まない（グループは profile_data に含まれている）
                 
                 print(f"プロファイル '{profile_name}' をインポートしました")
             
@@ -460,17 +548,9 @@ class SettingsManager:
                 # エクスポート時の現在プロファイルが存在するかチェック
                 exported_current = profiles_data['current_profile']
                 if exported_current in profiles_data and exported_current != 'current_profile':
-                    self.profile_manager.current_profile_name = exported_current
-                    # current_profile.json を更新
-                    try:
-                        current_profile_data = {
-                            'current_profile': exported_current,
-                            'updated': datetime.now().isoformat()
-                        }
-                        with open(self.profile_manager.current_profile_file, 'w', encoding='utf-8') as f:
-                            json.dump(current_profile_data, f, indent=2, ensure_ascii=False)
-                    except Exception as e:
-                        print(f"現在のプロファイル情報更新エラー: {e}")
+                    self.profile_manager.set_current_profile_name(exported_current)
+                    # 現在のプロファイル情報を更新
+                    self.profile_manager.save_current_profile_info()
             
             return True
             
@@ -489,7 +569,7 @@ class SettingsManager:
         
         # バックアップ数
         try:
-            backup_dir = os.path.join(self.config_dir, "settings_backups")
+            backup_dir = self.settings_backup_dir
             if os.path.exists(backup_dir):
                 backup_files = [f for f in os.listdir(backup_dir) 
                                if f.startswith("settings_") and f.endswith(".json")]
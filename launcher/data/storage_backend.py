@@ -0,0 +1,479 @@
+"""
+StorageBackend - グループ・プロファイル・設定を保存するSQLite(WAL)ストレージ
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from data.profile_files import (PROFILE_HEADER_FILE, PROFILE_BODY_FILE, LEGACY_PROFILE_FILE, BLOBS_DIR,
+                                split_profile, merge_profile, load_body_groups)
+
+
+# アクティブなグループ（プロファイルに属さない現在の状態）を表すprofile_id
+ACTIVE_PROFILE_ID = 0
+
+# グループの列として保持するキー（それ以外はextra列にJSONで保持）
+GROUP_COLUMNS = ('id', 'name', 'x', 'y', 'custom_icon_path', 'items')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS settings (
+    category TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT DEFAULT '',
+    created TEXT,
+    updated TEXT,
+    version TEXT DEFAULT '1.0',
+    hotkey TEXT
+);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    profile_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    group_key TEXT,
+    name TEXT NOT NULL,
+    x INTEGER DEFAULT 0,
+    y INTEGER DEFAULT 0,
+    custom_icon_path TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    path TEXT,
+    checked INTEGER DEFAULT 1,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_groups_profile ON groups(profile_id, position);
+CREATE INDEX IF NOT EXISTS idx_items_group ON items(group_id, position);
+CREATE INDEX IF NOT EXISTS idx_items_path ON items(path);
+"""
+
+
+class SqliteStorageBackend:
+    """SQLiteストレージバックエンドクラス
+
+    アイテム・グループ・プロファイルをそれぞれ行として保持する。
+    接続はGUIスレッドと永続化ワーカーで共有するため、ロックで直列化する。
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def set_durability(self, durability):
+        """書き込みの安全性レベルに応じて同期モードを変更"""
+        synchronous = {"strict": "FULL", "relaxed": "OFF"}.get(durability, "NORMAL")
+        with self.lock:
+            self.connection.execute(f"PRAGMA synchronous={synchronous}")
+
+    def close(self):
+        """接続を閉じる（WALをチェックポイントしてから）"""
+        with self.lock:
+            try:
+                self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                print(f"WALチェックポイントエラー: {e}")
+            self.connection.close()
+
+    def transaction(self):
+        """書き込みトランザクションを開始（withで使用）"""
+        return _Transaction(self)
+
+    # ---- メタ情報 ----
+
+    def get_meta(self, key, default=None):
+        """メタ情報を取得"""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        """メタ情報を設定"""
+        with self.transaction() as conn:
+            self._set_meta(conn, key, value)
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---- グループ ----
+
+    def load_groups(self, profile_id=ACTIVE_PROFILE_ID):
+        """グループ一覧を読み込み"""
+        with self.lock:
+            return self._load_groups(self.connection, profile_id)
+
+    def save_groups(self, groups_data, profile_id=ACTIVE_PROFILE_ID):
+        """グループ一覧を置き換えて保存"""
+        with self.transaction() as conn:
+            self._replace_groups(conn, profile_id, groups_data)
+        return True
+
+    def _load_groups(self, conn, profile_id):
+        group_rows = conn.execute(
+            "SELECT * FROM groups WHERE profile_id = ? ORDER BY position", (profile_id,)).fetchall()
+        if not group_rows:
+            return []
+
+        items_by_group = {}
+        item_rows = conn.execute(
+            "SELECT items.group_id, items.checked, items.data FROM items "
+            "JOIN groups ON items.group_id = groups.id "
+            "WHERE groups.profile_id = ? ORDER BY items.group_id, items.position", (profile_id,))
+        for row in item_rows:
+            item = json.loads(row['data'])
+            item['checked'] = bool(row['checked'])
+            items_by_group.setdefault(row['group_id'], []).append(item)
+
+        groups = []
+        for row in group_rows:
+            group = json.loads(row['extra']) if row['extra'] else {}
+            if row['group_key']:
+                group['id'] = row['group_key']
+            group['name'] = row['name']
+            group['x'] = row['x']
+            group['y'] = row['y']
+            group['items'] = items_by_group.get(row['id'], [])
+            group['custom_icon_path'] = row['custom_icon_path']
+            groups.append(group)
+        return groups
+
+    def _replace_groups(self, conn, profile_id, groups_data):
+        conn.execute("DELETE FROM groups WHERE profile_id = ?", (profile_id,))
+        for position, group in enumerate(groups_data):
+            extra = {k: v for k, v in group.items() if k not in GROUP_COLUMNS}
+            cursor = conn.execute(
+                "INSERT INTO groups (profile_id, position, group_key, name, x, y, custom_icon_path, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (profile_id, position, group.get('id'), group.get('name', ''),
+                 group.get('x', 0), group.get('y', 0), group.get('custom_icon_path'),
+                 json.dumps(extra, ensure_ascii=False) if extra else None))
+            group_row_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO items (group_id, position, path, checked, data) VALUES (?, ?, ?, ?, ?)",
+                [(group_row_id, index, item.get('path'), 1 if item.get('checked', True) else 0,
+                  json.dumps(item, ensure_ascii=False))
+                 for index, item in enumerate(group.get('items', []))])
+
+    def find_items_by_path(self, path, profile_id=ACTIVE_PROFILE_ID):
+        """パスが一致するアイテムを含むグループ名を取得（インデックス検索）"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT groups.name FROM items JOIN groups ON items.group_id = groups.id "
+                "WHERE items.path = ? AND groups.profile_id = ? ORDER BY groups.position",
+                (path, profile_id)).fetchall()
+        return [row['name'] for row in rows]
+
+    # ---- 設定 ----
+
+    def load_settings(self):
+        """設定を読み込み（未保存ならNone）"""
+        with self.lock:
+            rows = self.connection.execute("SELECT category, data FROM settings").fetchall()
+        if not rows:
+            return None
+        return {row['category']: json.loads(row['data']) for row in rows}
+
+    def save_settings(self, settings):
+        """設定を保存"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM settings")
+            conn.executemany(
+                "INSERT INTO settings (category, data) VALUES (?, ?)",
+                [(category, json.dumps(values, ensure_ascii=False)) for category, values in settings.items()])
+        return True
+
+    # ---- プロファイル ----
+
+    def profile_exists(self, profile_name):
+        """プロファイルが存在するかチェック"""
+        return self._get_profile_id(self.connection, profile_name) is not None
+
+    def _get_profile_id(self, conn, profile_name):
+        with self.lock:
+            row = conn.execute("SELECT id FROM profiles WHERE name = ?", (profile_name,)).fetchone()
+        return row['id'] if row else None
+
+    PROFILE_HEADER_QUERY = (
+        "SELECT profiles.*, "
+        "(SELECT COUNT(*) FROM groups WHERE groups.profile_id = profiles.id) AS groups_count, "
+        "(SELECT COUNT(*) FROM items JOIN groups ON items.group_id = groups.id "
+        "WHERE groups.profile_id = profiles.id) AS items_count "
+        "FROM profiles")
+
+    def list_profiles(self):
+        """プロファイル一覧を取得（グループ本体は読み込まない）"""
+        with self.lock:
+            rows = self.connection.execute(self.PROFILE_HEADER_QUERY).fetchall()
+        return [self._profile_row_to_dict(row) for row in rows]
+
+    def get_profile_header(self, profile_name):
+        """プロファイルの概要を取得（グループ本体は読み込まない・存在しなければNone）"""
+        with self.lock:
+            row = self.connection.execute(
+                self.PROFILE_HEADER_QUERY + " WHERE profiles.name = ?", (profile_name,)).fetchone()
+        return self._profile_row_to_dict(row) if row is not None else None
+
+    def load_profile(self, profile_name):
+        """プロファイルをグループ込みで読み込み（存在しなければNone）"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM profiles WHERE name = ?", (profile_name,)).fetchone()
+            if row is None:
+                return None
+            profile_data = self._profile_row_to_dict(row)
+            profile_data['groups'] = self._load_groups(self.connection, row['id'])
+        return profile_data
+
+    def save_profile(self, profile_data):
+        """プロファイルを保存（存在すれば上書き）"""
+        with self.transaction() as conn:
+            self._save_profile(conn, profile_data)
+        return True
+
+    def _save_profile(self, conn, profile_data):
+        name = profile_data['name']
+        hotkey = profile_data.get('hotkey')
+        conn.execute(
+            "INSERT INTO profiles (name, description, created, updated, version, hotkey) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET description = excluded.description, "
+            "created = excluded.created, updated = excluded.updated, "
+            "version = excluded.version, hotkey = excluded.hotkey",
+            (name, profile_data.get('description', ''),
+             profile_data.get('created', datetime.now().isoformat()),
+             profile_data.get('updated', datetime.now().isoformat()),
+             profile_data.get('version', '1.0'),
+             json.dumps(hotkey, ensure_ascii=False) if hotkey is not None else None))
+        profile_id = self._get_profile_id(conn, name)
+        if 'groups' in profile_data:
+            self._replace_groups(conn, profile_id, profile_data.get('groups') or [])
+
+    def update_profile_header(self, profile_name, header):
+        """プロファイルの説明・更新日時・ホットキーのみ更新（グループは書き換えない）"""
+        hotkey = header.get('hotkey')
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE profiles SET description = ?, updated = ?, hotkey = ? WHERE name = ?",
+                (header.get('description', ''), header.get('updated', datetime.now().isoformat()),
+                 json.dumps(hotkey, ensure_ascii=False) if hotkey is not None else None,
+                 profile_name))
+        return True
+
+    def delete_profile(self, profile_name):
+        """プロファイルを削除"""
+        with self.transaction() as conn:
+            profile_id = self._get_profile_id(conn, profile_name)
+            if profile_id is None:
+                return False
+            conn.execute("DELETE FROM groups WHERE profile_id = ?", (profile_id,))
+            conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+        return True
+
+    def rename_profile(self, old_name, new_name):
+        """プロファイル名を変更"""
+        with self.transaction() as conn:
+            conn.execute("UPDATE profiles SET name = ?, updated = ? WHERE name = ?",
+                         (new_name, datetime.now().isoformat(), old_name))
+            if self.get_meta('current_profile') == old_name:
+                self._set_meta(conn, 'current_profile', new_name)
+        return True
+
+    def switch_profile(self, current_name, target_name, current_groups=None):
+        """プロファイルを切り替え（現在の状態の保存・適用・現在プロファイルの更新を1トランザクションで実行）"""
+        with self.transaction() as conn:
+            target_id = self._get_profile_id(conn, target_name)
+            if target_id is None:
+                raise ValueError(f"プロファイル '{target_name}' が見つかりません")
+
+            # 現在の状態を現在のプロファイルに自動保存
+            current_id = self._get_profile_id(conn, current_name) if current_name else None
+            if current_id is not None:
+                conn.execute("UPDATE profiles SET description = ?, updated = ? WHERE id = ?",
+                             ("自動保存", datetime.now().isoformat(), current_id))
+                if current_groups is None:
+                    current_groups = self._load_groups(conn, ACTIVE_PROFILE_ID)
+                self._replace_groups(conn, current_id, current_groups)
+
+            # 新しいプロファイルのグループを適用
+            groups_data = self._load_groups(conn, target_id)
+            self._replace_groups(conn, ACTIVE_PROFILE_ID, groups_data)
+            self._set_meta(conn, 'current_profile', target_name)
+        return groups_data
+
+    def _profile_row_to_dict(self, row):
+        profile_data = {
+            'name': row['name'],
+            'description': row['description'] or '',
+            'created': row['created'] or '',
+            'updated': row['updated'] or '',
+            'version': row['version'] or '1.0',
+            'hotkey': json.loads(row['hotkey']) if row['hotkey'] else None
+        }
+        for key in ('groups_count', 'items_count'):
+            if key in row.keys():
+                profile_data[key] = row[key]
+        return profile_data
+
+    # ---- JSONからの移行 ----
+
+    def import_from_json(self, config_dir, reader=None):
+        """既存のJSONファイル構成を一括で取り込む（readerは圧縮・バイナリ形式の読み込み用）"""
+        groups_file = os.path.join(config_dir, "groups.json")
+        settings_file = os.path.join(config_dir, "settings.json")
+        current_profile_file = os.path.join(config_dir, "current_profile.json")
+        profiles_dir = os.path.join(config_dir, "profiles")
+
+        groups = self._read_json(groups_file, reader)
+        if isinstance(groups, dict):
+            groups = groups.get('groups', [])
+
+        settings = self._read_json(settings_file, reader)
+        if isinstance(settings, dict) and 'settings' in settings:
+            settings = settings['settings']
+
+        profiles = []
+        if os.path.isdir(profiles_dir):
+            for entry in os.listdir(profiles_dir):
+                profile_dir = os.path.join(profiles_dir, entry)
+                header = self._read_json(os.path.join(profile_dir, PROFILE_HEADER_FILE), reader)
+                if isinstance(header, dict):
+                    body = self._read_json(os.path.join(profile_dir, PROFILE_BODY_FILE), reader)
+                    try:
+                        # ブロブ参照の本体はブロブからグループを読み込む
+                        groups = load_body_groups(body, os.path.join(config_dir, BLOBS_DIR),
+                                                  reader or self._load_json_file)
+                    except Exception as e:
+                        print(f"プロファイル '{entry}' のグループ読み込みエラー: {e}")
+                        continue
+                    profile_data = merge_profile(header, {'groups': groups})
+                else:
+                    # 旧形式（ヘッダーと本体が1ファイル）
+                    profile_data = self._read_json(os.path.join(profile_dir, LEGACY_PROFILE_FILE), reader)
+                if isinstance(profile_data, dict):
+                    profile_data['name'] = entry
+                    profiles.append(profile_data)
+
+        current_info = self._read_json(current_profile_file, reader)
+        current_profile = current_info.get('current_profile') if isinstance(current_info, dict) else None
+
+        with self.transaction() as conn:
+            if isinstance(groups, list):
+                self._replace_groups(conn, ACTIVE_PROFILE_ID, groups)
+            if isinstance(settings, dict):
+                conn.execute("DELETE FROM settings")
+                conn.executemany(
+                    "INSERT INTO settings (category, data) VALUES (?, ?)",
+                    [(category, json.dumps(values, ensure_ascii=False))
+                     for category, values in settings.items() if isinstance(values, dict)])
+            for profile_data in profiles:
+                self._save_profile(conn, profile_data)
+            if current_profile:
+                self._set_meta(conn, 'current_profile', current_profile)
+            self._set_meta(conn, 'imported_from_json', datetime.now().isoformat())
+
+        print(f"JSONから取り込み: グループ {len(groups or [])} 件, プロファイル {len(profiles)} 件")
+        return True
+
+    def export_to_json(self, config_dir):
+        """現在の内容をJSONファイル構成に書き出す（JSONバックエンドへ戻す場合）"""
+        now = datetime.now().isoformat()
+        self._write_json(os.path.join(config_dir, "groups.json"),
+                         {'version': '1.0', 'created': now, 'groups': self.load_groups()})
+
+        settings = self.load_settings()
+        if settings is not None:
+            self._write_json(os.path.join(config_dir, "settings.json"),
+                             {'version': '1.0', 'created': now, 'settings': settings})
+
+        profiles_dir = os.path.join(config_dir, "profiles")
+        profile_names = set()
+        for profile_info in self.list_profiles():
+            profile_names.add(profile_info['name'])
+            profile_data = self.load_profile(profile_info['name'])
+            profile_dir = os.path.join(profiles_dir, profile_info['name'])
+            os.makedirs(profile_dir, exist_ok=True)
+            header, body = split_profile(profile_data)
+            self._write_json(os.path.join(profile_dir, PROFILE_BODY_FILE), body)
+            self._write_json(os.path.join(profile_dir, PROFILE_HEADER_FILE), header)
+            legacy_file = os.path.join(profile_dir, LEGACY_PROFILE_FILE)
+            if os.path.exists(legacy_file):
+                os.remove(legacy_file)
+
+        # SQLite使用中に削除・名前変更されたプロファイルの古いフォルダを削除
+        if os.path.isdir(profiles_dir):
+            for entry in os.listdir(profiles_dir):
+                profile_dir = os.path.join(profiles_dir, entry)
+                if entry not in profile_names and (
+                        os.path.exists(os.path.join(profile_dir, PROFILE_HEADER_FILE)) or
+                        os.path.exists(os.path.join(profile_dir, LEGACY_PROFILE_FILE))):
+                    shutil.rmtree(profile_dir)
+
+        self._write_json(os.path.join(config_dir, "current_profile.json"),
+                         {'current_profile': self.get_meta('current_profile'), 'updated': now})
+        return True
+
+    def _read_json(self, path, reader=None):
+        try:
+            if os.path.exists(path):
+                if reader is not None:
+                    return reader(path)
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"JSON読み込みエラー ({path}): {e}")
+        return None
+
+    def _load_json_file(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+class _Transaction:
+    """ロックを保持したまま BEGIN IMMEDIATE ～ COMMIT/ROLLBACK を行うコンテキスト"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __enter__(self):
+        self.backend.lock.acquire()
+        try:
+            self.backend.connection.execute("BEGIN IMMEDIATE")
+        except Exception:
+            # __exit__ は呼ばれないため、ここでロックを解放しないと以降の操作がすべて止まる
+            self.backend.lock.release()
+            raise
+        return self.backend.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.backend.connection.execute("COMMIT")
+            else:
+                self.backend.connection.execute("ROLLBACK")
+        finally:
+            self.backend.lock.release()
+        return False
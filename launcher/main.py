@@ -6,6 +6,7 @@ iconLaunch
 
 import sys
 import os
+import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from version import __version__
 import json
@@ -22,9 +23,16 @@ from ui.group_icon import GroupIcon
 from ui.item_list_window import ItemListWindow
 from ui.settings_window import SettingsWindow
 from ui.profile_window import ProfileWindow
+from ui.group_loader import GroupLoader
+from ui.icon_utils import icon_extractor
+from ui.icon_disk_cache import IconDiskCache
+from ui.icon_loader import icon_loader
+from ui.group_icon_renderer import group_icon_renderer
 from data.data_manager import DataManager
 from data.settings_manager import SettingsManager
 from data.profile_manager import ProfileManager
+from data.save_scheduler import SaveScheduler
+from data.persistence_worker import PersistenceWorker
 from utils.desktop_icon_manager import DesktopIconManager
 
 # Windows API定数
@@ -91,8 +99,51 @@ class LauncherApp(QApplication):
         # settings_managerにprofile_managerへの参照を設定
         self.settings_manager.profile_manager = self.profile_manager
         
+        # 最近使用したプロファイルをメモリ上に保持する件数
+        advanced_settings = self.settings_manager.get_advanced_settings()
+        self.profile_manager.configure_cache(advanced_settings.get('profile_cache_size', 4))
+        self.profile_manager.configure_history(advanced_settings.get('profile_history_size', 10))
+        
+        # 描画済みアイコンのディスクキャッシュ（起動時にシェルからアイコンを取り直さない）
+        icon_extractor.set_disk_cache(IconDiskCache(
+            os.path.join(self.data_manager.config_dir, "cache"),
+            "icons",
+            advanced_settings.get('icon_cache_mb', 32) * 1024 * 1024
+        ))
+        icon_extractor.configure_memory_cache(advanced_settings.get('icon_memory_cache_mb', 16) * 1024 * 1024)
+        group_icon_renderer.set_disk_cache(IconDiskCache(
+            os.path.join(self.data_manager.config_dir, "cache"),
+            "group_icons",
+            self.get_group_icon_cache_bytes(advanced_settings.get('icon_cache_mb', 32))
+        ))
+        
+        # 一定時間アイコンを使わなければメモリ上のアイコンを解放（常駐中のメモリ使用量を抑える）
+        self.icon_cache_idle_minutes = advanced_settings.get('icon_cache_idle_minutes', 10)
+        self.icon_trim_timer = QTimer(self)
+        self.icon_trim_timer.timeout.connect(self.trim_idle_icon_cache)
+        self.icon_trim_timer.start(60 * 1000)
+        
+        # 遅延保存スケジューラ（連続した保存要求を1回の書き込みにまとめる）
+        self.save_scheduler = SaveScheduler(
+            self.write_groups,
+            advanced_settings.get('save_delay_ms', 500),
+            advanced_settings.get('save_max_delay_ms', 3000),
+            self
+        )
+        self.data_manager.save_scheduler = self.save_scheduler
+        
+        # 永続化ワーカー（設定ディレクトリへの書き込みをGUIスレッド外で実行）
+        self.io_worker = PersistenceWorker(self)
+        self.io_worker.write_failed.connect(self.on_persistence_error)
+        self.io_worker.start()
+        self.io_worker.idle_callback = self.data_manager.sync_pending_writes
+        self.data_manager.io_worker = self.io_worker
+        
         # グループアイコン管理
         self.group_icons = []
+        self.saved_revisions = {}  # グループIDごとの保存済みバージョン
+        self.group_loader = None  # 起動時の段階的ローダー
+        self.last_switch_stats = None  # 直前のプロファイル切り替えで再利用・作成・破棄したアイコン数
         self.item_list_windows = {}
         self.settings_window = None
         self.profile_window = None
@@ -110,8 +161,8 @@ class LauncherApp(QApplication):
         # システムトレイ設定
         self.setup_system_tray()
         
-        # 初期グループを読み込み
-        self.load_groups()
+        # 初期グループを段階的に読み込み（イベントループ開始後に順次表示）
+        self.start_group_loading()
         
         # 初期設定を適用
         self.apply_initial_settings()
@@ -212,6 +263,11 @@ class LauncherApp(QApplication):
         about_action.triggered.connect(self.show_about)
         tray_menu.addAction(about_action)
         
+        # アイコンキャッシュ解放アクション
+        trim_icons_action = QAction("アイコンのメモリを解放", self)
+        trim_icons_action.triggered.connect(self.trim_icon_cache)
+        tray_menu.addAction(trim_icons_action)
+        
         tray_menu.addSeparator()
         
         # アイコン表示/非表示アクション
@@ -230,9 +286,67 @@ class LauncherApp(QApplication):
         self.tray_icon.setContextMenu(tray_menu)
         self.tray_icon.show()
         
+    def start_group_loading(self):
+        """保存されたグループを段階的に読み込み（起動時）"""
+        # 読み込み途中の状態が保存されないように書き込みを保留
+        self.save_scheduler.hold()
+        self.group_loader = GroupLoader(self.data_manager.iter_groups(), self.create_group_from_data, parent=self)
+        self.group_loader.fully_loaded.connect(self.on_groups_loaded)
+        self.group_loader.start()
+        
+    def on_groups_loaded(self, count):
+        """段階的読み込みの完了時の処理"""
+        if self.data_manager.config_write_blocked:
+            # 設定ファイルをデコードできない場合は空として扱わず、上書きもしない
+            if not self.notify_config_load_error():
+                return
+                
+        if not self.group_icons:
+            # 初回起動時はデフォルトグループを作成
+            self.create_default_group()
+            
+        # 画面内のグループを先に作成したため、保存時の並び順に戻す
+        order_index = {group_id: index for index, group_id in enumerate(self.group_loader.order)}
+        self.group_icons.sort(key=lambda icon: order_index.get(icon.group_id, len(order_index)))
+        
+        # 読み込んだ時点の状態を保存済みとして記録
+        self.saved_revisions = {icon.group_id: icon.revision for icon in self.group_icons}
+        self.save_scheduler.release()
+        
+    def notify_config_load_error(self):
+        """設定ファイルを読み込めなかったことを通知（続行できなければ終了してFalseを返す）"""
+        error = self.data_manager.load_error
+        if self.group_icons:
+            QMessageBox.warning(
+                None,
+                "設定ファイルを読み込めません",
+                f"グループの設定ファイルを読み込めなかったため、バックアップから読み込みました。\n{error}\n\n"
+                "元のファイルを保護するため、このセッション中のグループの変更は保存されません。\n"
+                "新しいバージョンのアプリ、または必要なライブラリ（msgpack / cbor2）を確認してください。"
+            )
+            return True
+            
+        QMessageBox.critical(
+            None,
+            "設定ファイルを読み込めません",
+            f"グループの設定ファイルを読み込めず、読み込めるバックアップもありません。\n{error}\n\n"
+            "元のファイルを上書きしないよう終了します。\n"
+            "新しいバージョンのアプリ、または必要なライブラリ（msgpack / cbor2）を確認してください。"
+        )
+        self.save_scheduler.release()
+        QTimer.singleShot(0, self.quit_application)
+        return False
+        
+    def cancel_group_loading(self):
+        """段階的読み込みを中止"""
+        if self.group_loader is not None and self.group_loader.is_running():
+            self.group_loader.cancel()
+            self.save_scheduler.release()
+        
     def load_groups(self):
-        """保存されたグループを読み込み"""
-        groups_data = self.data_manager.load_groups()
+        """保存されたグループを読み込み（起動後はグループストアから取得）"""
+        self.cancel_group_loading()
+        groups_data = self.data_manager.get_current_groups()
         
         if not groups_data:
             # 初回起動時はデフォルトグループを作成（名前を指定してダイアログを回避）
@@ -241,6 +355,9 @@ class LauncherApp(QApplication):
             for group_data in groups_data:
                 self.create_group_from_data(group_data)
                 
+        # 読み込んだ時点の状態を保存済みとして記録
+        self.saved_revisions = {icon.group_id: icon.revision for icon in self.group_icons}
+                
     def create_new_group(self, name=None, position=None):
         """新しいグループアイコンを作成"""
         # 名前が指定されていない場合は入力ダイアログを表示
@@ -306,7 +423,8 @@ class LauncherApp(QApplication):
             group_data['name'], 
             QPoint(group_data['x'], group_data['y']),
             self.settings_manager,
-            self
+            self,
+            group_id=group_data.get('id')
         )
         # アイテムデータを読み込み、チェック状態がないものはデフォルトでTrue
         items = group_data.get('items', [])
@@ -331,6 +449,8 @@ class LauncherApp(QApplication):
         
         group_icon.show()
         
+        return group_icon
+        
     def create_default_group(self):
         """初回起動時のデフォルトグループを作成"""
         # デフォルトグループのデータを作成
@@ -479,19 +599,66 @@ class LauncherApp(QApplication):
         window.move(final_x, final_y)
         
     def save_groups(self):
-        """グループデータを保存"""
-        groups_data = []
+        """グループデータの保存を要求（遅延書き込み）"""
+        self.save_scheduler.request_save()
+        
+    def write_groups(self):
+        """グループデータを実際に書き込み（前回保存から変更されたグループのみ）"""
+        order = []
+        changed_groups = {}
         for group_icon in self.group_icons:
-            group_data = {
-                'name': group_icon.name,
-                'x': group_icon.x(),
-                'y': group_icon.y(),
-                'items': group_icon.items,
-                'custom_icon_path': group_icon.custom_icon_path
-            }
-            groups_data.append(group_data)
-            
-        self.data_manager.save_groups(groups_data)
+            group_id = group_icon.group_id
+            order.append(group_id)
+            if (self.saved_revisions.get(group_id) != group_icon.revision or
+                    not self.data_manager.group_store.contains(group_id)):
+                changed_groups[group_id] = group_icon.to_data()
+                
+        if not changed_groups and order == self.data_manager.group_store.get_order():
+            return True
+            
+        result = self.data_manager.save_group_changes(order, changed_groups)
+        if result:
+            self.saved_revisions = {icon.group_id: icon.revision for icon in self.group_icons}
+        return result
+        
+    @staticmethod
+    def get_group_icon_cache_bytes(icon_cache_mb):
+        """グループアイコンのディスクキャッシュの上限（グループは数が少ないためアイコンキャッシュの上限の1/4）"""
+        return icon_cache_mb * 1024 * 1024 // 4
+        
+    def trim_icon_cache(self):
+        """メモリ上のアイコンを解放（トレイメニューから）"""
+        freed = icon_extractor.trim_memory_cache() + group_icon_renderer.trim_memory_cache()
+        print(f"アイコンキャッシュ解放: {freed // 1024} KB, {icon_extractor.get_cache_stats()['memory']}")
+        self.tray_icon.showMessage(
+            "アイコンのメモリを解放",
+            f"{freed / (1024 * 1024):.1f} MB を解放しました",
+            QSystemTrayIcon.MessageIcon.Information,
+            2000
+        )
+        
+    def trim_idle_icon_cache(self):
+        """一定時間アイコンが使われていなければメモリ上のアイコンを解放"""
+        if self.icon_cache_idle_minutes <= 0:
+            return
+        freed = 0
+        for cache, trim in ((icon_extractor.icon_cache, icon_extractor.trim_memory_cache),
+                            (group_icon_renderer.memory_cache, group_icon_renderer.trim_memory_cache)):
+            if cache.total_bytes and cache.get_idle_seconds() >= self.icon_cache_idle_minutes * 60:
+                freed += trim()
+        if freed:
+            print(f"アイコンキャッシュ解放（アイドル）: {freed // 1024} KB")
+        
+    def on_persistence_error(self, path, message):
+        """バックグラウンド書き込み失敗時の処理"""
+        print(f"保存エラー: {path}: {message}")
+        if hasattr(self, 'tray_icon'):
+            self.tray_icon.showMessage(
+                "保存エラー",
+                f"{os.path.basename(path)} の保存に失敗しました",
+                QSystemTrayIcon.MessageIcon.Warning,
+                3000
+            )
         
     def remove_group(self, group_icon):
         """グループを削除"""
@@ -534,6 +701,25 @@ class LauncherApp(QApplication):
             # 動作設定を適用
             behavior = settings.get('behavior', {})
             
+            # 保存の集約時間を適用
+            advanced = settings.get('advanced', {})
+            if 'save_delay_ms' in advanced:
+                self.save_scheduler.set_delay(
+                    advanced['save_delay_ms'],
+                    advanced.get('save_max_delay_ms')
+                )
+            if 'profile_cache_size' in advanced:
+                self.profile_manager.configure_cache(advanced['profile_cache_size'])
+            if 'profile_history_size' in advanced:
+                self.profile_manager.configure_history(advanced['profile_history_size'])
+            if 'icon_cache_mb' in advanced:
+                icon_extractor.disk_cache.configure(advanced['icon_cache_mb'] * 1024 * 1024)
+                group_icon_renderer.disk_cache.configure(self.get_group_icon_cache_bytes(advanced['icon_cache_mb']))
+            if 'icon_memory_cache_mb' in advanced:
+                icon_extractor.configure_memory_cache(advanced['icon_memory_cache_mb'] * 1024 * 1024)
+            if 'icon_cache_idle_minutes' in advanced:
+                self.icon_cache_idle_minutes = advanced['icon_cache_idle_minutes']
+            
             # ホットキー設定を適用
             hotkey = settings.get('hotkey', {})
             if hotkey:
@@ -616,6 +802,21 @@ class LauncherApp(QApplication):
         
     def quit_application(self):
         """アプリケーションを終了"""
+        # 読み込み途中の場合は中止（保留中の書き込みは行わない）
+        if self.group_loader is not None and self.group_loader.is_running():
+            self.group_loader.cancel()
+            
+        # 遅延中の保存を書き込み、バックグラウンドの書き込み完了を待つ
+        self.save_scheduler.flush()
+        print(f"保存メトリクス: {self.save_scheduler.get_metrics()}")
+        self.io_worker.stop()
+        icon_loader.shutdown()
+        icon_extractor.disk_cache.flush()
+        group_icon_renderer.disk_cache.flush()
+        print(f"アイコンキャッシュ: {icon_extractor.get_cache_stats()}")
+        print(f"グループアイコンキャッシュ: {group_icon_renderer.get_cache_stats()}")
+        self.data_manager.close_storage()
+        
         # ホットキーの登録を解除
         self.unregister_hotkey()
         self.unregister_always_on_top_hotkey()
@@ -651,6 +852,14 @@ class LauncherApp(QApplication):
             
             print("アプリケーションを再起動中...")
             
+            # 遅延中の保存を書き込み、バックグラウンドの書き込み完了を待つ
+            self.save_scheduler.flush()
+            self.io_worker.stop()
+            icon_loader.shutdown()
+            icon_extractor.disk_cache.flush()
+            group_icon_renderer.disk_cache.flush()
+            self.data_manager.close_storage()
+            
             # ホットキーの登録を解除
             self.unregister_hotkey()
             self.unregister_always_on_top_hotkey()
@@ -879,32 +1088,82 @@ class LauncherApp(QApplication):
             QMessageBox.critical(None, "エラー", f"プロファイル管理ウィンドウの表示中にエラーが発生しました:\n{str(e)}")
             
     def on_profile_switched(self, profile_name):
-        """プロファイル切り替え時の処理"""
+        """プロファイル切り替え時の処理（既存のアイコンを再利用して差分のみ反映）"""
         try:
             print(f"プロファイル切り替え: {profile_name}")
             
-            # 既存のグループアイコンを全て削除
-            for group_icon in self.group_icons[:]:  # コピーを作成してイテレート
-                group_icon.close()
-                if group_icon in self.item_list_windows:
-                    self.item_list_windows[group_icon].close()
-                    del self.item_list_windows[group_icon]
-            
-            self.group_icons.clear()
+            self.cancel_group_loading()
+            groups_data = self.data_manager.get_current_groups()
+            self.last_switch_stats = self.reconcile_groups(groups_data)
             
-            # 新しいプロファイルのグループを読み込み
-            self.load_groups()
-            
-            # 外観設定を再適用
-            self.apply_initial_settings()
+            if not self.group_icons:
+                # 空のプロファイルの場合はデフォルトグループを作成
+                self.create_default_group()
+                self.last_switch_stats['created'] += 1
+                
+            # 切り替え後の状態を保存済みとして記録
+            self.saved_revisions = {icon.group_id: icon.revision for icon in self.group_icons}
             
-            print(f"プロファイル切り替え完了: {profile_name}")
+            stats = self.last_switch_stats
+            print(f"プロファイル切り替え完了: {profile_name} "
+                  f"(再利用 {stats['reused']} / 作成 {stats['created']} / 破棄 {stats['destroyed']})")
             
         except Exception as e:
             print(f"プロファイル切り替え処理エラー: {e}")
             import traceback
             traceback.print_exc()
             
+    def reconcile_groups(self, groups_data):
+        """表示中のアイコンをグループデータに合わせる（IDで対応付け、なければ名前で対応付け）
+        
+        対応するアイコンは位置・アイテム・アイコンをその場で更新し、
+        新しいグループのみ作成、なくなったグループのみ破棄する。
+        """
+        stats = {'reused': 0, 'created': 0, 'destroyed': 0}
+        unmatched = {icon.group_id: icon for icon in self.group_icons}
+        
+        # IDが一致するアイコンを対応付け
+        matches = {}
+        for index, group_data in enumerate(groups_data):
+            group_icon = unmatched.pop(group_data.get('id'), None)
+            if group_icon is not None:
+                matches[index] = group_icon
+                
+        # IDが一致しないものは同じ名前のアイコンを対応付け（別プロファイルで作成された同名グループ）
+        unmatched_by_name = {}
+        for group_icon in unmatched.values():
+            unmatched_by_name.setdefault(group_icon.name, []).append(group_icon)
+        for index, group_data in enumerate(groups_data):
+            if index not in matches and unmatched_by_name.get(group_data.get('name')):
+                group_icon = unmatched_by_name[group_data['name']].pop(0)
+                del unmatched[group_icon.group_id]
+                matches[index] = group_icon
+                
+        # なくなったグループのアイコンを破棄
+        for group_icon in unmatched.values():
+            if group_icon in self.item_list_windows:
+                self.item_list_windows[group_icon].close()
+                del self.item_list_windows[group_icon]
+            group_icon.close()
+            stats['destroyed'] += 1
+            
+        # 既存アイコンの更新と新しいアイコンの作成（保存データの並び順で並べ直す）
+        self.group_icons = []
+        for index, group_data in enumerate(groups_data):
+            group_icon = matches.get(index)
+            if group_icon is None:
+                self.create_group_from_data(group_data)
+                stats['created'] += 1
+                continue
+                
+            items_changed = group_icon.apply_data(group_data)
+            if items_changed and group_icon in self.item_list_windows:
+                self.item_list_windows[group_icon].refresh_items()
+            self.group_icons.append(group_icon)
+            stats['reused'] += 1
+            
+        return stats
+        
     def switch_profile_by_hotkey(self, hotkey_id):
         """ホットキーによるプロファイル切り替え"""
         try:
@@ -929,12 +1188,15 @@ class LauncherApp(QApplication):
                 return
                 
             print(f"ホットキーでプロファイル切り替え: {hotkey_string} -> {profile_name}")
+            started_time = time.perf_counter()
             
             # プロファイルを切り替え
             success, message = self.profile_manager.switch_to_profile(profile_name)
             
             if success:
                 self.on_profile_switched(profile_name)
+                elapsed_ms = (time.perf_counter() - started_time) * 1000
+                print(f"ホットキー切り替え時間: {elapsed_ms:.1f} ms")
                 # システムトレイ通知を無効化
                 # if hasattr(self, 'tray_icon'):
                 #     self.tray_icon.showMessage(
@@ -971,18 +1233,17 @@ class LauncherApp(QApplication):
             registered_count = 0
             failed_profiles = []
             
-            # 各プロファイルに保存されたホットキー情報を使用
+            # 各プロファイルに保存されたホットキー情報を使用（一覧に含まれるため個別に読み込まない）
             for profile in profiles:
-                profile_info = self.profile_manager.get_profile_info(profile['name'])
-                if not profile_info or not profile_info.get('hotkey'):
+                if not profile or not profile.get('hotkey'):
                     print(f"プロファイル '{profile['name']}' にはホットキーが設定されていません")
                     continue
                 else:
                     # ホットキー情報がある場合のみ詳細ログ
-                    hotkey_data = profile_info.get('hotkey', {})
+                    hotkey_data = profile.get('hotkey', {})
                     print(f"プロファイル '{profile['name']}' のホットキー: {hotkey_data.get('hotkey_string', 'N/A')}")
                     
-                hotkey_info = profile_info['hotkey']
+                hotkey_info = profile['hotkey']
                 if not hotkey_info or 'hotkey_string' not in hotkey_info:
                     print(f"プロファイル '{profile['name']}' のホットキー情報が無効です")
                     continue
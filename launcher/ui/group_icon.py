@@ -4,13 +4,14 @@ GroupIcon - デスクトップに表示されるグループアイコンウィ
 
 import os
 import time
+import uuid
 from PyQt6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QApplication, 
                             QMenu, QInputDialog, QMessageBox, QDialog)
 from PyQt6.QtCore import Qt, QPoint, pyqtSignal, QMimeData, QUrl, QTimer
-from PyQt6.QtGui import (QPainter, QBrush, QColor, QPen, QFont, 
-                        QPixmap, QIcon, QAction, QDrag, QRegion)
-from PyQt6.QtSvg import QSvgRenderer
+from PyQt6.QtGui import (QBrush, QPen, QFont, 
+                        QPixmap, QIcon, QAction, QDrag)
 from utils.shortcut_resolver import resolve_shortcut, get_display_name
+from ui.group_icon_renderer import group_icon_renderer, MASK_CIRCLE
 
 
 class GroupIcon(QWidget):
@@ -22,10 +23,12 @@ class GroupIcon(QWidget):
     position_changed = pyqtSignal()  # 位置変更時
     items_changed = pyqtSignal()  # アイテム変更時
     
-    def __init__(self, name="Group", position=QPoint(100, 100), settings_manager=None, main_app=None):
+    def __init__(self, name="Group", position=QPoint(100, 100), settings_manager=None, main_app=None, group_id=None):
         super().__init__()
         
         self.name = name
+        self.group_id = group_id or uuid.uuid4().hex  # 保存データ上の安定したID
+        self.revision = 0  # 変更のたびに増えるバージョン（差分保存用）
         self.items = []  # 登録されたアイテムのリスト
         self.drag_start_position = None
         self.is_dragging = False  # ドラッグ中かどうかを追跡
@@ -50,6 +53,62 @@ class GroupIcon(QWidget):
         # 位置設定
         self.move(position)
         
+        # 位置・アイテムの変更でバージョンを更新
+        self.position_changed.connect(self.mark_changed)
+        self.items_changed.connect(self.mark_changed)
+        
+    def mark_changed(self):
+        """グループの内容が変更されたことを記録"""
+        self.revision += 1
+        
+    def moveEvent(self, event):
+        """移動イベント（整列などシグナルを伴わない移動も変更として記録）"""
+        super().moveEvent(event)
+        self.mark_changed()
+        
+    def to_data(self):
+        """保存用のグループデータを作成"""
+        return {
+            'id': self.group_id,
+            'name': self.name,
+            'x': self.x(),
+            'y': self.y(),
+            'items': self.items,
+            'custom_icon_path': self.custom_icon_path
+        }
+        
+    def apply_data(self, group_data):
+        """保存用のグループデータを既存のウィジェットに反映（変更された部分のみ更新）
+        
+        戻り値はアイテムが変更されたかどうか（リストウィンドウの再描画判定用）
+        """
+        if group_data.get('id'):
+            self.group_id = group_data['id']
+        
+        position = QPoint(group_data.get('x', 0), group_data.get('y', 0))
+        if self.pos() != position:
+            self.move(position)
+        
+        items = group_data.get('items', [])
+        for item in items:
+            if 'checked' not in item:
+                item['checked'] = True
+        items_changed = items != self.items
+        if items_changed:
+            self.items = items
+        
+        name = group_data.get('name', self.name)
+        custom_icon_path = group_data.get('custom_icon_path', None)
+        if name != self.name or custom_icon_path != self.custom_icon_path:
+            self.name = name
+            self.custom_icon_path = custom_icon_path
+            self.update_display()
+        elif items_changed and not self.custom_icon_path:
+            # アイテム数の表示のみ更新
+            self.update_display()
+        
+        return items_changed
+        
     def setup_ui(self):
         """UI設定"""
         self.setFixedSize(80, 80)
@@ -225,58 +284,17 @@ class GroupIcon(QWidget):
                 self.display_item_count()
                 return
             
-            # SVGファイルかどうかを判定
-            is_svg = resolved_path.lower().endswith('.svg')
-            write_debug_log(f"display_custom_icon: is_svg = {is_svg}")
-            
-            if is_svg:
-                # SVGファイルの場合はQSvgRendererを使用
-                svg_renderer = QSvgRenderer(resolved_path)
-                if svg_renderer.isValid():
-                    write_debug_log(f"display_custom_icon: SVGファイル読み込み成功")
-                    # アイコンサイズに合わせてピクスマップを作成
-                    icon_size = self.icon_label.width()
-                    target_size = icon_size - 4
-                    
-                    pixmap = QPixmap(target_size, target_size)
-                    pixmap.fill(Qt.GlobalColor.transparent)
-                    
-                    painter = QPainter(pixmap)
-                    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-                    svg_renderer.render(painter)
-                    painter.end()
-                    
-                    # SVGを円形にマスク
-                    write_debug_log(f"display_custom_icon: SVGピクスマップに円形マスクを適用")
-                    circular_pixmap = self.create_circular_pixmap(pixmap, target_size)
-                    self.icon_label.setPixmap(circular_pixmap)
-                    write_debug_log(f"display_custom_icon: SVGピクスマップを設定完了")
-                else:
-                    write_debug_log(f"display_custom_icon: SVGファイル読み込み失敗")
-                    self.display_item_count()
-                    return
-            else:
-                # 通常の画像ファイル
-                pixmap = QPixmap(resolved_path)
-                write_debug_log(f"display_custom_icon: pixmap.isNull() = {pixmap.isNull()}")
-                if not pixmap.isNull():
-                    write_debug_log(f"display_custom_icon: アイコン読み込み成功、表示中...")
-                    # アイコンサイズに合わせてスケール
-                    icon_size = self.icon_label.width()
-                    target_size = icon_size - 4
-                    scaled_pixmap = pixmap.scaled(target_size, target_size, 
-                                                Qt.AspectRatioMode.KeepAspectRatio,
-                                                Qt.TransformationMode.SmoothTransformation)
-                    
-                    # 円形にマスクされたピクスマップを作成
-                    circular_pixmap = self.create_circular_pixmap(scaled_pixmap, target_size)
-                    self.icon_label.setPixmap(circular_pixmap)
-                    write_debug_log(f"display_custom_icon: ピクスマップを設定完了")
-                else:
-                    # 読み込み失敗時はアイテム数表示にフォールバック
-                    write_debug_log(f"display_custom_icon: 画像ファイル読み込み失敗")
-                    self.display_item_count()
-                    return
+            # 読み込み・縮小・円形マスクの結果はキャッシュを使用（同じアイコンのグループで共有）
+            target_size = self.icon_label.width() - 4
+            circular_pixmap = group_icon_renderer.get_pixmap(
+                resolved_path, target_size, self.devicePixelRatioF(), MASK_CIRCLE)
+            if circular_pixmap is None:
+                # 読み込み失敗時はアイテム数表示にフォールバック
+                write_debug_log(f"display_custom_icon: 画像ファイル読み込み失敗")
+                self.display_item_count()
+                return
+            self.icon_label.setPixmap(circular_pixmap)
+            write_debug_log(f"display_custom_icon: ピクスマップを設定完了")
                     
             # 背景スタイルを設定（アイコン用）
             icon_size = self.icon_label.width()
@@ -303,36 +321,6 @@ class GroupIcon(QWidget):
             write_debug_log(f"display_custom_icon: エラー = {e}")
             self.display_item_count()
             
-    def create_circular_pixmap(self, source_pixmap, size):
-        """ピクスマップを円形にマスクする"""
-        from ui.icon_selector_dialog import write_debug_log
-        
-        write_debug_log(f"create_circular_pixmap: source_pixmap.isNull() = {source_pixmap.isNull()}")
-        write_debug_log(f"create_circular_pixmap: size = {size}")
-        write_debug_log(f"create_circular_pixmap: source_pixmap size = {source_pixmap.width()}x{source_pixmap.height()}")
-        
-        # 正方形のピクスマップを作成
-        circular_pixmap = QPixmap(size, size)
-        circular_pixmap.fill(QColor(0, 0, 0, 0))  # 透明で初期化
-        
-        painter = QPainter(circular_pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 円形の描画領域を設定
-        region = QRegion(0, 0, size, size, QRegion.RegionType.Ellipse)
-        painter.setClipRegion(region)
-        
-        # 画像を中央に描画
-        x = (size - source_pixmap.width()) // 2
-        y = (size - source_pixmap.height()) // 2
-        write_debug_log(f"create_circular_pixmap: 描画位置 = ({x}, {y})")
-        painter.drawPixmap(x, y, source_pixmap)
-        
-        painter.end()
-        
-        write_debug_log(f"create_circular_pixmap: 完成したピクスマップ.isNull() = {circular_pixmap.isNull()}")
-        return circular_pixmap
-            
     def display_item_count(self):
         """アイテム数を表示（カスタムアイコンがない場合のみ）"""
         # カスタムアイコンがある場合は何もしない
@@ -0,0 +1,144 @@
+"""
+GroupIconRenderer - グループのカスタムアイコンの描画結果をキャッシュするレンダラー
+"""
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPainter, QPixmap, QColor, QRegion
+from PyQt6.QtSvg import QSvgRenderer
+from ui.icon_disk_cache import IconDiskCache
+from ui.icon_memory_cache import IconMemoryCache
+from ui.icon_utils import image_to_png
+
+
+MASK_CIRCLE = "circle"  # 円形にマスク
+
+
+class GroupIconRenderer:
+    """グループアイコンのレンダラークラス
+
+    画像の読み込み（SVGはQSvgRendererで描画）・縮小・円形マスクを行った結果を
+    (パス, 更新時刻, サイズ, 表示サイズ, デバイスピクセル比, マスク) をキーに保持し、
+    同じアイコンを使うグループ間で共有する。ディスクキャッシュを設定すると
+    再起動後も描画し直さない。GUIスレッドからのみ使用する。
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.memory_cache = IconMemoryCache(max_bytes)
+        self.disk_cache = None  # IconDiskCache（LauncherAppから設定）
+        self.render_count = 0
+
+    def set_disk_cache(self, disk_cache):
+        """ディスクキャッシュを設定（Noneで無効）"""
+        self.disk_cache = disk_cache
+
+    def get_pixmap(self, resolved_path, size, device_pixel_ratio=1.0, mask=MASK_CIRCLE):
+        """描画済みのアイコンを取得（読み込めなければNone）"""
+        signature = IconDiskCache.get_source_signature(resolved_path)
+        if signature is None:
+            return None
+
+        cache_key = IconDiskCache.make_key(resolved_path, signature, size, device_pixel_ratio, mask)
+        pixmap = self.memory_cache.get(cache_key)
+        if pixmap is not None:
+            return pixmap
+
+        pixmap = self._load_cached_pixmap(resolved_path, size, device_pixel_ratio, mask)
+        if pixmap is None:
+            pixmap = self.render(resolved_path, size, device_pixel_ratio, mask)
+            if pixmap is None:
+                return None
+            if self.disk_cache is not None:
+                data = image_to_png(pixmap)
+                if data is not None:
+                    self.disk_cache.put(resolved_path, size, device_pixel_ratio, data, mask)
+
+        pixel_size = round(size * device_pixel_ratio)
+        self.memory_cache.put(cache_key, pixmap, pixel_size * pixel_size * 4)
+        return pixmap
+
+    def render(self, resolved_path, size, device_pixel_ratio=1.0, mask=MASK_CIRCLE):
+        """画像を読み込んで表示サイズに描画（読み込めなければNone）"""
+        self.render_count += 1
+        pixel_size = round(size * device_pixel_ratio)
+
+        if resolved_path.lower().endswith('.svg'):
+            # SVGファイルの場合はQSvgRendererを使用
+            svg_renderer = QSvgRenderer(resolved_path)
+            if not svg_renderer.isValid():
+                return None
+            pixmap = QPixmap(pixel_size, pixel_size)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            svg_renderer.render(painter)
+            painter.end()
+        else:
+            # 通常の画像ファイル
+            pixmap = QPixmap(resolved_path)
+            if pixmap.isNull():
+                return None
+            pixmap = pixmap.scaled(pixel_size, pixel_size,
+                                   Qt.AspectRatioMode.KeepAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+
+        if mask == MASK_CIRCLE:
+            pixmap = self.create_circular_pixmap(pixmap, pixel_size)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+    @staticmethod
+    def create_circular_pixmap(source_pixmap, size):
+        """ピクスマップを円形にマスクする"""
+        # 正方形のピクスマップを作成
+        circular_pixmap = QPixmap(size, size)
+        circular_pixmap.fill(QColor(0, 0, 0, 0))  # 透明で初期化
+
+        painter = QPainter(circular_pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # 円形の描画領域を設定
+        region = QRegion(0, 0, size, size, QRegion.RegionType.Ellipse)
+        painter.setClipRegion(region)
+
+        # 画像を中央に描画
+        x = (size - source_pixmap.width()) // 2
+        y = (size - source_pixmap.height()) // 2
+        painter.drawPixmap(x, y, source_pixmap)
+
+        painter.end()
+        return circular_pixmap
+
+    def _load_cached_pixmap(self, resolved_path, size, device_pixel_ratio, mask):
+        """ディスクキャッシュから描画済みのアイコンを読み込み（なければNone）"""
+        if self.disk_cache is None:
+            return None
+        data = self.disk_cache.get(resolved_path, size, device_pixel_ratio, mask)
+        if data is None:
+            return None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data, "PNG"):
+            return None
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+    def clear_cache(self):
+        """メモリ上の描画結果をクリア"""
+        self.memory_cache.clear()
+
+    def trim_memory_cache(self, target_bytes=0):
+        """メモリ上の描画結果を縮小して解放したバイト数を返す（ディスクキャッシュから再読み込みできる）"""
+        freed = self.memory_cache.trim(target_bytes)
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+        return freed
+
+    def get_cache_stats(self):
+        """描画回数とメモリ・ディスクキャッシュの統計を取得"""
+        stats = {'renders': self.render_count, 'memory': self.memory_cache.get_stats()}
+        if self.disk_cache is not None:
+            stats['disk'] = self.disk_cache.get_stats()
+        return stats
+
+
+# グローバルグループアイコンレンダラーインスタンス
+group_icon_renderer = GroupIconRenderer()
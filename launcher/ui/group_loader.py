@@ -0,0 +1,107 @@
+"""
+GroupLoader - グループアイコンをイベントループの合間に段階的に作成するローダー
+"""
+
+import time
+from PyQt6.QtCore import QObject, QTimer, QPoint, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+
+class GroupLoader(QObject):
+    """段階的グループローダークラス
+
+    グループデータを1件ずつ取り出し、1回のタイマー処理につき time_budget_ms の範囲で
+    アイコンを作成する。画面内に位置するグループを先に作成し、画面外のものは
+    すべて読み終えてから作成する。
+    """
+
+    group_created = pyqtSignal(object)  # アイコン作成時（GroupIcon）
+    fully_loaded = pyqtSignal(int)  # すべてのアイコン作成完了時（作成数）
+
+    def __init__(self, groups_iter, create_callback, time_budget_ms=8, parent=None):
+        super().__init__(parent)
+        self.groups_iter = iter(groups_iter)
+        self.create_callback = create_callback  # グループデータからアイコンを作成して返す
+        self.time_budget = time_budget_ms / 1000.0
+        self.deferred = []  # 画面外のため後回しにしたグループ
+        self.order = []  # 読み込んだ順のグループID（保存時の並び順）
+        self.created_count = 0
+        self.exhausted = False
+        self.running = False
+        self.started_time = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.process_batch)
+
+    def start(self):
+        """読み込みを開始"""
+        self.running = True
+        self.started_time = time.perf_counter()
+        self.timer.start(0)
+
+    def cancel(self):
+        """読み込みを中止"""
+        self.running = False
+        self.timer.stop()
+
+    def is_running(self):
+        """読み込み中かチェック"""
+        return self.running
+
+    def process_batch(self):
+        """時間の予算内でグループを読み込み・作成"""
+        if not self.running:
+            return
+
+        deadline = time.perf_counter() + self.time_budget
+        while time.perf_counter() < deadline:
+            if not self.exhausted:
+                try:
+                    group_data = next(self.groups_iter)
+                except StopIteration:
+                    self.exhausted = True
+                    continue
+                except Exception as e:
+                    print(f"グループ読み込みエラー: {e}")
+                    self.exhausted = True
+                    continue
+
+                self.order.append(group_data.get('id'))
+                if self.is_on_screen(group_data):
+                    self.create_group(group_data)
+                else:
+                    self.deferred.append(group_data)
+
+            elif self.deferred:
+                self.create_group(self.deferred.pop(0))
+
+            else:
+                self.finish()
+                return
+
+        self.timer.start(0)
+
+    def create_group(self, group_data):
+        """アイコンを作成して通知"""
+        try:
+            group_icon = self.create_callback(group_data)
+            self.created_count += 1
+            self.group_created.emit(group_icon)
+        except Exception as e:
+            print(f"グループ作成エラー ({group_data.get('name')}): {e}")
+
+    def finish(self):
+        """読み込み完了"""
+        self.running = False
+        elapsed_ms = (time.perf_counter() - self.started_time) * 1000
+        print(f"グループの段階的読み込み完了: {self.created_count} 件 ({elapsed_ms:.0f} ms)")
+        self.fully_loaded.emit(self.created_count)
+
+    def is_on_screen(self, group_data):
+        """グループの位置がいずれかの画面内にあるかチェック"""
+        position = QPoint(int(group_data.get('x', 0)), int(group_data.get('y', 0)))
+        for screen in QApplication.screens():
+            if screen.availableGeometry().contains(position):
+                return True
+        return False
@@ -0,0 +1,262 @@
+"""
+IconDiskCache - 描画済みアイコンをディスクに保持するキャッシュ
+"""
+
+import os
+import json
+import threading
+
+
+class IconDiskCache:
+    """アイコンのディスクキャッシュクラス
+
+    PNGのバイト列を <name>.pack に追記し、位置と長さを <name>.idx に記録する。
+    キーは (元ファイルのパス, 更新時刻, サイズ, ピクセルサイズ, デバイスピクセル比, 描画の種類) で、
+    元ファイルが変更されるとそのファイルのエントリーはすべて無効になる。
+    インデックスは最初の参照時に読み込み、パックが上限を超えたら最近使用したものだけを残して詰め直す。
+    Qtに依存せずバイト列のみを扱うため、アイコン以外の描画結果のキャッシュにも使える。
+    """
+
+    INDEX_VERSION = 2
+    SAVE_INTERVAL = 64  # この回数の追加ごとにインデックスを保存
+
+    def __init__(self, cache_dir, name="icons", max_bytes=32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.pack_file = os.path.join(cache_dir, f"{name}.pack")
+        self.index_file = os.path.join(cache_dir, f"{name}.idx")
+        self.max_bytes = max_bytes
+        self.entries = None  # {キー: [位置, 長さ, 最終使用]}（未読み込みはNone）
+        self.sources = {}  # {元ファイルのパス: [更新時刻, サイズ]}
+        self.pack_size = 0
+        self.use_counter = 0
+        self.unsaved_count = 0
+        self.lock = threading.Lock()
+
+        # 統計
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.compactions = 0
+
+    def configure(self, max_bytes):
+        """パックの上限サイズを変更"""
+        with self.lock:
+            self.max_bytes = max(0, int(max_bytes))
+            if self.entries is not None and self.pack_size > self.max_bytes:
+                self._compact()
+
+    @staticmethod
+    def get_source_signature(source_path):
+        """元ファイルの更新時刻とサイズを取得（存在しなければNone）"""
+        try:
+            stat = os.stat(source_path)
+        except (OSError, ValueError):
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @staticmethod
+    def make_key(source_path, signature, pixel_size, device_pixel_ratio, variant=""):
+        """キャッシュのキーを作成（variantはマスクなど同じ元ファイルからの描画の種類）"""
+        return f"{source_path}|{signature[0]}|{signature[1]}|{pixel_size}|{device_pixel_ratio:g}|{variant}"
+
+    def get(self, source_path, pixel_size, device_pixel_ratio=1.0, variant=""):
+        """キャッシュ済みのPNGを取得（なければNone）"""
+        signature = self.get_source_signature(source_path)
+        if signature is None:
+            return None
+
+        with self.lock:
+            self._ensure_loaded()
+            self._check_source(source_path, signature)
+            entry = self.entries.get(self.make_key(source_path, signature, pixel_size, device_pixel_ratio, variant))
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data = self._read_blob(entry[0], entry[1])
+            if data is None:
+                # パックが破損・切り詰められている場合はエントリーを捨てる
+                self._remove_source(source_path)
+                self.misses += 1
+                return None
+
+            self.use_counter += 1
+            entry[2] = self.use_counter
+            self.hits += 1
+            return data
+
+    def put(self, source_path, pixel_size, device_pixel_ratio, data, variant=""):
+        """PNGをキャッシュに追加"""
+        signature = self.get_source_signature(source_path)
+        if signature is None or not data or self.max_bytes <= 0:
+            return False
+
+        with self.lock:
+            self._ensure_loaded()
+            self._check_source(source_path, signature)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self.pack_file, 'ab') as f:
+                    offset = f.tell()
+                    f.write(data)
+            except OSError as e:
+                print(f"アイコンキャッシュ書き込みエラー: {e}")
+                return False
+
+            self.use_counter += 1
+            key = self.make_key(source_path, signature, pixel_size, device_pixel_ratio, variant)
+            self.entries[key] = [offset, len(data), self.use_counter]
+            self.sources[source_path] = signature
+            self.pack_size = offset + len(data)
+
+            if self.pack_size > self.max_bytes:
+                self._compact()
+            else:
+                self.unsaved_count += 1
+                if self.unsaved_count >= self.SAVE_INTERVAL:
+                    self._save_index()
+            return True
+
+    def flush(self):
+        """未保存のインデックスを保存"""
+        with self.lock:
+            if self.entries is not None and self.unsaved_count:
+                self._save_index()
+
+    def clear(self):
+        """キャッシュファイルを削除"""
+        with self.lock:
+            for path in (self.pack_file, self.index_file):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    print(f"アイコンキャッシュ削除エラー: {e}")
+            self.entries = {}
+            self.sources = {}
+            self.pack_size = 0
+            self.unsaved_count = 0
+
+    def get_stats(self):
+        """ヒット数・ミス数・エントリー数・パックのサイズを取得"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations,
+                'compactions': self.compactions,
+                'entries': len(self.entries) if self.entries is not None else 0,
+                'bytes': self.pack_size,
+                'max_bytes': self.max_bytes
+            }
+
+    def _ensure_loaded(self):
+        """インデックスを読み込み（初回のみ）"""
+        if self.entries is not None:
+            return
+
+        self.entries = {}
+        self.sources = {}
+        try:
+            if os.path.exists(self.index_file) and os.path.exists(self.pack_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict) and data.get('version') == self.INDEX_VERSION:
+                    self.pack_size = os.path.getsize(self.pack_file)
+                    # パックの範囲外を指すエントリーは読み込まない
+                    self.entries = {key: entry for key, entry in data.get('entries', {}).items()
+                                    if entry[0] + entry[1] <= self.pack_size}
+                    self.sources = data.get('sources', {})
+                    self.use_counter = max((entry[2] for entry in self.entries.values()), default=0)
+                    return
+        except Exception as e:
+            print(f"アイコンキャッシュのインデックス読み込みエラー: {e}")
+            self.entries = {}
+            self.sources = {}
+
+        # インデックスがない・読めない場合はパックも作り直す
+        self.pack_size = 0
+        try:
+            if os.path.exists(self.pack_file):
+                os.remove(self.pack_file)
+        except OSError as e:
+            print(f"アイコンキャッシュ削除エラー: {e}")
+
+    def _check_source(self, source_path, signature):
+        """元ファイルが変更されていればそのファイルのエントリーを無効にする"""
+        recorded = self.sources.get(source_path)
+        if recorded is not None and list(recorded) != signature:
+            self._remove_source(source_path)
+            self.invalidations += 1
+
+    def _remove_source(self, source_path):
+        """元ファイルのエントリーをすべて削除（パック上のデータは次の詰め直しで消える）"""
+        prefix = f"{source_path}|"
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+        self.sources.pop(source_path, None)
+        self.unsaved_count += 1
+
+    def _read_blob(self, offset, length):
+        """パックからバイト列を読み込み"""
+        try:
+            with open(self.pack_file, 'rb') as f:
+                f.seek(offset)
+                data = f.read(length)
+            return data if len(data) == length else None
+        except OSError:
+            return None
+
+    def _compact(self):
+        """最近使用したエントリーを上限の3/4まで残してパックを詰め直す"""
+        budget = self.max_bytes * 3 // 4
+        kept = {}
+        used_bytes = 0
+        temp_file = f"{self.pack_file}.tmp"
+        try:
+            with open(self.pack_file, 'rb') as src, open(temp_file, 'wb') as dst:
+                for key, entry in sorted(self.entries.items(), key=lambda item: item[1][2], reverse=True):
+                    if used_bytes + entry[1] > budget:
+                        continue
+                    src.seek(entry[0])
+                    data = src.read(entry[1])
+                    if len(data) != entry[1]:
+                        continue
+                    kept[key] = [dst.tell(), entry[1], entry[2]]
+                    dst.write(data)
+                    used_bytes += entry[1]
+            # 古いインデックスが新しいパックを指さないよう、先に削除してから置き換える
+            if os.path.exists(self.index_file):
+                os.remove(self.index_file)
+            os.replace(temp_file, self.pack_file)
+        except OSError as e:
+            print(f"アイコンキャッシュ詰め直しエラー: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return
+
+        self.entries = kept
+        kept_sources = {key.rsplit('|', 5)[0] for key in kept}
+        self.sources = {path: sig for path, sig in self.sources.items() if path in kept_sources}
+        self.pack_size = used_bytes
+        self.compactions += 1
+        self._save_index()
+
+    def _save_index(self):
+        """インデックスをアトミックに保存"""
+        data = {
+            'version': self.INDEX_VERSION,
+            'entries': self.entries,
+            'sources': self.sources
+        }
+        temp_file = f"{self.index_file}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_file, self.index_file)
+            self.unsaved_count = 0
+        except OSError as e:
+            print(f"アイコンキャッシュのインデックス保存エラー: {e}")
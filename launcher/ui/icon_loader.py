@@ -0,0 +1,137 @@
+"""
+IconLoader - アイテムアイコンをワーカースレッドで読み込むローダー
+"""
+
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QIcon, QPixmap
+from ui.icon_utils import icon_extractor
+
+
+class IconLoadTask(QRunnable):
+    """1つのアイコンを読み込むタスク"""
+
+    def __init__(self, loader, cache_key, icon_source_path, size, device_pixel_ratio, shared):
+        super().__init__()
+        self.loader = loader
+        self.cache_key = cache_key
+        self.icon_source_path = icon_source_path
+        self.size = size
+        self.device_pixel_ratio = device_pixel_ratio
+        self.shared = shared  # 拡張子で共有するアイコン
+
+    def run(self):
+        # 実行待ちの間に要求元がすべて取り消されていれば何もしない
+        if not self.loader.is_wanted(self.cache_key):
+            return
+        try:
+            image = self.loader.extractor.load_icon_image(self.icon_source_path, self.size,
+                                                          self.device_pixel_ratio, self.shared)
+        except Exception as e:
+            print(f"アイコン読み込みエラー: {e}")
+            image = None
+        self.loader.image_loaded.emit(self.cache_key, image)
+
+
+class IconLoader(QObject):
+    """非同期アイコンローダークラス
+
+    アイコンの取得（ディスクキャッシュ・シェル）をスレッドプールで行い、QImageで受け取って
+    GUIスレッドでQPixmapに変換する。同じアイコンへの要求（拡張子で共有するアイコンは
+    同じ拡張子のファイルすべて）は1回の読み込みにまとめる。
+    要求は世代番号ごとに管理し、cancel_generation() で取り消した世代の
+    コールバックは呼ばない（削除済みのウィジェットへの反映を防ぐ）。
+    """
+
+    # ワーカースレッドからGUIスレッドへの結果の受け渡し
+    image_loaded = pyqtSignal(str, object)  # cache_key, QImage（取得できなければNone）
+
+    def __init__(self, extractor, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.extractor = extractor
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.pending = {}  # {cache_key: [(世代, コールバック)]}
+        self.requests = {}  # {cache_key: (file_path, size, original_path, device_pixel_ratio, is_folder)}
+        self.lock = threading.Lock()  # pendingのキーをワーカースレッドから参照するため
+        self.generation = 0
+
+        self.image_loaded.connect(self.on_image_loaded)
+
+    def new_generation(self):
+        """新しい世代番号を取得"""
+        self.generation += 1
+        return self.generation
+
+    def cancel_generation(self, generation):
+        """世代の要求をすべて取り消し"""
+        with self.lock:
+            for cache_key in list(self.pending):
+                callbacks = [entry for entry in self.pending[cache_key] if entry[0] != generation]
+                if callbacks:
+                    self.pending[cache_key] = callbacks
+                else:
+                    del self.pending[cache_key]
+                    self.requests.pop(cache_key, None)
+
+    def is_wanted(self, cache_key):
+        """まだ要求元が残っているかチェック（ワーカースレッドから呼ばれる）"""
+        with self.lock:
+            return cache_key in self.pending
+
+    def request_icon(self, generation, file_path, size, callback, original_path=None, device_pixel_ratio=1.0,
+                     is_folder=False):
+        """アイコンを要求（メモリキャッシュにあればすぐにコールバックを呼ぶ）"""
+        icon_source_path, cache_key, shared = self.extractor.get_icon_key(
+            file_path, size, original_path, device_pixel_ratio, is_folder)
+
+        icon = self.extractor.get_cached_icon(cache_key)
+        if icon is not None:
+            callback(icon)
+            return
+
+        with self.lock:
+            if cache_key in self.pending:
+                # 読み込み中の要求にまとめる
+                self.pending[cache_key].append((generation, callback))
+                return
+            self.pending[cache_key] = [(generation, callback)]
+            self.requests[cache_key] = (file_path, size, original_path, device_pixel_ratio, is_folder)
+
+        self.thread_pool.start(IconLoadTask(self, cache_key, icon_source_path, size, device_pixel_ratio, shared))
+
+    def on_image_loaded(self, cache_key, image):
+        """読み込み結果を要求元に反映（GUIスレッドで実行）"""
+        with self.lock:
+            callbacks = self.pending.pop(cache_key, [])
+            request = self.requests.pop(cache_key, None)
+        if not callbacks:
+            return
+
+        if image is not None:
+            icon = QIcon(QPixmap.fromImage(image))
+            self.extractor.add_cached_icon(cache_key, icon, image.sizeInBytes())
+        else:
+            # シェルから取得できない場合（Windows以外など）はGUIスレッドで従来の方法で取得
+            icon = self.extractor.get_file_icon(*request)
+
+        for _, callback in callbacks:
+            try:
+                callback(icon)
+            except RuntimeError:
+                # ウィジェットが削除済み
+                pass
+            except Exception as e:
+                print(f"アイコン反映エラー: {e}")
+
+    def shutdown(self, timeout_ms=1000):
+        """すべての要求を取り消して実行中のタスクの終了を待つ"""
+        with self.lock:
+            self.pending.clear()
+            self.requests.clear()
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone(timeout_ms)
+
+
+# グローバルアイコンローダーインスタンス
+icon_loader = IconLoader(icon_extractor)
@@ -0,0 +1,96 @@
+"""
+IconMemoryCache - 描画済みアイコンを使用量の上限付きでメモリ上に保持するLRUキャッシュ
+"""
+
+import time
+from collections import OrderedDict
+
+
+class IconMemoryCache:
+    """アイコンのLRUキャッシュクラス
+
+    各エントリーの使用量（ピクセル数×4バイト）を合計し、max_bytes を超えたら
+    最も長く使われていないものから破棄する。GUIスレッドからのみ使用する。
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max(0, max_bytes)
+        self.entries = OrderedDict()  # {キー: (アイコン, 使用量)}（末尾が最新）
+        self.total_bytes = 0
+        self.last_access = time.monotonic()
+
+        # 統計
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.trims = 0
+
+    def set_max_bytes(self, max_bytes):
+        """上限を変更（0でキャッシュ無効）"""
+        self.max_bytes = max(0, max_bytes)
+        self._evict(self.max_bytes)
+
+    def get(self, key):
+        """アイコンを取得（なければNone）"""
+        self.last_access = time.monotonic()
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, icon, cost):
+        """アイコンを格納（1つで上限を超えるものは格納しない）"""
+        self.last_access = time.monotonic()
+        if cost > self.max_bytes:
+            return
+        old_entry = self.entries.pop(key, None)
+        if old_entry is not None:
+            self.total_bytes -= old_entry[1]
+        self.entries[key] = (icon, cost)
+        self.total_bytes += cost
+        self._evict(self.max_bytes)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def trim(self, target_bytes=0):
+        """使用量が target_bytes 以下になるまで古いものから破棄し、解放した量を返す"""
+        before = self.total_bytes
+        self._evict(max(0, target_bytes))
+        self.trims += 1
+        return before - self.total_bytes
+
+    def clear(self):
+        """キャッシュを空にする"""
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def get_idle_seconds(self):
+        """最後に参照されてからの経過秒数"""
+        return time.monotonic() - self.last_access
+
+    def get_stats(self):
+        """ヒット数・破棄数・使用量を取得"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+            'trims': self.trims
+        }
+
+    def _evict(self, limit):
+        while self.entries and self.total_bytes > limit:
+            _, (_, cost) = self.entries.popitem(last=False)
+            self.total_bytes -= cost
+            self.evictions += 1
+            self.evicted_bytes += cost
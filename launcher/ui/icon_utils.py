@@ -4,9 +4,44 @@ IconUtils - アイコン取得と管理のユーティリティ
 
 import os
 import sys
-from PyQt6.QtCore import QFileInfo, Qt
-from PyQt6.QtGui import QIcon, QPixmap, QPainter, QBrush, QColor
+import ctypes
+import ctypes.wintypes
+from PyQt6.QtCore import QFileInfo, Qt, QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QIcon, QPixmap, QImage, QPainter, QBrush, QColor
 from PyQt6.QtWidgets import QFileIconProvider
+from ui.icon_memory_cache import IconMemoryCache
+
+
+# SHGetFileInfoW のフラグ
+SHGFI_ICON = 0x100
+SHGFI_LARGEICON = 0x0  # 32x32
+SHGFI_SMALLICON = 0x1  # 16x16
+SHGFI_USEFILEATTRIBUTES = 0x10  # ファイルにアクセスせず拡張子から取得
+FILE_ATTRIBUTE_NORMAL = 0x80
+COINIT_APARTMENTTHREADED = 0x2
+
+# ファイルごとにアイコンが異なる拡張子（それ以外は拡張子ごとに同じアイコンを共有）
+PER_FILE_ICON_EXTENSIONS = {'.exe', '.lnk', '.ico', '.url', '.dll', '.cpl', '.scr', '.cur', '.ani', '.appref-ms'}
+
+
+def image_to_png(image):
+    """QPixmap・QImageをPNGのバイト列に変換（失敗時はNone）"""
+    buffer_data = QByteArray()
+    buffer = QBuffer(buffer_data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    saved = image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(buffer_data) if saved else None
+
+
+class SHFILEINFOW(ctypes.Structure):
+    _fields_ = [
+        ("hIcon", ctypes.wintypes.HICON),
+        ("iIcon", ctypes.c_int),
+        ("dwAttributes", ctypes.wintypes.DWORD),
+        ("szDisplayName", ctypes.wintypes.WCHAR * 260),
+        ("szTypeName", ctypes.wintypes.WCHAR * 80)
+    ]
 
 
 class IconExtractor:
@@ -14,29 +49,84 @@ class IconExtractor:
     
     def __init__(self):
         self.icon_provider = QFileIconProvider()
-        self.icon_cache = {}  # アイコンキャッシュ
+        self.icon_cache = IconMemoryCache()  # アイコンキャッシュ（使用量の上限付きLRU）
+        self.disk_cache = None  # 再起動後も使うディスクキャッシュ（IconDiskCache、LauncherAppから設定）
+        self.placeholder_cache = {}  # 種類ごとの仮アイコン
+        self.extraction_count = 0  # シェル・FileIconProviderからの取得回数
+        
+    def set_disk_cache(self, disk_cache):
+        """ディスクキャッシュを設定（Noneで無効）"""
+        self.disk_cache = disk_cache
+        
+    @staticmethod
+    def resolve_icon_source(file_path, original_path=None):
+        """アイコンの取得元のパスを決定"""
+        # Chrome アプリの場合は original_path (ショートカットファイル) からアイコンを取得
+        if (original_path and original_path.lower().endswith('.lnk') and
+            ('chrome.exe' in file_path.lower() or 'chrome_proxy.exe' in file_path.lower())):
+            return original_path
+        return file_path
+        
+    @staticmethod
+    def make_cache_key(icon_source_path, size, device_pixel_ratio=1.0):
+        """メモリキャッシュのキーを作成"""
+        return f"{icon_source_path}_{size}_{device_pixel_ratio:g}"
+        
+    @staticmethod
+    def get_shared_icon_key(icon_source_path, is_folder=False):
+        """拡張子で決まるアイコンの共有キーを取得（ファイルごとに取得が必要な場合はNone）
+        
+        フォルダ（desktop.iniで変更できる）・拡張子なし・実行ファイルやショートカットなど
+        アイコンを埋め込める種類はファイルごとに取得する。
+        """
+        if is_folder:
+            return None
+        ext = os.path.splitext(icon_source_path)[1].lower()
+        if not ext or ext in PER_FILE_ICON_EXTENSIONS:
+            return None
+        return f"*{ext}"
+        
+    def get_icon_key(self, file_path, size, original_path=None, device_pixel_ratio=1.0, is_folder=False):
+        """アイコンの取得元・キャッシュのキー・拡張子で共有するかを取得"""
+        icon_source_path = self.resolve_icon_source(file_path, original_path)
+        shared_key = self.get_shared_icon_key(icon_source_path, is_folder)
+        cache_key = self.make_cache_key(shared_key or icon_source_path, size, device_pixel_ratio)
+        return icon_source_path, cache_key, shared_key is not None
+        
+    def get_cached_icon(self, cache_key):
+        """メモリキャッシュ済みのアイコンを取得（なければNone）"""
+        return self.icon_cache.get(cache_key)
+        
+    def add_cached_icon(self, cache_key, icon, cost):
+        """アイコンをメモリキャッシュに追加（costは画素データのバイト数）"""
+        if not icon.isNull():
+            self.icon_cache.put(cache_key, icon, cost)
+            
+    @staticmethod
+    def get_pixmap_cost(size, device_pixel_ratio=1.0):
+        """size×sizeのアイコンの画素データのバイト数（32bit ARGB）"""
+        pixel_size = round(size * device_pixel_ratio)
+        return pixel_size * pixel_size * 4
         
-    def get_file_icon(self, file_path, size=32, original_path=None):
-        """ファイルのアイコンを取得"""
+    def get_file_icon(self, file_path, size=32, original_path=None, device_pixel_ratio=1.0, is_folder=False):
+        """ファイルのアイコンを取得（メモリ、ディスク、シェルの順に参照）"""
         try:
-            # Chrome アプリの場合は original_path (ショートカットファイル) からアイコンを取得
-            icon_source_path = file_path
-            if (original_path and original_path.lower().endswith('.lnk') and
-                ('chrome.exe' in file_path.lower() or 'chrome_proxy.exe' in file_path.lower())):
-                icon_source_path = original_path
-                print(f"[DEBUG] Chrome アプリアイコン取得: {original_path}")
+            icon_source_path, cache_key, shared = self.get_icon_key(
+                file_path, size, original_path, device_pixel_ratio, is_folder)
             
-            # キャッシュをチェック
-            cache_key = f"{icon_source_path}_{size}"
-            if cache_key in self.icon_cache:
-                return self.icon_cache[cache_key]
+            # キャッシュをチェック（拡張子で共有するアイコンは同じ拡張子のファイルで1つ）
+            icon = self.icon_cache.get(cache_key)
+            if icon is not None:
+                return icon
                 
-            # QtのFileIconProviderを使用
-            icon = self._get_qt_icon(icon_source_path, size)
+            # ディスクキャッシュをチェック（共有するアイコンは1回の取得で済むため保存しない）
+            icon = None if shared else self._load_cached_icon(icon_source_path, size, device_pixel_ratio)
+            if icon is None:
+                # QtのFileIconProviderを使用
+                icon = self._get_qt_icon(icon_source_path, size, device_pixel_ratio, not shared)
                 
             # キャッシュに保存
-            if not icon.isNull():
-                self.icon_cache[cache_key] = icon
+            self.add_cached_icon(cache_key, icon, self.get_pixmap_cost(size, device_pixel_ratio))
                 
             return icon
             
@@ -45,15 +135,107 @@ class IconExtractor:
             return self._get_default_icon(file_path, size)
             
             
-    def _get_qt_icon(self, file_path, size):
+    def _load_cached_icon(self, file_path, size, device_pixel_ratio):
+        """ディスクキャッシュからアイコンを読み込み（なければNone）"""
+        if self.disk_cache is None:
+            return None
+        data = self.disk_cache.get(file_path, size, device_pixel_ratio)
+        if data is None:
+            return None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data, "PNG"):
+            return None
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return QIcon(pixmap)
+        
+    def _store_cached_icon(self, file_path, size, device_pixel_ratio, image):
+        """描画したアイコン（QPixmap・QImage）をPNGとしてディスクキャッシュに保存"""
+        if self.disk_cache is None:
+            return
+        data = image_to_png(image)
+        if data is not None:
+            self.disk_cache.put(file_path, size, device_pixel_ratio, data)
+        
+    def load_icon_image(self, icon_source_path, size, device_pixel_ratio=1.0, shared=False):
+        """アイコンをQImageで取得（ワーカースレッドから呼ばれる。取得できなければNone）
+
+        QPixmap・QIconはGUIスレッド専用のため、ディスクキャッシュかシェル（SHGetFileInfoW）から
+        QImageとして読み込む。拡張子で共有するアイコンはファイルにアクセスせず拡張子から取得する。
+        """
+        if not shared and self.disk_cache is not None:
+            data = self.disk_cache.get(icon_source_path, size, device_pixel_ratio)
+            if data is not None:
+                image = QImage.fromData(data, "PNG")
+                if not image.isNull():
+                    image.setDevicePixelRatio(device_pixel_ratio)
+                    return image
+                    
+        pixel_size = round(size * device_pixel_ratio)
+        image = self._get_shell_image(icon_source_path, pixel_size, shared)
+        if image is None:
+            return None
+        if image.width() != pixel_size:
+            image = image.scaled(pixel_size, pixel_size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        image.setDevicePixelRatio(device_pixel_ratio)
+        if not shared:
+            self._store_cached_icon(icon_source_path, size, device_pixel_ratio, image)
+        return image
+        
+    def _get_shell_image(self, file_path, pixel_size, by_extension=False):
+        """SHGetFileInfoWでシェルのアイコンを取得（Windows以外・失敗時はNone）"""
+        if sys.platform != 'win32':
+            return None
+        
+        # シェルのアイコン取得にはスレッドごとのCOM初期化が必要
+        ole32 = ctypes.windll.ole32
+        com_initialized = ole32.CoInitializeEx(None, COINIT_APARTMENTTHREADED) >= 0
+        try:
+            info = SHFILEINFOW()
+            flags = SHGFI_ICON | (SHGFI_SMALLICON if pixel_size <= 16 else SHGFI_LARGEICON)
+            attributes = 0
+            if by_extension:
+                flags |= SHGFI_USEFILEATTRIBUTES
+                attributes = FILE_ATTRIBUTE_NORMAL
+            self.extraction_count += 1
+            result = ctypes.windll.shell32.SHGetFileInfoW(
+                file_path, attributes, ctypes.byref(info), ctypes.sizeof(info), flags)
+            if not result or not info.hIcon:
+                return None
+            try:
+                image = QImage.fromHICON(info.hIcon)
+            finally:
+                ctypes.windll.user32.DestroyIcon(info.hIcon)
+            return None if image.isNull() else image
+        except Exception as e:
+            print(f"シェルアイコン取得エラー: {e}")
+            return None
+        finally:
+            if com_initialized:
+                ole32.CoUninitialize()
+        
+    def get_placeholder_icon(self, file_path, size, is_folder):
+        """種類ごとの仮アイコンを取得（ファイルにはアクセスしない）"""
+        kind = self._get_icon_kind(file_path, is_folder)
+        cache_key = f"{kind}_{size}"
+        if cache_key not in self.placeholder_cache:
+            self.placeholder_cache[cache_key] = self._draw_default_icon(kind, size)
+        return self.placeholder_cache[cache_key]
+        
+    def _get_qt_icon(self, file_path, size, device_pixel_ratio=1.0, use_disk_cache=True):
         """QtのFileIconProviderを使用してアイコンを取得"""
         try:
+            self.extraction_count += 1
             file_info = QFileInfo(file_path)
             icon = self.icon_provider.icon(file_info)
             
             if not icon.isNull():
-                # サイズを調整
-                pixmap = icon.pixmap(size, size)
+                # サイズを調整（高DPIでは実ピクセル数で描画）
+                pixel_size = round(size * device_pixel_ratio)
+                pixmap = icon.pixmap(pixel_size, pixel_size)
+                pixmap.setDevicePixelRatio(device_pixel_ratio)
+                if use_disk_cache:
+                    self._store_cached_icon(file_path, size, device_pixel_ratio, pixmap)
                 return QIcon(pixmap)
             else:
                 return self._get_default_icon(file_path, size)
@@ -64,25 +246,37 @@ class IconExtractor:
         
     def _get_default_icon(self, file_path, size):
         """デフォルトアイコンを取得"""
+        return self._draw_default_icon(self._get_icon_kind(file_path, os.path.isdir(file_path)), size)
+        
+    @staticmethod
+    def _get_icon_kind(file_path, is_folder):
+        """デフォルトアイコンの種類を判定"""
+        if is_folder:
+            return 'folder'
+        ext = os.path.splitext(file_path)[1].lower()
+        return ext if ext in ('.exe', '.lnk') else 'file'
+        
+    def _draw_default_icon(self, kind, size):
+        """種類（folder / .exe / .lnk / file）ごとのデフォルトアイコンを描画"""
         pixmap = QPixmap(size, size)
         pixmap.fill(Qt.GlobalColor.transparent)
         
         painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        if os.path.isdir(file_path):
+        if kind == 'folder':
             # フォルダアイコン
             painter.setBrush(QBrush(QColor(255, 215, 0)))  # ゴールド色
             painter.drawRoundedRect(2, 4, size-4, size-8, 3, 3)
             painter.setBrush(QBrush(QColor(255, 235, 59)))  # 明るいゴールド
             painter.drawRoundedRect(2, 2, size-10, 6, 2, 2)
-        elif file_path.lower().endswith('.exe'):
+        elif kind == '.exe':
             # 実行ファイルアイコン
             painter.setBrush(QBrush(QColor(100, 150, 255)))  # 青色
             painter.drawRoundedRect(2, 2, size-4, size-4, 4, 4)
             painter.setPen(QColor(255, 255, 255))
             painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignCenter, "⚡")
-        elif file_path.lower().endswith('.lnk'):
+        elif kind == '.lnk':
             # ショートカットアイコン
             painter.setBrush(QBrush(QColor(128, 128, 255)))  # 薄青色
             painter.drawRoundedRect(2, 2, size-4, size-4, 4, 4)
@@ -101,6 +295,26 @@ class IconExtractor:
     def clear_cache(self):
         """アイコンキャッシュをクリア"""
         self.icon_cache.clear()
+        
+    def configure_memory_cache(self, max_bytes):
+        """メモリキャッシュの上限を変更"""
+        self.icon_cache.set_max_bytes(max_bytes)
+        
+    def trim_memory_cache(self, target_bytes=0):
+        """メモリキャッシュを縮小して解放したバイト数を返す（ディスクキャッシュから再読み込みできる）"""
+        freed = self.icon_cache.trim(target_bytes)
+        self.placeholder_cache.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+        return freed
+        
+    def get_cache_stats(self):
+        """メモリ・ディスクキャッシュの統計を取得"""
+        stats = {'memory': self.icon_cache.get_stats(), 'extractions': self.extraction_count,
+                 'shared_icons': sum(1 for key in self.icon_cache.entries if key.startswith('*'))}
+        if self.disk_cache is not None:
+            stats['disk'] = self.disk_cache.get_stats()
+        return stats
 
 
 # グローバルアイコン抽出インスタンス
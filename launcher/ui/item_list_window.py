@@ -14,6 +14,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QScrollArea,
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QMimeData, QUrl, QPoint, QPropertyAnimation, QEasingCurve, QRect, QParallelAnimationGroup
 from PyQt6.QtGui import QFont, QIcon, QPixmap, QAction, QDrag, QPainter, QCursor, QPen, QColor
 from ui.icon_utils import icon_extractor
+from ui.icon_loader import icon_loader
 
 
 class ItemWidget(QFrame):
@@ -23,10 +24,11 @@ class ItemWidget(QFrame):
     remove_requested = pyqtSignal(object)  # 削除要求シグナル
     reorder_requested = pyqtSignal(object, int)  # 並び替え要求シグナル (item_widget, new_index)
     
-    def __init__(self, item_info, settings_manager=None):
+    def __init__(self, item_info, settings_manager=None, icon_generation=0):
         super().__init__()
         self.item_info = item_info
         self.settings_manager = settings_manager
+        self.icon_generation = icon_generation  # アイコン要求の世代（リスト更新時に取り消す）
         self.drag_start_position = None
         self.is_reorder_drag = False  # 並び替えドラッグかどうか
         self.drop_position = None  # ドロップ位置を保存
@@ -63,19 +65,18 @@ class ItemWidget(QFrame):
         self.checkbox.setFixedSize(20, 20)
         
         # アイコン
-        icon_label = QLabel()
-        icon_label.setFixedSize(24, 24)
+        self.icon_label = QLabel()
+        self.icon_label.setFixedSize(24, 24)
+        icon_label = self.icon_label
         
-        # ファイルの実際のアイコンを取得
+        # 種類ごとの仮アイコンを表示し、ファイルの実際のアイコンはバックグラウンドで取得
         try:
-            original_path = self.item_info.get('original_path')
-            file_icon = icon_extractor.get_file_icon(self.item_info['path'], 24, original_path)
-            if not file_icon.isNull():
-                pixmap = file_icon.pixmap(24, 24)
-                icon_label.setPixmap(pixmap)
-            else:
-                # フォールバック: デフォルトアイコン
-                self._set_default_icon(icon_label)
+            is_folder = self.item_info.get('type') == 'folder'
+            placeholder = icon_extractor.get_placeholder_icon(self.item_info['path'], 24, is_folder)
+            icon_label.setPixmap(placeholder.pixmap(24, 24))
+            icon_loader.request_icon(
+                self.icon_generation, self.item_info['path'], 24, self.set_file_icon,
+                self.item_info.get('original_path'), self.devicePixelRatioF(), is_folder)
         except Exception as e:
             print(f"アイコン設定エラー: {e}")
             self._set_default_icon(icon_label)
@@ -147,6 +148,15 @@ class ItemWidget(QFrame):
             return appearance_settings.get('show_app_names', True)
         return True  # デフォルトは表示
         
+    def set_file_icon(self, file_icon):
+        """取得したファイルのアイコンを表示"""
+        if file_icon is not None and not file_icon.isNull():
+            self.icon_label.setPixmap(file_icon.pixmap(24, 24))
+        else:
+            # フォールバック: デフォルトアイコン
+            self.icon_label.clear()
+            self._set_default_icon(self.icon_label)
+        
     def _set_default_icon(self, icon_label):
         """デフォルトアイコンを設定"""
         if self.item_info['type'] == 'folder':
@@ -925,6 +935,7 @@ class ItemListWindow(QWidget):
         self.animation_group = None  # アニメーショングループ
         self.animating_widgets = []  # アニメーション中のウィジェット
         self.original_positions = {}  # 元の位置を保存
+        self.icon_generation = icon_loader.new_generation()  # 表示中のアイテムのアイコン要求の世代
         
         # ウィンドウドラッグ用
         self.window_drag_start_position = None
@@ -1285,6 +1296,10 @@ class ItemListWindow(QWidget):
         
     def refresh_items(self):
         """アイテムリストを更新"""
+        # 削除するウィジェットへのアイコン要求を取り消し、新しい世代で要求する
+        icon_loader.cancel_generation(self.icon_generation)
+        self.icon_generation = icon_loader.new_generation()
+        
         # 既存のアイテムウィジェットを削除
         for i in reversed(range(self.items_layout.count() - 1)):  # ストレッチを除く
             child = self.items_layout.itemAt(i).widget()
@@ -1293,7 +1308,7 @@ class ItemListWindow(QWidget):
                 
         # 新しいアイテムウィジェットを追加
         for item_info in self.group_icon.items:
-            item_widget = ItemWidget(item_info, self.settings_manager)
+            item_widget = ItemWidget(item_info, self.settings_manager, self.icon_generation)
             item_widget.launch_requested.connect(self.launch_item)
             item_widget.remove_requested.connect(self.remove_item)
             item_widget.reorder_requested.connect(self.reorder_item)
@@ -0,0 +1,78 @@
+"""
+ProfileHistoryDialog - プロファイル履歴ダイアログ
+プロファイルの保存履歴を一覧表示し、復元するスナップショットを選択するUI
+"""
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                            QListWidget, QListWidgetItem, QLabel)
+from PyQt6.QtCore import Qt
+from datetime import datetime
+
+
+class ProfileHistoryDialog(QDialog):
+    """プロファイル履歴ダイアログ"""
+
+    def __init__(self, parent=None, profile_name="", snapshots=None):
+        super().__init__(parent)
+        self.profile_name = profile_name
+        self.snapshots = snapshots or []
+        self.selected_snapshot_id = None
+
+        self.setWindowTitle(f"プロファイル履歴 - {profile_name}")
+        self.setFixedSize(420, 360)
+        self.setModal(True)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """UIを設定"""
+        layout = QVBoxLayout()
+
+        info_label = QLabel("復元する保存時点を選択してください。復元前の状態も履歴に残ります。")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        self.snapshot_list = QListWidget()
+        for snapshot in self.snapshots:
+            try:
+                created = datetime.fromisoformat(snapshot['created']).strftime("%Y/%m/%d %H:%M:%S")
+            except (ValueError, TypeError):
+                created = snapshot.get('created', '')
+            text = f"{created}  グループ {snapshot['groups_count']} / アイテム {snapshot['items_count']}"
+            item = QListWidgetItem(text)
+            item.setToolTip(snapshot.get('description', ''))
+            item.setData(Qt.ItemDataRole.UserRole, snapshot['id'])
+            self.snapshot_list.addItem(item)
+        self.snapshot_list.currentItemChanged.connect(self.on_selection_changed)
+        self.snapshot_list.itemDoubleClicked.connect(lambda item: self.accept_selection())
+        layout.addWidget(self.snapshot_list)
+
+        if not self.snapshots:
+            layout.addWidget(QLabel("保存履歴はありません"))
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        self.restore_button = QPushButton("復元")
+        self.restore_button.clicked.connect(self.accept_selection)
+        self.restore_button.setEnabled(False)
+        button_layout.addWidget(self.restore_button)
+
+        cancel_button = QPushButton("キャンセル")
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def on_selection_changed(self, current, previous):
+        """選択変更時の処理"""
+        self.restore_button.setEnabled(current is not None)
+
+    def accept_selection(self):
+        """選択したスナップショットで確定"""
+        item = self.snapshot_list.currentItem()
+        if item is None:
+            return
+        self.selected_snapshot_id = item.data(Qt.ItemDataRole.UserRole)
+        self.accept()
@@ -0,0 +1,154 @@
+"""
+ProfileListModel - プロファイル一覧のQtモデル
+ProfileManagerの変更通知で行単位に更新し、一覧・詳細表示用の概要をメモリ上に保持する
+"""
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QFont
+from data.profile_manager import PROFILE_SAVED, PROFILE_DELETED, PROFILE_RENAMED, CURRENT_PROFILE_CHANGED
+
+
+# プロファイル名（UserRole）以外のカスタムロール
+ProfileHeaderRole = Qt.ItemDataRole.UserRole + 1  # 一覧表示用の概要（dict）
+
+
+class ProfileListModel(QAbstractListModel):
+    """プロファイル一覧モデル
+
+    各行は ProfileManager.make_profile_header() の概要を保持し、詳細表示にも
+    そのまま使うため、選択を変更してもディスクは読まない。作成・更新・削除・
+    名前変更・使用中のプロファイルの変更は通知を受けてその行のみ更新する。
+    """
+
+    # 永続化ワーカーのスレッドからの通知をGUIスレッドで処理するためのシグナル
+    profile_changed = pyqtSignal(str, str, object)  # event, profile_name, data
+    # 使用中のプロファイルが変わった
+    current_profile_changed = pyqtSignal(str)  # profile_name（なしは空文字）
+
+    def __init__(self, profile_manager, parent=None):
+        super().__init__(parent)
+        self.profile_manager = profile_manager
+        self.profiles = []  # 概要のリスト（作成日時の新しい順）
+
+        self.profile_changed.connect(self.on_profile_changed)
+        profile_manager.add_change_listener(
+            lambda event, profile_name, data: self.profile_changed.emit(event, profile_name or "", data))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.profiles)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.profiles):
+            return None
+
+        profile = self.profiles[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.format_name(profile)
+        if role == Qt.ItemDataRole.UserRole:
+            return profile['name']
+        if role == ProfileHeaderRole:
+            return dict(profile)
+        if role == Qt.ItemDataRole.FontRole and profile['is_current']:
+            # 現在使用中のプロファイルは太字で表示
+            font = QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return profile.get('description') or None
+        return None
+
+    def format_name(self, profile):
+        """一覧の表示名を作成（ホットキーと使用中の表示を含む）"""
+        name = profile['name']
+        hotkey = profile.get('hotkey')
+        if hotkey and 'hotkey_string' in hotkey:
+            name = f"[{hotkey['hotkey_string']}] {name}"
+        if profile['is_current']:
+            name += " (現在使用中)"
+        return name
+
+    def reload(self):
+        """プロファイル一覧を丸ごと読み込み（初回表示・一括インポート後）"""
+        self.beginResetModel()
+        self.profiles = self.profile_manager.get_profile_list()
+        self.endResetModel()
+
+    def find_row(self, profile_name):
+        """プロファイル名から行を取得（なければ-1）"""
+        for row, profile in enumerate(self.profiles):
+            if profile['name'] == profile_name:
+                return row
+        return -1
+
+    def get_profile(self, row):
+        """行の概要を取得"""
+        if 0 <= row < len(self.profiles):
+            return dict(self.profiles[row])
+        return None
+
+    def get_profiles(self):
+        """すべての概要を取得"""
+        return [dict(profile) for profile in self.profiles]
+
+    def on_profile_changed(self, event, profile_name, data):
+        """ProfileManagerの変更通知を反映（GUIスレッドで実行）"""
+        try:
+            if event == PROFILE_SAVED:
+                self.update_profile(self.profile_manager.make_profile_header(dict(data, name=profile_name)))
+            elif event == PROFILE_DELETED:
+                self.remove_profile(profile_name)
+            elif event == PROFILE_RENAMED:
+                self.rename_profile(profile_name, data)
+            elif event == CURRENT_PROFILE_CHANGED:
+                self.update_current(profile_name, data)
+        except Exception as e:
+            print(f"プロファイル一覧の更新エラー: {e}")
+
+    def update_profile(self, profile):
+        """行を更新（なければ作成日時の順に挿入）"""
+        row = self.find_row(profile['name'])
+        if row >= 0:
+            self.profiles[row] = profile
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+            return
+
+        row = 0
+        while row < len(self.profiles) and self.profiles[row].get('created', '') > profile.get('created', ''):
+            row += 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.profiles.insert(row, profile)
+        self.endInsertRows()
+
+    def remove_profile(self, profile_name):
+        """行を削除"""
+        row = self.find_row(profile_name)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.profiles[row]
+        self.endRemoveRows()
+
+    def rename_profile(self, old_name, new_name):
+        """行のプロファイル名を変更（新しい名前の行が先に保存通知で作られていれば古い行を削除）"""
+        row = self.find_row(old_name)
+        if row < 0:
+            return
+        if self.find_row(new_name) >= 0:
+            self.remove_profile(old_name)
+            return
+        self.profiles[row] = dict(self.profiles[row], name=new_name)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def update_current(self, profile_name, previous_name):
+        """使用中の表示を前のプロファイルから新しいプロファイルに移す"""
+        for name, is_current in ((previous_name, False), (profile_name, True)):
+            row = self.find_row(name) if name else -1
+            if row >= 0:
+                self.profiles[row]['is_current'] = is_current
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+        self.current_profile_changed.emit(profile_name or "")
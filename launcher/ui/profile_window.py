@@ -4,12 +4,14 @@ ProfileWindow - プロファイル管理ウィンドウ
 """
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QListWidget, QListWidgetItem, QLabel, QLineEdit,
+                            QListWidget, QListWidgetItem, QListView, QLabel, QLineEdit,
                             QTextEdit, QMessageBox, QInputDialog, QGroupBox,
                             QSplitter, QWidget, QFileDialog, QMenu, QApplication)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon, QPixmap, QColor, QFont, QAction
 from .hotkey_selector_dialog import HotkeySelector
+from .profile_history_dialog import ProfileHistoryDialog
+from .profile_list_model import ProfileListModel
 import os
 from datetime import datetime
 
@@ -58,9 +60,27 @@ class ProfileWindow(QDialog):
         hotkey_label.setStyleSheet("color: #666; font-size: 9px;")
         left_layout.addWidget(hotkey_label)
         
+        # アイテム検索（全プロファイル横断）
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("アプリを検索（全プロファイル）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.search_items)
+        left_layout.addWidget(self.search_edit)
+        
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(140)
+        self.search_results.itemClicked.connect(self.on_search_result_clicked)
+        self.search_results.hide()
+        left_layout.addWidget(self.search_results)
+        
         # プロファイルリスト
-        self.profile_list = QListWidget()
-        self.profile_list.currentItemChanged.connect(self.on_profile_selection_changed)
+        self.profile_model = ProfileListModel(self.profile_manager, self)
+        self.profile_model.dataChanged.connect(self.on_profile_data_changed)
+        self.profile_model.current_profile_changed.connect(self.update_current_profile_label)
+        self.profile_list = QListView()
+        self.profile_list.setModel(self.profile_model)
+        self.profile_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.profile_list.selectionModel().currentChanged.connect(self.on_profile_selection_changed)
         self.profile_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.profile_list.customContextMenuRequested.connect(self.show_context_menu)
         left_layout.addWidget(self.profile_list)
@@ -160,6 +180,11 @@ class ProfileWindow(QDialog):
         self.hotkey_button.setEnabled(False)
         extra_button_layout.addWidget(self.hotkey_button)
         
+        self.history_button = QPushButton("履歴から復元")
+        self.history_button.clicked.connect(self.show_profile_history)
+        self.history_button.setEnabled(False)
+        extra_button_layout.addWidget(self.history_button)
+        
         self.save_current_button = QPushButton("現在の状態を保存")
         self.save_current_button.clicked.connect(self.save_current_state)
         extra_button_layout.addWidget(self.save_current_button)
@@ -216,51 +241,31 @@ class ProfileWindow(QDialog):
             print(f"プロファイルウィンドウのアイコン設定エラー: {e}")
             
     def load_profile_list(self):
-        """プロファイル一覧を読み込み"""
+        """プロファイル一覧を読み込み（以降の変更はモデルが通知を受けて反映する）"""
         try:
-            self.profile_list.clear()
-            profiles = self.profile_manager.get_profile_list()
+            self.profile_model.reload()
             
-            for index, profile in enumerate(profiles):
-                item = QListWidgetItem()
-                
-                # プロファイル名の表示（ホットキー情報を含む）
-                name = profile['name']
-                
-                # ホットキー情報を追加（プロファイルファイルから直接取得）
-                try:
-                    profile_info = self.profile_manager.get_profile_info(profile['name'])
-                    if profile_info and profile_info.get('hotkey') and 'hotkey_string' in profile_info['hotkey']:
-                        hotkey = profile_info['hotkey']['hotkey_string']
-                        name = f"[{hotkey}] {name}"
-                except Exception as e:
-                    print(f"ホットキー情報取得エラー ({profile['name']}): {e}")
-                
-                if profile['is_current']:
-                    name += " (現在使用中)"
-                    
-                item.setText(name)
-                item.setData(Qt.ItemDataRole.UserRole, profile['name'])
-                
-                # 現在使用中のプロファイルは太字で表示
-                if profile['is_current']:
-                    font = item.font()
-                    font.setBold(True)
-                    item.setFont(font)
-                    
-                self.profile_list.addItem(item)
-                
             # 現在のプロファイル名を更新
-            current_name = self.profile_manager.get_current_profile_name()
-            self.current_profile_label.setText(current_name if current_name else "なし")
+            self.update_current_profile_label(self.profile_manager.get_current_profile_name())
+            self.on_profile_selection_changed(self.profile_list.currentIndex(), None)
             
         except Exception as e:
             print(f"プロファイル一覧読み込みエラー: {e}")
             QMessageBox.warning(self, "エラー", "プロファイル一覧の読み込みに失敗しました。")
             
+    def update_current_profile_label(self, profile_name):
+        """現在のプロファイル表示を更新"""
+        self.current_profile_label.setText(profile_name if profile_name else "なし")
+        
+    def select_profile(self, profile_name):
+        """一覧のプロファイルを選択"""
+        row = self.profile_model.find_row(profile_name)
+        if row >= 0:
+            self.profile_list.setCurrentIndex(self.profile_model.index(row))
+            
     def on_profile_selection_changed(self, current, previous):
-        """プロファイル選択変更時の処理"""
-        if current:
+        """プロファイル選択変更時の処理（モデルが保持する概要を表示し、ディスクは読まない）"""
+        if current is not None and current.isValid():
             profile_name = current.data(Qt.ItemDataRole.UserRole)
             self.selected_profile = profile_name
             
@@ -275,6 +280,7 @@ class ProfileWindow(QDialog):
             self.delete_button.setEnabled(not is_current)
             self.rename_button.setEnabled(True)
             self.hotkey_button.setEnabled(True)
+            self.history_button.setEnabled(True)
             self.export_button.setEnabled(True)
             
         else:
@@ -286,12 +292,19 @@ class ProfileWindow(QDialog):
             self.delete_button.setEnabled(False)
             self.rename_button.setEnabled(False)
             self.hotkey_button.setEnabled(False)
+            self.history_button.setEnabled(False)
             self.export_button.setEnabled(False)
             
+    def on_profile_data_changed(self, top_left, bottom_right, roles=None):
+        """選択中のプロファイルの概要が更新されたら詳細表示とボタンを更新"""
+        current = self.profile_list.currentIndex()
+        if current.isValid() and top_left.row() <= current.row() <= bottom_right.row():
+            self.on_profile_selection_changed(current, None)
+            
     def show_profile_details(self, profile_name):
         """プロファイル詳細を表示"""
         try:
-            profile_info = self.profile_manager.get_profile_info(profile_name)
+            profile_info = self.profile_model.get_profile(self.profile_model.find_row(profile_name))
             if profile_info:
                 self.name_edit.setText(profile_info.get('name', ''))
                 self.description_edit.setText(profile_info.get('description', ''))
@@ -315,7 +328,7 @@ class ProfileWindow(QDialog):
                 groups_count = profile_info.get('groups_count', 0)
                 self.groups_label.setText(f"{groups_count}個")
                 
-                # ホットキー情報を表示（プロファイルファイルから直接取得）
+                # ホットキー情報を表示（カタログから取得）
                 hotkey_text = "なし"
                 hotkey_info_stored = profile_info.get('hotkey')
                 if hotkey_info_stored and 'hotkey_string' in hotkey_info_stored:
@@ -409,15 +422,10 @@ class ProfileWindow(QDialog):
                     else:
                         QMessageBox.warning(self, "エラー", f"切り替えに失敗しました: {switch_message}")
                 
-                self.load_profile_list()
                 self.profiles_changed.emit()  # プロファイルリスト変更を通知
                 
                 # 新しく作成したプロファイルを選択
-                for i in range(self.profile_list.count()):
-                    item = self.profile_list.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == name:
-                        self.profile_list.setCurrentItem(item)
-                        break
+                self.select_profile(name)
             else:
                 QMessageBox.warning(self, "エラー", message)
                 
@@ -446,7 +454,6 @@ class ProfileWindow(QDialog):
                 if success:
                     # プロファイル切り替えシグナルを発信
                     self.profile_switched.emit(self.selected_profile)
-                    self.load_profile_list()
                 else:
                     QMessageBox.warning(self, "エラー", message)
                     
@@ -474,7 +481,6 @@ class ProfileWindow(QDialog):
                 
                 if success:
                     QMessageBox.information(self, "成功", message)
-                    self.load_profile_list()
                     self.profiles_changed.emit()  # プロファイルリスト変更を通知
                 else:
                     QMessageBox.warning(self, "エラー", message)
@@ -483,6 +489,71 @@ class ProfileWindow(QDialog):
             print(f"プロファイル削除エラー: {e}")
             QMessageBox.critical(self, "エラー", f"プロファイルの削除中にエラーが発生しました:\n{str(e)}")
             
+    def duplicate_profile(self):
+        """プロファイルを複製"""
+        if not self.selected_profile:
+            return
+            
+        try:
+            new_name, ok = QInputDialog.getText(
+                self,
+                "プロファイル複製",
+                f"'{self.selected_profile}' の複製の名前を入力してください:",
+                text=f"{self.selected_profile} のコピー"
+            )
+            
+            if not ok or not new_name.strip():
+                return
+                
+            success, message = self.profile_manager.clone_profile(self.selected_profile, new_name.strip())
+            
+            if success:
+                self.profiles_changed.emit()  # プロファイルリスト変更を通知
+            else:
+                QMessageBox.warning(self, "エラー", message)
+                
+        except Exception as e:
+            print(f"プロファイル複製エラー: {e}")
+            QMessageBox.critical(self, "エラー", f"プロファイルの複製中にエラーが発生しました:\n{str(e)}")
+            
+    def show_profile_history(self):
+        """プロファイルの保存履歴を表示し、選択したスナップショットを復元"""
+        if not self.selected_profile:
+            return
+            
+        try:
+            profile_name = self.selected_profile
+            snapshots = self.profile_manager.get_profile_history(profile_name)
+            dialog = ProfileHistoryDialog(self, profile_name, snapshots)
+            if dialog.exec() != QDialog.DialogCode.Accepted or not dialog.selected_snapshot_id:
+                return
+                
+            is_current = profile_name == self.profile_manager.get_current_profile_name()
+            message = f"プロファイル '{profile_name}' を選択した時点の状態に戻しますか？"
+            if is_current:
+                message += "\n\n使用中のプロファイルのため、現在のグループも置き換えられます。"
+            reply = QMessageBox.question(
+                self,
+                "履歴から復元",
+                message,
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+                
+            success, message = self.profile_manager.restore_profile_snapshot(
+                profile_name, dialog.selected_snapshot_id)
+            if success:
+                if is_current:
+                    self.profile_switched.emit(profile_name)  # 表示中のアイコンに反映
+                self.profiles_changed.emit()  # プロファイルリスト変更を通知
+            else:
+                QMessageBox.warning(self, "エラー", message)
+                
+        except Exception as e:
+            print(f"プロファイル復元エラー: {e}")
+            QMessageBox.critical(self, "エラー", f"プロファイルの復元中にエラーが発生しました:\n{str(e)}")
+            
     def rename_profile(self):
         """プロファイル名を変更"""
         if not self.selected_profile:
@@ -509,15 +580,10 @@ class ProfileWindow(QDialog):
             if success:
                 QMessageBox.information(self, "成功", message)
                 old_selection = self.selected_profile
-                self.load_profile_list()
                 self.profiles_changed.emit()  # プロファイルリスト変更を通知
                 
                 # 名前変更後のプロファイルを選択
-                for i in range(self.profile_list.count()):
-                    item = self.profile_list.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == new_name:
-                        self.profile_list.setCurrentItem(item)
-                        break
+                self.select_profile(new_name)
             else:
                 QMessageBox.warning(self, "エラー", message)
                 
@@ -532,7 +598,7 @@ class ProfileWindow(QDialog):
             
         try:
             # 現在のホットキー情報を取得
-            profile_info = self.profile_manager.get_profile_info(self.selected_profile)
+            profile_info = self.profile_model.get_profile(self.profile_model.find_row(self.selected_profile))
             current_hotkey = None
             if profile_info and profile_info.get('hotkey') and 'hotkey_string' in profile_info['hotkey']:
                 current_hotkey = profile_info['hotkey']['hotkey_string']
@@ -553,7 +619,6 @@ class ProfileWindow(QDialog):
                 if success:
                     # 成功時はプロファイル詳細を更新してホットキーを再設定
                     self.show_profile_details(self.selected_profile)
-                    self.load_profile_list()
                     self.profiles_changed.emit()  # プロファイルリスト変更を通知
                     
                     if hotkey_info:
@@ -620,15 +685,10 @@ class ProfileWindow(QDialog):
             
             if success:
                 QMessageBox.information(self, "成功", f"現在の状態を '{name}' として保存しました")
-                self.load_profile_list()
                 self.profiles_changed.emit()  # プロファイルリスト変更を通知
                 
                 # 新しく保存したプロファイルを選択
-                for i in range(self.profile_list.count()):
-                    item = self.profile_list.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == name:
-                        self.profile_list.setCurrentItem(item)
-                        break
+                self.select_profile(name)
             else:
                 QMessageBox.warning(self, "エラー", message)
                 
@@ -653,7 +713,6 @@ class ProfileWindow(QDialog):
             
             if success:
                 QMessageBox.information(self, "成功", message)
-                self.load_profile_list()
                 self.profiles_changed.emit()  # プロファイルリスト変更を通知
             else:
                 QMessageBox.warning(self, "エラー", message)
@@ -691,11 +750,11 @@ class ProfileWindow(QDialog):
             
     def show_context_menu(self, position):
         """プロファイルリストのコンテキストメニューを表示"""
-        item = self.profile_list.itemAt(position)
-        if not item:
+        index = self.profile_list.indexAt(position)
+        if not index.isValid():
             return
             
-        profile_name = item.data(Qt.ItemDataRole.UserRole)
+        profile_name = index.data(Qt.ItemDataRole.UserRole)
         current_profile = self.profile_manager.get_current_profile_name()
         is_current = profile_name == current_profile
         
@@ -714,11 +773,21 @@ class ProfileWindow(QDialog):
         rename_action.triggered.connect(self.rename_profile)
         menu.addAction(rename_action)
         
+        # 複製アクション
+        duplicate_action = QAction("複製", self)
+        duplicate_action.triggered.connect(self.duplicate_profile)
+        menu.addAction(duplicate_action)
+        
         # ホットキー設定アクション
         hotkey_action = QAction("ホットキー設定", self)
         hotkey_action.triggered.connect(self.set_profile_hotkey)
         menu.addAction(hotkey_action)
         
+        # 履歴アクション
+        history_action = QAction("履歴から復元", self)
+        history_action.triggered.connect(self.show_profile_history)
+        menu.addAction(history_action)
+        
         # エクスポートアクション
         export_action = QAction("エクスポート", self)
         export_action.triggered.connect(self.export_profile)
@@ -734,15 +803,45 @@ class ProfileWindow(QDialog):
         
         menu.exec(self.profile_list.mapToGlobal(position))
         
+    def search_items(self, query):
+        """アイテムを検索して結果を表示"""
+        self.search_results.clear()
+        if not query.strip():
+            self.search_results.hide()
+            return
+            
+        results = self.profile_manager.search_items(query)
+        for result in results:
+            item_data = result['item']
+            profile_label = result['profile'] if result['profile'] is not None else "現在の状態"
+            list_item = QListWidgetItem(f"{item_data.get('name', '')}  -  {profile_label} / {result['group_name']}")
+            list_item.setToolTip(item_data.get('original_path') or item_data.get('path', ''))
+            list_item.setData(Qt.ItemDataRole.UserRole, result['profile'])
+            self.search_results.addItem(list_item)
+            
+        if not results:
+            placeholder = QListWidgetItem("見つかりませんでした")
+            placeholder.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.search_results.addItem(placeholder)
+        self.search_results.show()
+        
+    def on_search_result_clicked(self, list_item):
+        """検索結果のプロファイルを選択"""
+        profile_name = list_item.data(Qt.ItemDataRole.UserRole)
+        if profile_name is None:
+            profile_name = self.profile_manager.get_current_profile_name()
+        if not profile_name:
+            return
+        self.select_profile(profile_name)
+                
     def get_used_hotkeys(self):
         """現在使用中のホットキー一覧を取得"""
         used_hotkeys = {}
         try:
-            profiles = self.profile_manager.get_profile_list()
+            profiles = self.profile_model.get_profiles()
             for profile in profiles:
-                profile_info = self.profile_manager.get_profile_info(profile['name'])
-                if profile_info and profile_info.get('hotkey'):
-                    hotkey_info = profile_info['hotkey']
+                if profile and profile.get('hotkey'):
+                    hotkey_info = profile['hotkey']
                     if hotkey_info and 'hotkey_string' in hotkey_info:
                         used_hotkeys[hotkey_info['hotkey_string']] = profile['name']
         except Exception as e:
@@ -9,10 +9,14 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
                             QPushButton, QComboBox, QLineEdit,
                             QFileDialog, QMessageBox, QFormLayout, QSpacerItem,
                             QSizePolicy, QFrame, QScrollArea,
-                            QTextEdit, QDialogButtonBox, QKeySequenceEdit, QDialog)
+                            QTextEdit, QDialogButtonBox, QKeySequenceEdit, QDialog,
+                            QProgressDialog)
 from PyQt6.QtCore import Qt, pyqtSignal, QSettings, QStandardPaths, QTimer
 from PyQt6.QtGui import QFont, QPalette, QKeySequence
 from data.settings_manager import SettingsManager
+from data.bundle import export_bundle, import_bundle
+from data.bundle_worker import BundleWorker
+from .icon_selector_dialog import resolve_icon_path, ensure_user_icons_directory
 
 
 class ExportConfirmDialog(QDialog):
@@ -57,8 +61,8 @@ class ExportConfirmDialog(QDialog):
     def get_filename(self):
         """入力されたファイル名を取得"""
         filename = self.filename_edit.text().strip()
-        if not filename.endswith('.json'):
-            filename += '.json'
+        if not filename.endswith('.zip'):
+            filename += '.zip'
         return filename
 
 
@@ -461,6 +465,68 @@ class AdvancedTab(QWidget):
         self.max_backups.valueChanged.connect(self.settings_changed.emit)
         backup_settings_layout.addRow("最大バックアップ数:", self.max_backups)
         
+        self.save_delay = QSpinBox()
+        self.save_delay.setRange(0, 10000)
+        self.save_delay.setSingleStep(100)
+        self.save_delay.setSuffix(" ms")
+        self.save_delay.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("保存待機時間:", self.save_delay)
+        
+        self.profile_cache_size = QSpinBox()
+        self.profile_cache_size.setRange(0, 20)
+        self.profile_cache_size.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("プロファイルのキャッシュ数:", self.profile_cache_size)
+        
+        self.profile_history_size = QSpinBox()
+        self.profile_history_size.setRange(1, 100)
+        self.profile_history_size.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("プロファイルの履歴数:", self.profile_history_size)
+        
+        self.icon_cache_mb = QSpinBox()
+        self.icon_cache_mb.setRange(0, 512)
+        self.icon_cache_mb.setSuffix(" MB")
+        self.icon_cache_mb.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("アイコンキャッシュの上限:", self.icon_cache_mb)
+        
+        self.icon_memory_cache_mb = QSpinBox()
+        self.icon_memory_cache_mb.setRange(1, 256)
+        self.icon_memory_cache_mb.setSuffix(" MB")
+        self.icon_memory_cache_mb.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("アイコンのメモリ上限:", self.icon_memory_cache_mb)
+        
+        self.icon_cache_idle_minutes = QSpinBox()
+        self.icon_cache_idle_minutes.setRange(0, 1440)
+        self.icon_cache_idle_minutes.setSuffix(" 分")
+        self.icon_cache_idle_minutes.setSpecialValueText("解放しない")
+        self.icon_cache_idle_minutes.valueChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("未使用時にアイコンを解放:", self.icon_cache_idle_minutes)
+        
+        self.groups_journal = QCheckBox("変更を差分ジャーナルとして追記保存する")
+        self.groups_journal.toggled.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("ジャーナル:", self.groups_journal)
+        
+        self.sharded_groups = QCheckBox("グループごとにファイルを分けて保存する")
+        self.sharded_groups.toggled.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("分割保存:", self.sharded_groups)
+        
+        self.durability = QComboBox()
+        self.durability.addItem("安全（書き込みごとに同期）", "strict")
+        self.durability.addItem("まとめて同期", "batched")
+        self.durability.addItem("高速（同期しない）", "relaxed")
+        self.durability.currentIndexChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("書き込みの安全性:", self.durability)
+        
+        self.config_encoding = QComboBox()
+        self.config_encoding.addItem("JSON（整形）", "json")
+        self.config_encoding.addItem("JSON（圧縮）", "compact")
+        self.config_encoding.addItem("バイナリ", "binary")
+        self.config_encoding.currentIndexChanged.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("保存ファイル形式:", self.config_encoding)
+        
+        self.use_sqlite_storage = QCheckBox("SQLiteデータベースに保存する")
+        self.use_sqlite_storage.toggled.connect(self.settings_changed.emit)
+        backup_settings_layout.addRow("保存形式:", self.use_sqlite_storage)
+        
         backup_layout.addLayout(backup_settings_layout)
         
         # 設定リセットボタン
@@ -491,28 +557,64 @@ class AdvancedTab(QWidget):
         settings = self.settings_manager.get_advanced_settings()
         
         self.max_backups.setValue(settings.get('max_backups', 10))
+        self.save_delay.setValue(settings.get('save_delay_ms', 500))
+        self.profile_cache_size.setValue(settings.get('profile_cache_size', 4))
+        self.profile_history_size.setValue(settings.get('profile_history_size', 10))
+        self.icon_cache_mb.setValue(settings.get('icon_cache_mb', 32))
+        self.icon_memory_cache_mb.setValue(settings.get('icon_memory_cache_mb', 16))
+        self.icon_cache_idle_minutes.setValue(settings.get('icon_cache_idle_minutes', 10))
+        self.groups_journal.setChecked(settings.get('groups_journal', False))
+        self.sharded_groups.setChecked(settings.get('sharded_groups', False))
+        durability_index = self.durability.findData(settings.get('durability', 'strict'))
+        self.durability.setCurrentIndex(max(0, durability_index))
+        encoding_index = self.config_encoding.findData(settings.get('config_encoding', 'json'))
+        self.config_encoding.setCurrentIndex(max(0, encoding_index))
+        self.use_sqlite_storage.setChecked(self.settings_manager.data_manager.get_storage_name() == "sqlite")
         
     def get_settings(self):
         """現在の設定を取得"""
         return {
-            'max_backups': self.max_backups.value()
+            'max_backups': self.max_backups.value(),
+            'save_delay_ms': self.save_delay.value(),
+            'profile_cache_size': self.profile_cache_size.value(),
+            'profile_history_size': self.profile_history_size.value(),
+            'icon_cache_mb': self.icon_cache_mb.value(),
+            'icon_memory_cache_mb': self.icon_memory_cache_mb.value(),
+            'icon_cache_idle_minutes': self.icon_cache_idle_minutes.value(),
+            'groups_journal': self.groups_journal.isChecked(),
+            'sharded_groups': self.sharded_groups.isChecked(),
+            'durability': self.durability.currentData(),
+            'config_encoding': self.config_encoding.currentData(),
+            'use_sqlite_storage': self.use_sqlite_storage.isChecked()
         }
         
     def export_settings(self):
-        """設定をエクスポート"""
+        """設定をエクスポート（プロファイル・アイコンを含むアーカイブをバックグラウンドで作成）"""
         default_filename = self.settings_manager.get_default_export_filename()
         dialog = ExportConfirmDialog(default_filename, self)
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            filename = dialog.get_filename()
-            exported_path = self.settings_manager.export_all_settings(filename=filename)
-            if exported_path:
-                QMessageBox.information(
-                    self, "成功", 
-                    f"設定がエクスポートされました。\n保存先: {exported_path}"
-                )
-            else:
-                QMessageBox.critical(self, "エラー", "設定のエクスポートに失敗しました。")
+            export_dir = self.settings_manager.get_export_dir()
+            os.makedirs(export_dir, exist_ok=True)
+            export_path = os.path.join(export_dir, dialog.get_filename())
+            
+            snapshot = self.settings_manager.begin_bundle_export()
+            profile_manager = getattr(self.settings_manager, 'profile_manager', None)
+            self.start_bundle_worker(
+                "エクスポート中...",
+                lambda progress: export_bundle(export_path, snapshot, profile_manager, resolve_icon_path, progress),
+                self.on_export_finished,
+                "設定のエクスポートに失敗しました。"
+            )
+            
+    def on_export_finished(self, result):
+        """エクスポート完了時の処理"""
+        QMessageBox.information(
+            self, "成功", 
+            f"設定がエクスポートされました。\n"
+            f"プロファイル: {result['profiles']}件 / アイコン: {result['icons']}個\n"
+            f"保存先: {result['path']}"
+        )
                 
     def import_settings(self):
         """設定をインポート"""
@@ -520,7 +622,7 @@ class AdvancedTab(QWidget):
         export_dir = self.settings_manager.get_export_dir()
         file_path, _ = QFileDialog.getOpenFileName(
             self, "設定をインポート", export_dir,
-            "JSON Files (*.json)"
+            "エクスポートファイル (*.zip *.json)"
         )
         if file_path:
             reply = QMessageBox.question(
@@ -529,21 +631,70 @@ class AdvancedTab(QWidget):
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
             if reply == QMessageBox.StandardButton.Yes:
-                if self.settings_manager.import_all_settings(file_path):
-                    restart_reply = QMessageBox.question(
-                        self, "再起動", 
-                        "設定がインポートされました。\n変更を反映するためにアプリケーションを再起動しますか？",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                        QMessageBox.StandardButton.Yes
-                    )
-                    if restart_reply == QMessageBox.StandardButton.Yes:
-                        # メインアプリケーションの再起動機能を呼び出し
-                        self._request_application_restart()
+                if file_path.lower().endswith('.json'):
+                    # 旧形式（1つのJSONファイル）
+                    if self.settings_manager.import_all_settings(file_path):
+                        self.confirm_restart_after_import()
                     else:
-                        QMessageBox.information(self, "完了", "設定がインポートされました。\n手動でアプリケーションを再起動してください。")
-                else:
-                    QMessageBox.critical(self, "エラー", "設定のインポートに失敗しました。")
+                        QMessageBox.critical(self, "エラー", "設定のインポートに失敗しました。")
+                    return
                     
+                self.settings_manager.begin_bundle_import()
+                profile_manager = getattr(self.settings_manager, 'profile_manager', None)
+                icons_dir = ensure_user_icons_directory()
+                self.start_bundle_worker(
+                    "インポート中...",
+                    lambda progress: import_bundle(file_path, profile_manager, icons_dir, progress),
+                    self.on_import_finished,
+                    "設定のインポートに失敗しました。"
+                )
+                
+    def on_import_finished(self, result):
+        """インポート完了時の処理（設定・グループはGUIスレッドで反映）"""
+        if self.settings_manager.apply_bundle_import(result):
+            self.confirm_restart_after_import()
+        else:
+            QMessageBox.critical(self, "エラー", "設定のインポートに失敗しました。")
+            
+    def confirm_restart_after_import(self):
+        """インポート後の再起動を確認"""
+        restart_reply = QMessageBox.question(
+            self, "再起動", 
+            "設定がインポートされました。\n変更を反映するためにアプリケーションを再起動しますか？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.Yes
+        )
+        if restart_reply == QMessageBox.StandardButton.Yes:
+            # メインアプリケーションの再起動機能を呼び出し
+            self._request_application_restart()
+        else:
+            QMessageBox.information(self, "完了", "設定がインポートされました。\n手動でアプリケーションを再起動してください。")
+            
+    def start_bundle_worker(self, label, task, on_success, error_message):
+        """アーカイブ処理をバックグラウンドで実行し、進捗ダイアログを表示"""
+        progress_dialog = QProgressDialog(label, None, 0, 0, self)
+        progress_dialog.setWindowTitle("設定管理")
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(300)
+        
+        worker = BundleWorker(task, self)
+        
+        def on_progress(done, total, message):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+            progress_dialog.setLabelText(message)
+            
+        def on_failed(message):
+            QMessageBox.critical(self, "エラー", f"{error_message}\n{message}")
+            
+        worker.progress.connect(on_progress)
+        worker.succeeded.connect(on_success)
+        worker.failed.connect(on_failed)
+        worker.finished.connect(progress_dialog.close)
+        worker.finished.connect(worker.deleteLater)
+        self.bundle_worker = worker  # 実行中に破棄されないよう保持
+        worker.start()
+        
     def reset_settings(self):
         """設定をリセット"""
         reply = QMessageBox.question(